@@ -14,9 +14,44 @@
 import os
 import tkinter as tk
 from tkinter import filedialog, scrolledtext, messagebox, ttk, simpledialog
+from tkinter import font as tkfont
 import json
+import re
 import datetime
 import hashlib
+import time
+import threading
+import concurrent.futures
+import cProfile
+import pstats
+import tracemalloc
+import struct
+import sys
+import ctypes
+import select
+import queue
+import math
+import random
+import statistics
+import shutil
+import errno
+import stat
+import tempfile
+import heapq
+import sqlite3
+import bisect
+import collections
+import itertools
+import socket
+import subprocess
+import zlib
+import hmac
+import argparse
+from array import array
+try:
+    import fcntl  # FIEMAP extent lookup (Linux only)
+except ImportError:
+    fcntl = None
 
 
 #### GUI Class
@@ -51,10 +86,87 @@ class ArchiveComparerGUI:
         
         # Current comparison result
         self.current_report = None
+        # Full report a scoped comparison can be merged into
+        self.scope_base_report = None
+        
+        # Structured console output shared by both consoles (search index)
+        self.console_log = ConsoleLog()
         
         # Large console window reference
         self.large_console_window = None
-        self.large_console_text = None
+        self.large_console_view = None
+        self.console_search_window = None
+        
+        # Profiling mode (cProfile + tracemalloc) for comparisons and duplicate scans
+        self.profiling_var = tk.BooleanVar(value=False)
+        
+        # Advanced options (see open_options_dialog)
+        self.io_order_var = tk.StringVar(value="none")
+        self.cache_hints_var = tk.BooleanVar(value=False)
+        self.scan_workers_var = tk.StringVar(value=str(SCAN_WORKERS))
+        self.scope_var = tk.StringVar(value="")
+        self.memory_budget_var = tk.StringVar(value="")
+        self.max_mbps_var = tk.StringVar(value="")
+        self.max_iops_var = tk.StringVar(value="")
+        self.latency_target_var = tk.StringVar(value="")
+        self.low_priority_var = tk.BooleanVar(value=False)
+        self.tree_hash_var = tk.BooleanVar(value=False)
+        self.content_match_var = tk.BooleanVar(value=False)
+        self.chunk_analysis_var = tk.BooleanVar(value=False)
+        self.near_dup_var = tk.BooleanVar(value=False)
+        self.near_dup_threshold_var = tk.StringVar(value=str(int(NEAR_DUP_THRESHOLD * 100)))
+        self.near_dup_max_mb_var = tk.StringVar(value=str(NEAR_DUP_MAX_BYTES // (1024 * 1024)))
+        self.sampling_var = tk.BooleanVar(value=False)
+        self.sample_confidence_var = tk.StringVar(value="95")
+        self.sample_margin_var = tk.StringVar(value="1")
+        self.filter_exclude_rules = ""
+        self.filter_include_var = tk.StringVar(value="")
+        self.filter_min_size_var = tk.StringVar(value="")
+        self.filter_max_size_var = tk.StringVar(value="")
+        self.filter_min_age_var = tk.StringVar(value="")
+        self.filter_max_age_var = tk.StringVar(value="")
+        self.report_store_var = tk.BooleanVar(value=False)
+        self.report_store_path_var = tk.StringVar(value=DEFAULT_REPORT_STORE_PATH)
+        self.options_window = None
+        
+        # Throttle used by the duplicate scan (None = unthrottled)
+        self.io_throttle = None
+        
+        # Watch mode (continuous incremental re-verification)
+        self.archive_watcher = None
+        self.watch_queue = queue.Queue()
+        
+        # Comparison running in the background (results streamed to the console)
+        self.comparison_running = False
+        self.comparison_messages = queue.Queue()
+        self.live_counts = None
+        
+        # Batch job queue (many reference/extracted pairs)
+        self.batch_window = None
+        self.batch_job_queue = None
+        self.batch_messages = queue.Queue()
+        
+        # Deduplication of the last duplicate scan (hardlinks / reflinks)
+        self.last_duplicates_report = None
+        self.dedup_window = None
+        self.dedup_running = False
+        self.dedup_messages = queue.Queue()
+        self.duplicates_running = False
+        self.duplicates_messages = queue.Queue()
+        
+        # Diff of two saved reports / manifests
+        self.report_diff_messages = queue.Queue()
+        
+        # SQLite report store (opened on first use)
+        self.report_store = None
+        self.store_window = None
+        
+        # Sharded verification (shard workers on this machine or others)
+        self.shard_window = None
+        self.shard_messages = queue.Queue()
+        
+        # Checksum lists (SHA256SUMS, *.md5) written from a scan
+        self.checksum_messages = queue.Queue()
         
         # Setup the beautiful GUI
         self.setup_gui()
@@ -176,17 +288,324 @@ class ArchiveComparerGUI:
             ("📥 Importer Résultat", self.import_result, 0, 2),
             ("🗑️ Vider Console", self.clear_console, 0, 3),
             ("🖥️ Grande Console", self.open_large_console, 1, 0),
-            ("🔍 Détecter Doublons", self.detect_duplicates, 1, 1)
+            ("🔍 Détecter Doublons", self.detect_duplicates, 1, 1),
+            ("⚙️ Options", self.open_options_dialog, 1, 2),
+            ("👁️ Surveillance Continue", self.toggle_watch_mode, 2, 0),
+            ("📋 File de Vérifications", self.open_batch_dialog, 2, 1),
+            ("♻️ Dédupliquer", self.open_dedup_dialog, 2, 2),
+            ("🕰️ Comparer Deux Rapports", self.compare_saved_results, 2, 3),
+            ("🗄️ Base de Rapports", self.open_report_store_browser, 3, 0),
+            ("🧩 Vérification Répartie", self.open_sharded_dialog, 3, 1),
+            ("🧾 Vérifier des Sommes", self.verify_checksum_list_gui, 3, 2),
+            ("🧾 Créer des Sommes", self.create_checksum_list_gui, 3, 3),
+            ("🔁 Revérifier les Différences", self.recheck_differences_gui, 4, 0)
         ]
         
         for text, command, row, col in other_buttons:
             btn = ttk.Button(action_frame, text=text, command=command, style='Modern.TButton')
             btn.grid(row=row, column=col, padx=10, pady=5, sticky=(tk.W, tk.E))
         
+        profiling_check = ttk.Checkbutton(action_frame, text="🧪 Mode Profilage",
+                                          variable=self.profiling_var)
+        profiling_check.grid(row=1, column=3, padx=10, pady=5, sticky=tk.W)
+        
         # Configure column weights for equal distribution
         for i in range(4):
             action_frame.columnconfigure(i, weight=1)
     
+    def open_options_dialog(self):
+        """
+        Ouvrir la fenêtre des options avancées de comparaison.
+        """
+        if self.options_window and self.options_window.winfo_exists():
+            self.options_window.lift()
+            self.options_window.focus_force()
+            return
+        
+        self.options_window = tk.Toplevel(self.root)
+        self.options_window.title("⚙️ Options Avancées")
+        self.options_window.resizable(False, False)
+        
+        main_frame = ttk.Frame(self.options_window, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(1, weight=1)
+        
+        # Ordonnancement des lectures
+        io_frame = ttk.LabelFrame(main_frame, text=" 💽 Ordonnancement des Lectures ", padding="10")
+        io_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        io_choices = [
+            ("Ordre quelconque", "none"),
+            ("Par numéro d'inode", "inode"),
+            ("Par position physique (FIEMAP, repli sur l'inode)", "extent")
+        ]
+        for row, (text, value) in enumerate(io_choices):
+            ttk.Radiobutton(io_frame, text=text, value=value,
+                            variable=self.io_order_var).grid(row=row, column=0, sticky=tk.W)
+        ttk.Checkbutton(io_frame, text="Ne pas polluer le cache disque (posix_fadvise)",
+                        variable=self.cache_hints_var).grid(row=len(io_choices), column=0, sticky=tk.W, pady=(5, 0))
+        scan_workers_frame = ttk.Frame(io_frame)
+        scan_workers_frame.grid(row=len(io_choices) + 1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Label(scan_workers_frame, text="Listages de dossiers simultanés (partages réseau):").pack(side=tk.LEFT)
+        ttk.Spinbox(scan_workers_frame, from_=1, to=64, width=5,
+                    textvariable=self.scan_workers_var).pack(side=tk.LEFT, padx=(5, 0))
+        memory_budget_frame = ttk.Frame(io_frame)
+        memory_budget_frame.grid(row=len(io_choices) + 2, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Label(memory_budget_frame, text="Budget mémoire (MB, vide = illimité, tri sur disque au-delà):").pack(side=tk.LEFT)
+        ttk.Entry(memory_budget_frame, textvariable=self.memory_budget_var, width=8).pack(side=tk.LEFT, padx=(5, 0))
+        scope_frame = ttk.Frame(io_frame)
+        scope_frame.grid(row=len(io_choices) + 3, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Label(scope_frame, text="Périmètre (sous-dossiers ou motifs séparés par ';', vide = tout):").pack(side=tk.LEFT)
+        ttk.Entry(scope_frame, textvariable=self.scope_var, width=30).pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Limitation des ressources
+        throttle_frame = ttk.LabelFrame(main_frame, text=" 🐢 Limitation pour Serveurs en Production ", padding="10")
+        throttle_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        throttle_fields = [
+            ("Débit maximal (MB/s):", self.max_mbps_var),
+            ("IOPS maximales:", self.max_iops_var),
+            ("Latence cible (ms, ralentit au-delà):", self.latency_target_var)
+        ]
+        for row, (text, variable) in enumerate(throttle_fields):
+            ttk.Label(throttle_frame, text=text).grid(row=row, column=0, sticky=tk.W, pady=2)
+            ttk.Entry(throttle_frame, textvariable=variable, width=10).grid(row=row, column=1, sticky=tk.W, padx=(10, 0))
+        ttk.Checkbutton(throttle_frame, text="Priorité basse (nice / ionice idle)",
+                        variable=self.low_priority_var).grid(row=len(throttle_fields), column=0, columnspan=2,
+                                                             sticky=tk.W, pady=(5, 0))
+        ttk.Label(throttle_frame, text="Laisser vide pour ne pas limiter",
+                  font=('Segoe UI', 8), foreground='#718096').grid(row=len(throttle_fields) + 1, column=0,
+                                                                   columnspan=2, sticky=tk.W)
+        
+        # Hachage des gros fichiers
+        hash_frame = ttk.LabelFrame(main_frame, text=" 🔐 Hachage ", padding="10")
+        hash_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        ttk.Checkbutton(hash_frame,
+                        text=f"Hachage parallèle par blocs des fichiers ≥ {format_size(LARGE_FILE_THRESHOLD)} (empreinte en arbre)",
+                        variable=self.tree_hash_var).grid(row=0, column=0, sticky=tk.W)
+        ttk.Checkbutton(hash_frame,
+                        text="Rechercher le contenu des fichiers manquants/supplémentaires dans l'autre arborescence",
+                        variable=self.content_match_var).grid(row=1, column=0, sticky=tk.W)
+        ttk.Checkbutton(hash_frame,
+                        text="Localiser les zones modifiées (découpage par contenu, relit les fichiers modifiés)",
+                        variable=self.chunk_analysis_var).grid(row=2, column=0, sticky=tk.W)
+        
+        # Échantillonnage statistique
+        sampling_frame = ttk.LabelFrame(main_frame, text=" 🎲 Pré-vérification par Échantillonnage ", padding="10")
+        sampling_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        ttk.Checkbutton(sampling_frame, text="Ne vérifier le contenu que d'un échantillon stratifié des fichiers communs",
+                        variable=self.sampling_var).grid(row=0, column=0, columnspan=4, sticky=tk.W)
+        ttk.Label(sampling_frame, text="Niveau de confiance (%):").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Combobox(sampling_frame, textvariable=self.sample_confidence_var, values=("90", "95", "99"),
+                     width=6).grid(row=1, column=1, sticky=tk.W, padx=(10, 15), pady=(5, 0))
+        ttk.Label(sampling_frame, text="Marge d'erreur (%):").grid(row=1, column=2, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(sampling_frame, textvariable=self.sample_margin_var, width=6).grid(row=1, column=3, sticky=tk.W,
+                                                                                    padx=(10, 0), pady=(5, 0))
+        
+        # Filtres d'analyse
+        filter_frame = ttk.LabelFrame(main_frame, text=" 🧹 Filtres (comparaison et doublons) ", padding="10")
+        filter_frame.grid(row=0, column=2, rowspan=4, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(15, 0), pady=(0, 10))
+        filter_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(filter_frame, text="Exclusions (une règle par ligne, syntaxe .gitignore, 're:' pour une regex):").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W)
+        self.filter_exclude_text = tk.Text(filter_frame, height=6, width=45, font=('Consolas', 9))
+        self.filter_exclude_text.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(2, 8))
+        self.filter_exclude_text.insert("1.0", self.filter_exclude_rules)
+        
+        filter_fields = [
+            ("Inclure seulement (globs séparés par ';'):", self.filter_include_var),
+            ("Taille minimale (KB):", self.filter_min_size_var),
+            ("Taille maximale (MB):", self.filter_max_size_var),
+            ("Âge minimal (jours):", self.filter_min_age_var),
+            ("Âge maximal (jours):", self.filter_max_age_var)
+        ]
+        for row, (text, variable) in enumerate(filter_fields, 2):
+            ttk.Label(filter_frame, text=text).grid(row=row, column=0, sticky=tk.W, pady=2)
+            ttk.Entry(filter_frame, textvariable=variable, width=20).grid(row=row, column=1, sticky=(tk.W, tk.E),
+                                                                          padx=(10, 0))
+        ttk.Label(filter_frame, text="Les doublons gardent en plus leurs exclusions système par défaut",
+                  font=('Segoe UI', 8), foreground='#718096').grid(row=len(filter_fields) + 2, column=0,
+                                                                   columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        # Base de rapports SQLite
+        store_frame = ttk.LabelFrame(main_frame, text=" 🗄️ Base de Rapports ", padding="10")
+        store_frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        store_frame.columnconfigure(1, weight=1)
+        ttk.Checkbutton(store_frame, text="Enregistrer chaque comparaison dans la base SQLite",
+                        variable=self.report_store_var).grid(row=0, column=0, columnspan=3, sticky=tk.W)
+        ttk.Label(store_frame, text="Fichier de la base:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(store_frame, textvariable=self.report_store_path_var).grid(row=1, column=1, sticky=(tk.W, tk.E),
+                                                                            padx=(10, 0), pady=(5, 0))
+        ttk.Button(store_frame, text="📂", width=3,
+                   command=lambda: self.report_store_path_var.set(filedialog.asksaveasfilename(
+                       title="Base de rapports", defaultextension=".db", confirmoverwrite=False,
+                       filetypes=[("Base SQLite", "*.db")]) or self.report_store_path_var.get())).grid(
+            row=1, column=2, padx=(5, 0), pady=(5, 0))
+        
+        # Quasi-doublons (MinHash / LSH)
+        near_dup_frame = ttk.LabelFrame(main_frame, text=" 🪞 Quasi-doublons ", padding="10")
+        near_dup_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        ttk.Checkbutton(near_dup_frame, text="Regrouper aussi les fichiers similaires lors de la détection des doublons",
+                        variable=self.near_dup_var).grid(row=0, column=0, columnspan=4, sticky=tk.W)
+        ttk.Label(near_dup_frame, text="Similarité minimale (%):").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(near_dup_frame, textvariable=self.near_dup_threshold_var, width=6).grid(
+            row=1, column=1, sticky=tk.W, padx=(10, 15), pady=(5, 0))
+        ttk.Label(near_dup_frame, text="Lecture maximale par fichier (MB):").grid(row=1, column=2, sticky=tk.W,
+                                                                                pady=(5, 0))
+        ttk.Entry(near_dup_frame, textvariable=self.near_dup_max_mb_var, width=6).grid(
+            row=1, column=3, sticky=tk.W, padx=(10, 0), pady=(5, 0))
+        
+        self.options_window.protocol("WM_DELETE_WINDOW", self._close_options_dialog)
+        ttk.Button(main_frame, text="✅ Fermer", command=self._close_options_dialog,
+                   style='Modern.TButton').grid(row=10, column=0, columnspan=3, pady=(10, 0))
+    
+    def _close_options_dialog(self):
+        """
+        Mémoriser les règles d'exclusion saisies et fermer la fenêtre des options.
+        """
+        self.filter_exclude_rules = self.filter_exclude_text.get("1.0", tk.END).strip()
+        self.options_window.destroy()
+        self.options_window = None
+    
+    def get_scan_filter(self, for_duplicates=False):
+        """
+        Construire le filtre d'analyse à partir des options (None si aucun filtre pour la comparaison).
+        """
+        if self.options_window and self.options_window.winfo_exists():
+            self.filter_exclude_rules = self.filter_exclude_text.get("1.0", tk.END).strip()
+        
+        def parse_number(variable, label, factor):
+            value = variable.get().strip().replace(',', '.')
+            if not value:
+                return None
+            try:
+                return float(value) * factor
+            except ValueError:
+                raise ValueError(f"Valeur invalide pour {label}: {value}")
+        
+        exclude = self.filter_exclude_rules.splitlines()
+        include = [rule for rule in self.filter_include_var.get().split(';') if rule.strip()]
+        bounds = {
+            'min_size': parse_number(self.filter_min_size_var, "la taille minimale", 1024),
+            'max_size': parse_number(self.filter_max_size_var, "la taille maximale", 1024 * 1024),
+            'min_age_days': parse_number(self.filter_min_age_var, "l'âge minimal", 1),
+            'max_age_days': parse_number(self.filter_max_age_var, "l'âge maximal", 1)
+        }
+        
+        if for_duplicates:
+            if bounds['min_size'] is None:
+                del bounds['min_size']  # Garder le minimum de 1KB par défaut
+            return ScanFilter.duplicate_scan_defaults(extra_exclude=exclude, include=include, **bounds)
+        if not any(rule.strip() for rule in exclude) and not include and all(v is None for v in bounds.values()):
+            return None
+        return ScanFilter(exclude=exclude, include=include, **bounds)
+    
+    def get_comparison_options(self):
+        """
+        Convertir les options de la fenêtre Options en paramètres de compare_archives_with_progress.
+        """
+        io_order = self.io_order_var.get()
+        return {
+            'io_order': None if io_order == "none" else io_order,
+            'cache_hints': self.cache_hints_var.get(),
+            'throttle': self.get_io_throttle(),
+            'low_priority': self.low_priority_var.get(),
+            'large_file_threshold': LARGE_FILE_THRESHOLD if self.tree_hash_var.get() else None,
+            'scan_filter': self.get_scan_filter(),
+            'content_matching': self.content_match_var.get(),
+            'chunk_analysis': self.chunk_analysis_var.get(),
+            'scan_workers': self.get_scan_workers(),
+            'memory_budget': self.get_memory_budget(),
+            'scope': self.get_scope(),
+            **self.get_sampling_options()
+        }
+    
+    def get_sampling_options(self):
+        """
+        Lire les paramètres d'échantillonnage (niveau de confiance et marge en pourcentage).
+        """
+        if not self.sampling_var.get():
+            return {}
+        try:
+            confidence = float(self.sample_confidence_var.get().replace(',', '.')) / 100
+            margin = float(self.sample_margin_var.get().replace(',', '.')) / 100
+        except ValueError:
+            raise ValueError("Paramètres d'échantillonnage invalides")
+        if not (0 < confidence < 1 and 0 < margin < 1):
+            raise ValueError("Le niveau de confiance et la marge doivent être compris entre 0 et 100%")
+        return {'sample_confidence': confidence, 'sample_margin': margin}
+    
+    def get_near_duplicate_options(self):
+        """
+        Lire les paramètres des quasi-doublons (similarité en %, lecture maximale en MB), None si désactivés.
+        """
+        if not self.near_dup_var.get():
+            return None
+        try:
+            threshold = float(self.near_dup_threshold_var.get().replace(',', '.')) / 100
+            max_mb = float(self.near_dup_max_mb_var.get().replace(',', '.'))
+        except ValueError:
+            raise ValueError("Paramètres des quasi-doublons invalides")
+        if not (0 < threshold <= 1 and max_mb > 0):
+            raise ValueError("La similarité doit être comprise entre 0 et 100% et la lecture maximale positive")
+        return {'threshold': threshold, 'max_bytes': int(max_mb * 1024 * 1024)}
+    
+    def get_scan_workers(self):
+        """
+        Lire le nombre de listages de dossiers simultanés.
+        """
+        value = self.scan_workers_var.get().strip()
+        try:
+            workers = int(value)
+        except ValueError:
+            raise ValueError(f"Nombre de listages simultanés invalide: {value}")
+        if workers < 1:
+            raise ValueError(f"Le nombre de listages simultanés doit être positif: {value}")
+        return workers
+    
+    def get_scope(self):
+        """
+        Lire le périmètre de la comparaison (sous-chemins ou motifs relatifs), None pour tout comparer.
+        """
+        scope = ScanScope.from_list(self.scope_var.get().split(';'))
+        return scope.to_list() if scope else None
+    
+    def get_memory_budget(self):
+        """
+        Lire le budget mémoire (MB) en octets, None si illimité.
+        """
+        value = self.memory_budget_var.get().strip().replace(',', '.')
+        if not value:
+            return None
+        try:
+            budget = float(value)
+        except ValueError:
+            raise ValueError(f"Budget mémoire invalide: {value}")
+        if budget <= 0:
+            raise ValueError(f"Le budget mémoire doit être positif: {value}")
+        return int(budget * 1024 * 1024)
+    
+    def get_io_throttle(self):
+        """
+        Construire le limiteur d'E/S à partir des options (None si aucune limite).
+        """
+        def parse_number(variable, label):
+            value = variable.get().strip().replace(',', '.')
+            if not value:
+                return None
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValueError(f"Valeur invalide pour {label}: {value}")
+            if number <= 0:
+                raise ValueError(f"{label} doit être positif: {value}")
+            return number
+        
+        return IOThrottle.from_settings(parse_number(self.max_mbps_var, "le débit maximal"),
+                                        parse_number(self.max_iops_var, "les IOPS maximales"),
+                                        parse_number(self.latency_target_var, "la latence cible"))
+    
     def create_console_section(self, parent):
         """
         Create a beautiful console section.
@@ -197,9 +616,10 @@ class ArchiveComparerGUI:
         console_frame.columnconfigure(0, weight=1)
         console_frame.rowconfigure(0, weight=1)
         
-        # Create console with custom styling
-        self.console = scrolledtext.ScrolledText(
-            console_frame, 
+        # Create console with custom styling (only the visible records are rendered)
+        self.console = VirtualConsoleView(
+            console_frame,
+            self.console_log,
             wrap=tk.WORD, 
             height=25, 
             width=90,
@@ -211,17 +631,7 @@ class ArchiveComparerGUI:
             relief='flat',
             borderwidth=1
         )
-        self.console.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Configure text tags for colored output
-        self.console.tag_configure('timestamp', foreground='#569CD6')  # Blue for timestamps
-        self.console.tag_configure('success', foreground='#4EC9B0')    # Green for success
-        self.console.tag_configure('error', foreground='#F44747')      # Red for errors
-        self.console.tag_configure('warning', foreground='#FFCC02')    # Yellow for warnings
-        self.console.tag_configure('info', foreground='#9CDCFE')       # Light blue for info
-        self.console.tag_configure('missing', foreground='#F48771')    # Light red for missing
-        self.console.tag_configure('extra', foreground='#B5CEA8')      # Light green for extra
-        self.console.tag_configure('modified', foreground='#DCDCAA')   # Light yellow for modified
+        self.console.frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
     
     def create_status_bar(self, parent):
         """
@@ -259,6 +669,12 @@ class ArchiveComparerGUI:
         # Initially hide the progress bar
         self.progress_bar.grid_remove()
         
+        # Live counters of a running comparison (initially hidden)
+        self.live_counts_var = tk.StringVar()
+        self.live_counts_label = ttk.Label(status_frame, textvariable=self.live_counts_var,
+                                           style='Subtitle.TLabel')
+        self.live_counts_label.grid_remove()
+        
         # Initialize with welcome message
         self.log_message("✨ Welcome to Archive Comparer v2.0!")
         self.log_message("🎯 Professional Archive Integrity Verification Tool")
@@ -386,59 +802,29 @@ class ArchiveComparerGUI:
                                   command=self.browse_output_file, style='Modern.TButton')
         out_browse_btn.grid(row=0, column=1)
     
-    def log_message(self, message, tag=None):
+    def log_message(self, message, tag=None, path=None):
         """
         Add a beautifully formatted message to both consoles with timestamp and colors.
+        The message is also kept as a structured record (see ConsoleLog) for the search;
+        path is the file or directory the message is about, if any.
         """
-        import datetime
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         
-        # Format the complete message
-        full_message = f"[{timestamp}] {message}"
-        
         # Determine message type and color (with French translations)
-        if ("✨" in message or "✅" in message or 
-            "successfully" in message.lower() or "success" in message.lower() or
-            "réussi" in message.lower() or "parfaitement" in message.lower() or
-            "terminé avec succès" in message.lower() or "aucun doublon" in message.lower()):
-            tag = 'success'
-        elif ("❌" in message or 
-              "error" in message.lower() or "failed" in message.lower() or
-              "erreur" in message.lower() or "échec" in message.lower()):
-            tag = 'error'
-        elif ("⚠️" in message or 
-              "warning" in message.lower() or "attention" in message.lower() or
-              "impossible" in message.lower() or "interrompue" in message.lower()):
-            tag = 'warning'
-        elif ("🔍" in message or "🔄" in message or "📊" in message or "🔐" in message or
-              "checking" in message.lower() or "scanning" in message.lower() or
-              "analyse" in message.lower() or "comparaison" in message.lower() or
-              "vérification" in message.lower() or "traitement" in message.lower() or
-              "génération" in message.lower()):
-            tag = 'info'
-        elif ("MISSING" in message or "MANQUANTS" in message or "manquant" in message.lower()):
-            tag = 'missing'
-        elif ("EXTRA" in message or "SUPPLÉMENTAIRES" in message or "supplémentaire" in message.lower()):
-            tag = 'extra'
-        elif ("MODIFIED" in message or "MODIFIÉS" in message or "modifié" in message.lower() or
-              "doublons" in message.lower() or "duplicate" in message.lower()):
-            tag = 'modified'
+        tag = classify_console_message(message, tag)
+        record = self.console_log.append(timestamp, tag, message, path)
         
         # Add to main console
-        self.console.insert(tk.END, f"[{timestamp}] ", 'timestamp')
-        self.console.insert(tk.END, f"{message}\n", tag)
-        self.console.see(tk.END)
+        self.console.on_append(record)
         
         # Add to large console if it exists
-        if self.large_console_text and self.large_console_window and self.large_console_window.winfo_exists():
+        if self.large_console_view and self.large_console_window and self.large_console_window.winfo_exists():
             try:
-                self.large_console_text.insert(tk.END, f"[{timestamp}] ", 'timestamp')
-                self.large_console_text.insert(tk.END, f"{message}\n", tag)
-                self.large_console_text.see(tk.END)
+                self.large_console_view.on_append(record)
             except tk.TclError:
                 # Large console window was closed
                 self.large_console_window = None
-                self.large_console_text = None
+                self.large_console_view = None
         
         self.root.update()
     
@@ -483,9 +869,12 @@ class ArchiveComparerGUI:
         console_frame = ttk.Frame(main_frame)
         console_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Créer un grand texte avec défilement et paramètres optimisés
-        self.large_console_text = scrolledtext.ScrolledText(
+        # Créer une vue de la console partagée: seuls les messages visibles sont affichés
+        self.large_console_view = VirtualConsoleView(
             console_frame,
+            self.console_log,
+            banner=[("🖥️ Grande console initialisée pour le traitement de gros volumes!", 'success'),
+                    ("💪 Prête à gérer des jeux de données massifs (96GB+, 144K+ fichiers)", 'info')],
             wrap=tk.NONE,  # Pas de retour à la ligne pour une meilleure performance
             height=40,
             width=120,
@@ -495,26 +884,9 @@ class ArchiveComparerGUI:
             insertbackground='#FFFFFF',
             selectbackground='#264F78',
             relief='flat',
-            borderwidth=1,
-            maxundo=20,  # Limit undo operations for performance
-            undo=True
+            borderwidth=1
         )
-        self.large_console_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Configure text tags for colored output (same as main console)
-        tags = {
-            'timestamp': '#569CD6',
-            'success': '#4EC9B0',
-            'error': '#F44747',
-            'warning': '#FFCC02',
-            'info': '#9CDCFE',
-            'missing': '#F48771',
-            'extra': '#B5CEA8',
-            'modified': '#DCDCAA'
-        }
-        
-        for tag, color in tags.items():
-            self.large_console_text.tag_configure(tag, foreground=color)
+        self.large_console_view.frame.pack(fill=tk.BOTH, expand=True)
         
         # Add control buttons frame
         control_frame = ttk.Frame(main_frame)
@@ -539,78 +911,6 @@ class ArchiveComparerGUI:
                               font=('Segoe UI', 8),
                               foreground='#4EC9B0')
         perf_label.pack(side=tk.RIGHT)
-        
-        # Copier le contenu existant vers la grande console
-        if self.console.get("1.0", tk.END).strip():
-            # Copier le contenu avec le formatage approprié
-            self._copy_console_content_with_tags()
-        
-        # Message de bienvenue avec couleurs
-        self.large_console_text.insert(tk.END, "🖥️ Grande console initialisée pour le traitement de gros volumes!\n", 'success')
-        self.large_console_text.insert(tk.END, "💪 Prête à gérer des jeux de données massifs (96GB+, 144K+ fichiers)\n", 'info')
-        self.large_console_text.see(tk.END)
-    
-    def _copy_console_content_with_tags(self):
-        """
-        Copier le contenu de la console principale vers la grande console avec les balises de couleur appropriées.
-        """
-        try:
-            # Get all content from main console
-            content = self.console.get("1.0", tk.END)
-            lines = content.split('\n')
-            
-            for line in lines:
-                if not line.strip():
-                    continue
-                    
-                # Parse timestamp and message
-                if line.startswith('[') and '] ' in line:
-                    timestamp_end = line.find('] ') + 2
-                    timestamp = line[:timestamp_end]
-                    message = line[timestamp_end:]
-                    
-                    # Add timestamp with color
-                    self.large_console_text.insert(tk.END, timestamp, 'timestamp')
-                    
-                    # Determine message color (with French translations)
-                    tag = None
-                    if ("✨" in message or "✅" in message or 
-                        "successfully" in message.lower() or "success" in message.lower() or
-                        "réussi" in message.lower() or "parfaitement" in message.lower() or
-                        "terminé avec succès" in message.lower() or "aucun doublon" in message.lower()):
-                        tag = 'success'
-                    elif ("❌" in message or 
-                          "error" in message.lower() or "failed" in message.lower() or
-                          "erreur" in message.lower() or "échec" in message.lower()):
-                        tag = 'error'
-                    elif ("⚠️" in message or 
-                          "warning" in message.lower() or "attention" in message.lower() or
-                          "impossible" in message.lower() or "interrompue" in message.lower()):
-                        tag = 'warning'
-                    elif ("🔍" in message or "🔄" in message or "📊" in message or "🔐" in message or
-                          "checking" in message.lower() or "scanning" in message.lower() or
-                          "analyse" in message.lower() or "comparaison" in message.lower() or
-                          "vérification" in message.lower() or "traitement" in message.lower() or
-                          "génération" in message.lower()):
-                        tag = 'info'
-                    elif ("MISSING" in message or "MANQUANTS" in message or "manquant" in message.lower()):
-                        tag = 'missing'
-                    elif ("EXTRA" in message or "SUPPLÉMENTAIRES" in message or "supplémentaire" in message.lower()):
-                        tag = 'extra'
-                    elif ("MODIFIED" in message or "MODIFIÉS" in message or "modifié" in message.lower() or
-                          "doublons" in message.lower() or "duplicate" in message.lower()):
-                        tag = 'modified'
-                    
-                    # Add message with color
-                    self.large_console_text.insert(tk.END, message + '\n', tag)
-                else:
-                    # Line without timestamp
-                    self.large_console_text.insert(tk.END, line + '\n')
-                    
-        except Exception as e:
-            # If copying fails, just add the raw content
-            content = self.console.get("1.0", tk.END)
-            self.large_console_text.insert("1.0", content)
     
     def update_status(self, message, icon="✅"):
         """
@@ -657,7 +957,7 @@ class ArchiveComparerGUI:
         """
         Vider la console avec un bel effet d'animation.
         """
-        self.console.delete(1.0, tk.END)
+        self.console.clear()
         self.log_message("🗑️ Console vidée et prête pour de nouvelles opérations")
         self.update_status("Console vidée", "🗑️")
     
@@ -665,16 +965,16 @@ class ArchiveComparerGUI:
         """
         Vider la grande console et ajouter un message de bienvenue coloré.
         """
-        if self.large_console_text:
-            self.large_console_text.delete(1.0, tk.END)
-            self.large_console_text.insert(tk.END, "🗑️ Grande console vidée et prête pour les gros volumes de données!\n", 'success')
-            self.large_console_text.insert(tk.END, "💡 All colors are working properly for enhanced readability\n", 'info')
+        if self.large_console_view:
+            self.large_console_view.clear(banner=[
+                ("🗑️ Grande console vidée et prête pour les gros volumes de données!", 'success'),
+                ("💡 All colors are working properly for enhanced readability", 'info')])
     
     def save_console_output(self):
         """
         Save the large console output to a file.
         """
-        if not self.large_console_text:
+        if not self.large_console_view:
             return
         
         file_path = filedialog.asksaveasfilename(
@@ -685,9 +985,9 @@ class ArchiveComparerGUI:
         
         if file_path:
             try:
-                content = self.large_console_text.get("1.0", tk.END)
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                    for record in self.large_console_view.iter_records():
+                        f.write(f"[{record.timestamp}] {record.message}\n")
                 self.log_message(f"💾 Console output saved to: {file_path}")
                 messagebox.showinfo("✅ Save Successful", f"Console output saved to:\n{file_path}")
             except Exception as e:
@@ -696,45 +996,108 @@ class ArchiveComparerGUI:
     
     def find_in_console(self):
         """
-        Find text in the large console.
+        Rechercher dans les messages de la console (index en mémoire, texte ou regex, filtre par type).
         """
-        if not self.large_console_text:
+        if self.console_search_window and self.console_search_window.winfo_exists():
+            self.console_search_window.lift()
+            self.console_search_window.focus_force()
             return
         
-        search_term = tk.simpledialog.askstring("🔍 Find in Console", "Enter search term:")
-        if search_term:
-            # Clear previous search highlights
-            self.large_console_text.tag_remove('search_highlight', '1.0', tk.END)
-            
-            # Configure search highlight tag
-            self.large_console_text.tag_configure('search_highlight', 
-                                                 background='#FFFF00', 
-                                                 foreground='#000000')
-            
-            # Find and highlight all occurrences
-            start = '1.0'
-            count = 0
-            while True:
-                pos = self.large_console_text.search(search_term, start, tk.END, nocase=True)
-                if not pos:
-                    break
-                end = f"{pos}+{len(search_term)}c"
-                self.large_console_text.tag_add('search_highlight', pos, end)
-                start = end
-                count += 1
-            
-            if count > 0:
-                # Go to first occurrence
-                first_pos = self.large_console_text.search(search_term, '1.0', tk.END, nocase=True)
-                self.large_console_text.see(first_pos)
-                messagebox.showinfo("🔍 Search Results", f"Found {count} occurrences of '{search_term}'")
-            else:
-                messagebox.showinfo("🔍 Search Results", f"'{search_term}' not found")
+        self.console_search_window = tk.Toplevel(self.root)
+        self.console_search_window.title("🔍 Rechercher dans la Console")
+        self.console_search_window.geometry("900x500")
+        
+        main_frame = ttk.Frame(self.console_search_window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        query_frame = ttk.Frame(main_frame)
+        query_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        query_frame.columnconfigure(0, weight=1)
+        self.console_search_var = tk.StringVar(value="")
+        self.console_search_regex_var = tk.BooleanVar(value=False)
+        self.console_search_case_var = tk.BooleanVar(value=False)
+        self.console_search_tag_var = tk.StringVar(value="tous")
+        query_entry = ttk.Entry(query_frame, textvariable=self.console_search_var)
+        query_entry.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        query_entry.bind('<Return>', lambda event: self._run_console_search())
+        query_entry.focus_set()
+        ttk.Checkbutton(query_frame, text="Regex", variable=self.console_search_regex_var).grid(row=0, column=1, padx=(10, 0))
+        ttk.Checkbutton(query_frame, text="Respecter la casse",
+                        variable=self.console_search_case_var).grid(row=0, column=2, padx=(10, 0))
+        ttk.Combobox(query_frame, textvariable=self.console_search_tag_var, state="readonly", width=10,
+                     values=("tous", "success", "error", "warning", "info", "missing", "extra", "modified")).grid(
+            row=0, column=3, padx=(10, 0))
+        ttk.Button(query_frame, text="🔍 Rechercher", command=self._run_console_search,
+                   style='Modern.TButton').grid(row=0, column=4, padx=(10, 0))
+        
+        self.console_search_results = tk.Listbox(main_frame, font=('Consolas', 9), activestyle='none')
+        results_scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.console_search_results.yview)
+        self.console_search_results.configure(yscrollcommand=results_scrollbar.set)
+        self.console_search_results.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        results_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.console_search_results.bind('<<ListboxSelect>>', self._jump_to_search_result)
+        
+        self.console_search_label = ttk.Label(main_frame, text="Double-cliquez ou sélectionnez un résultat pour y aller")
+        self.console_search_label.grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        self.console_search_record_ids = []
+    
+    def _run_console_search(self):
+        """
+        Lancer la recherche et lister les enregistrements correspondants.
+        """
+        max_results = 5000
+        query = self.console_search_var.get()
+        tag = self.console_search_tag_var.get()
+        start = time.perf_counter()
+        try:
+            records = self.console_log.search(query, regex=self.console_search_regex_var.get(),
+                                              tags=None if tag == "tous" else [tag],
+                                              case_sensitive=self.console_search_case_var.get(),
+                                              limit=max_results + 1)
+        except re.error as e:
+            messagebox.showerror("❌ Regex Invalide", str(e))
+            return
+        elapsed = time.perf_counter() - start
+        
+        truncated = len(records) > max_results
+        records = records[:max_results]
+        self.console_search_results.delete(0, tk.END)
+        self.console_search_record_ids = [record.record_id for record in records]
+        self.console_search_results.insert(tk.END, *[
+            f"[{record.timestamp}] {record.message.strip()}" + (f"  ({record.path})" if record.path else "")
+            for record in records])
+        self.console_search_label.config(
+            text=f"{len(records):,}{'+' if truncated else ''} résultats en {elapsed * 1000:.0f} ms "
+                 f"sur {len(self.console_log):,} messages")
+    
+    def _jump_to_search_result(self, event=None):
+        """
+        Afficher dans la grande console le message sélectionné (accès direct par son numéro d'enregistrement).
+        """
+        selection = self.console_search_results.curselection()
+        if not selection:
+            return
+        record = self.console_log.get(self.console_search_record_ids[selection[0]])
+        if record is None:
+            return
+        if not (self.large_console_view and self.large_console_window and self.large_console_window.winfo_exists()):
+            self.open_large_console()
+        if not self.large_console_view.show_record(record.record_id):
+            self.console_search_label.config(text="Ce message a été effacé de la grande console")
     
     def compare_archives_gui(self):
         """
         Effectuer la comparaison d'archives depuis les entrées GUI avec de belles mises à jour de progression.
+        
+        La comparaison tourne en arrière-plan: les fichiers manquants et supplémentaires s'affichent dès
+        la comparaison des listes, puis chaque fichier modifié dès que sa paire est hachée.
         """
+        if self.comparison_running:
+            messagebox.showwarning("⚠️ Comparaison en Cours", "Une comparaison est déjà en cours.")
+            return
+        
         ref_path = self.ref_path_var.get().strip()
         extract_path = self.extract_path_var.get().strip()
         
@@ -754,40 +1117,472 @@ class ArchiveComparerGUI:
             return
         
         try:
-            # Afficher la barre de progression
-            self.show_progress_bar(100)
-            
-            self.update_status("Comparaison des archives...", "🔄")
-            self.log_message("🚀 Démarrage de la comparaison complète des archives...")
-            self.log_message(f"📚 Référence: {ref_path}")
-            self.log_message(f"📦 Extrait: {extract_path}")
-            
-            # Effectuer la comparaison avec progression
-            self.current_report = compare_archives_with_progress(extract_path, ref_path, self.update_progress_with_bar)
-            
-            # Afficher de beaux résultats
-            self.display_comparison_results(self.current_report)
-            
-            # Mettre à jour le statut basé sur les résultats
-            total_issues = (self.current_report.get('num_missing', 0) + 
-                          self.current_report.get('num_extra', 0) + 
-                          self.current_report.get('num_modified', 0))
-            
-            if total_issues == 0:
-                self.update_status("✨ Les archives correspondent parfaitement!", "✨")
+            options = self.get_comparison_options()
+        except ValueError as e:
+            messagebox.showerror("❌ Paramètres Invalides", str(e))
+            return
+        profile_path = self._get_profiling_output_path("comparaison") if self.profiling_var.get() else None
+        
+        # Afficher la barre de progression et les compteurs en direct
+        self.show_progress_bar(100)
+        self.live_counts = {'missing': 0, 'extra': 0, 'modified': 0, 'verified': 0, 'total': None}
+        self._update_live_counts()
+        self.live_counts_label.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        
+        self.update_status("Comparaison des archives...", "🔄")
+        self.log_message("🚀 Démarrage de la comparaison complète des archives...")
+        self.log_message(f"📚 Référence: {ref_path}")
+        self.log_message(f"📦 Extrait: {extract_path}")
+        if options['scope']:
+            self.log_message(f"🎯 Périmètre: {', '.join(options['scope'])}", 'info')
+        # Un rapport complet existant pourra recevoir les résultats du périmètre
+        self.scope_base_report = self.current_report if options['scope'] else None
+        self.comparison_running = True
+        
+        messages = self.comparison_messages
+        callbacks = {
+            'progress_callback': lambda message: messages.put(('progress', message)),
+            'stats_callback': lambda snapshot: messages.put(('stats', snapshot)),
+            'result_callback': lambda kind, payload: messages.put(('result', (kind, payload)))
+        }
+        
+        def run():
+            try:
+                # Effectuer la comparaison avec progression
+                if profile_path:
+                    report, artifacts = run_with_profiling(profile_path, compare_archives_with_progress,
+                                                           extract_path, ref_path, **callbacks, **options)
+                    report['profiling'] = artifacts
+                else:
+                    report = compare_archives_with_progress(extract_path, ref_path, **callbacks, **options)
+                messages.put(('done', (report, ref_path, extract_path)))
+            except Exception as e:
+                messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="comparison", daemon=True).start()
+        self.root.after(200, self._poll_comparison)
+    
+    def _poll_comparison(self):
+        """
+        Relayer la progression, les résultats au fil de l'eau et le rapport final de la comparaison.
+        """
+        deadline = time.perf_counter() + 0.1  # garder l'interface réactive sous un flot de résultats
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self.comparison_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.update_progress_with_bar(payload)
+            elif kind == 'stats':
+                self.update_live_stats(payload)
+                self.live_counts['verified'] = payload['done']
+                self.live_counts['total'] = payload['total']
+                self._update_live_counts()
+            elif kind == 'result':
+                self.display_streamed_result(*payload)
             else:
-                self.update_status(f"⚠️ Trouvé {total_issues} différences", "⚠️")
+                self.comparison_running = False
+                self.hide_progress_bar()
+                self.live_counts_label.grid_remove()
+                if kind == 'done':
+                    self._finish_comparison(*payload)
+                else:
+                    error_msg = f"❌ Erreur pendant la comparaison: {payload}"
+                    self.log_message(error_msg)
+                    messagebox.showerror("❌ Erreur de Comparaison", payload)
+                    self.update_status("Échec de la comparaison", "❌")
+                return
+        self.root.after(200, self._poll_comparison)
+    
+    def _finish_comparison(self, report, ref_path, extract_path, streamed=True):
+        """
+        Afficher le rapport final d'une comparaison dont les résultats ont été diffusés en direct.
+        """
+        self.current_report = report
+        if report.get('profiling'):
+            self._log_profiling_artifacts(report['profiling'])
+        
+        # Afficher de beaux résultats
+        self.display_comparison_results(report, streamed=streamed)
+        if report.get('scope') and self.scope_base_report is not None:
+            self.merge_scoped_report(report, ref_path, extract_path)
+        if self.report_store_var.get():
+            self.store_report(report, ref_path, extract_path)
+        
+        # Mettre à jour le statut basé sur les résultats
+        total_issues = (report.get('num_missing', 0) + 
+                      report.get('num_extra', 0) + 
+                      report.get('num_modified', 0))
+        
+        if total_issues == 0:
+            self.update_status("✨ Les archives correspondent parfaitement!", "✨")
+        else:
+            self.update_status(f"⚠️ Trouvé {total_issues} différences", "⚠️")
+    
+    def display_streamed_result(self, kind, payload):
+        """
+        Afficher une découverte de la comparaison en cours (différences de listes ou fichier modifié).
+        """
+        if kind == 'differences':
+            sections = [
+                ('missing', "📋 MANQUANTS (EN DIRECT)", payload['missing_directories'], payload['missing_files']),
+                ('extra', "📋 SUPPLÉMENTAIRES (EN DIRECT)", payload['extra_directories'], payload['extra_files'])
+            ]
+            for status, title, dir_paths, file_paths in sections:
+                if not (dir_paths or file_paths):
+                    continue
+                tree = {}
+                for dir_path in dir_paths:
+                    self._add_item_to_tree(tree, dir_path, status, is_directory=True)
+                for file_path in file_paths:
+                    self._add_item_to_tree(tree, file_path, status, is_directory=False)
+                self.log_message(f"\n{title}", status)
+                self.log_message("─" * 50)
+                self._display_tree(tree, "", "")
+                self.live_counts[status] += len(file_paths)
+        elif kind == 'modified':
+            if not self.live_counts['modified']:
+                self.log_message("\n📋 FICHIERS MODIFIÉS (EN DIRECT)", 'modified')
+                self.log_message("─" * 50)
+            self.log_message(f"  🔄 {payload['file']}" + (f" ({payload['error']})" if payload.get('error') else ""),
+                             'modified', path=payload['file'])
+            if payload.get('delta'):
+                self.log_message(f"      🧬 {self._describe_chunk_delta(payload['delta'])}")
+            self.live_counts['modified'] += 1
+        self._update_live_counts()
+    
+    def _describe_chunk_delta(self, delta, max_ranges=5):
+        """
+        Résumer l'analyse par blocs d'un fichier modifié (part inchangée, delta, zones modifiées).
+        """
+        if delta.get('error'):
+            return f"Analyse par blocs impossible: {delta['error']}"
+        ranges = delta['changed_ranges_ext'] or delta['changed_ranges_ref']
+        side = "Ext" if delta['changed_ranges_ext'] else "Ref"
+        shown = ", ".join(f"{start:,}-{end:,}" for start, end in ranges[:max_ranges])
+        hidden = delta.get('ranges_truncated', len(ranges)) - min(len(ranges), max_ranges)
+        if hidden > 0:
+            shown += f" (+{hidden})"
+        return (f"≈{delta['shared_percent']}% identique, delta ≈{format_size(delta['delta_bytes'])}, "
+                f"zones modifiées ({side}): {shown or 'aucune'}")
+    
+    def merge_scoped_report(self, report, ref_path, extract_path):
+        """
+        Proposer d'intégrer les résultats d'une comparaison limitée à un périmètre dans le rapport complet précédent.
+        """
+        base = self.scope_base_report
+        self.scope_base_report = None
+        if not messagebox.askyesno("🎯 Fusionner le Périmètre",
+                                   f"Intégrer les résultats de {', '.join(report['scope'])} dans le rapport "
+                                   f"précédent ({base.get('timestamp') or 'date inconnue'}) ?"):
+            return
+        merged = merge_reports(base, report, ref_path, extract_path)
+        self.current_report = merged
+        self.log_message(f"🎯 Rapport fusionné - manquants: {merged['num_missing']}, supplémentaires: "
+                         f"{merged['num_extra']}, modifiés: {merged['num_modified']}, identiques: "
+                         f"{merged['num_common']} (utiliser 📤 Exporter pour l'enregistrer)", 'info')
+        total_issues = merged['num_missing'] + merged['num_extra'] + merged['num_modified']
+        self.update_status(f"🎯 Rapport fusionné - {total_issues} différences", "🎯")
+    
+    def _update_live_counts(self):
+        counts = self.live_counts
+        verified = f"{counts['verified']:,}/{counts['total']:,}" if counts['total'] is not None else "…"
+        self.live_counts_var.set(f"📄 Manquants: {counts['missing']:,} · 📄 Supplémentaires: {counts['extra']:,} · "
+                                 f"🔄 Modifiés: {counts['modified']:,} · 🔐 Vérifiés: {verified}")
+    
+    def _get_profiling_output_path(self, prefix):
+        """
+        Déterminer le chemin de base des fichiers de profilage (à côté du JSON exporté).
+        """
+        output_path = self.output_file_var.get().strip()
+        if output_path:
+            base_path = os.path.splitext(output_path)[0]
+            return f"{base_path}_{prefix}.json"
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(os.getcwd(), f"profil_{prefix}_{timestamp}.json")
+    
+    def _log_profiling_artifacts(self, artifacts):
+        """
+        Afficher l'emplacement des fichiers produits par le mode profilage.
+        """
+        self.log_message(f"🧪 Profil cProfile: {artifacts['profile']}", 'info')
+        self.log_message(f"🧪 Rapport mémoire: {artifacts['memory_report']} "
+                         f"(pic {format_size(artifacts['peak_memory'])})", 'info')
+    
+    def toggle_watch_mode(self):
+        """
+        Démarrer ou arrêter la surveillance continue des répertoires comparés.
+        """
+        if self.archive_watcher and self.archive_watcher.is_running():
+            self.archive_watcher.stop()
+            self.archive_watcher = None
+            self.log_message("👁️ Surveillance continue arrêtée", 'info')
+            self.update_status("Surveillance arrêtée", "✅")
+            return
+        
+        if self.current_report is None:
+            messagebox.showwarning("⚠️ Aucun Résultat",
+                                   "La surveillance part d'une comparaison initiale.\nVeuillez d'abord effectuer une comparaison.")
+            return
+        if 'sampling' in self.current_report or 'checksum_list' in self.current_report:
+            messagebox.showwarning("⚠️ Rapport Non Surveillable",
+                                   "La surveillance part d'une comparaison complète: les fichiers non échantillonnés "
+                                   "(ou non listés) n'ont pas été vérifiés.\nVeuillez effectuer une comparaison complète.")
+            return
+        
+        ref_path = self.ref_path_var.get().strip()
+        extract_path = self.extract_path_var.get().strip()
+        if not (os.path.isdir(ref_path) and os.path.isdir(extract_path)):
+            messagebox.showerror("❌ Chemin Non Trouvé",
+                                 "Les répertoires de référence et d'extraction doivent exister pour la surveillance.")
+            return
+        
+        try:
+            scan_filter = ScanFilter.from_dict(self.current_report.get('filters'))
+            self.archive_watcher = ArchiveWatcher(extract_path, ref_path, self.current_report,
+                                                  on_update=lambda report, changes: self.watch_queue.put((report, changes)),
+                                                  throttle=self.get_io_throttle(), scan_filter=scan_filter,
+                                                  scope=ScanScope.from_list(self.current_report.get('scope'),
+                                                                            scan_filter.ignore_case if scan_filter else False))
+            self.archive_watcher.start()
+        except Exception as e:
+            self.archive_watcher = None
+            self.log_message(f"❌ Erreur au démarrage de la surveillance: {str(e)}")
+            messagebox.showerror("❌ Erreur de Surveillance", str(e))
+            return
+        
+        self.log_message("👁️ Surveillance continue démarrée: seuls les chemins modifiés seront revérifiés", 'info')
+        self.update_status("Surveillance continue active", "👁️")
+        self.root.after(500, self._poll_watch_updates)
+    
+    def _poll_watch_updates(self):
+        """
+        Appliquer dans le thread de l'interface les mises à jour produites par la surveillance.
+        """
+        status_labels = {
+            'missing': ("❌ manquant", 'missing'),
+            'extra': ("➕ supplémentaire", 'extra'),
+            'modified': ("🔄 modifié", 'modified'),
+            'identical': ("✅ identique", 'success'),
+            'missing_dir': ("❌ dossier manquant", 'missing'),
+            'extra_dir': ("➕ dossier supplémentaire", 'extra'),
+            'resync': ("🔄 resynchronisation complète", 'warning')
+        }
+        while True:
+            try:
+                report, changes = self.watch_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.current_report = report
+            self.log_message(f"👁️ {len(changes)} chemin(s) revérifié(s) - manquants: {report['num_missing']}, "
+                             f"supplémentaires: {report['num_extra']}, modifiés: {report['num_modified']}", 'info')
+            for relative_path, status in changes[:50]:
+                if status in status_labels:
+                    label, tag = status_labels[status]
+                    self.log_message(f"  {label}: {relative_path}", tag)
+            if len(changes) > 50:
+                self.log_message(f"  ... et {len(changes) - 50} autres chemins")
             
+            total_issues = report['num_missing'] + report['num_extra'] + report['num_modified']
+            mode = report.get('watch', {}).get('mode')
+            self.update_status(f"👁️ Surveillance ({mode}) - {total_issues} différences", "👁️")
+        
+        if self.archive_watcher and self.archive_watcher.is_running():
+            self.root.after(500, self._poll_watch_updates)
+    
+    def open_batch_dialog(self):
+        """
+        Ouvrir la fenêtre de la file de vérifications (plusieurs paires référence/extrait).
+        """
+        if self.batch_window and self.batch_window.winfo_exists():
+            self.batch_window.lift()
+            self.batch_window.focus_force()
+            return
+        
+        self.batch_window = tk.Toplevel(self.root)
+        self.batch_window.title("📋 File de Vérifications")
+        self.batch_window.geometry("900x500")
+        
+        main_frame = ttk.Frame(self.batch_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        ttk.Label(main_frame, text="Une vérification par ligne: référence ; extrait [; rapport.json]",
+                  style='Subtitle.TLabel').grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        
+        self.batch_jobs_text = scrolledtext.ScrolledText(main_frame, height=12, font=('Consolas', 9), wrap=tk.NONE)
+        self.batch_jobs_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Paramètres de la file
+        settings_frame = ttk.Frame(main_frame)
+        settings_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        settings_frame.columnconfigure(5, weight=1)
+        
+        self.batch_workers_var = tk.StringVar(value="4")
+        self.batch_device_limit_var = tk.StringVar(value="1")
+        self.batch_output_dir_var = tk.StringVar(value="")
+        
+        ttk.Label(settings_frame, text="Vérifications simultanées:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Spinbox(settings_frame, from_=1, to=32, width=5,
+                    textvariable=self.batch_workers_var).grid(row=0, column=1, padx=(5, 15))
+        ttk.Label(settings_frame, text="Par disque:").grid(row=0, column=2, sticky=tk.W)
+        ttk.Spinbox(settings_frame, from_=1, to=8, width=5,
+                    textvariable=self.batch_device_limit_var).grid(row=0, column=3, padx=(5, 15))
+        ttk.Label(settings_frame, text="Dossier des rapports:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(settings_frame, textvariable=self.batch_output_dir_var).grid(row=1, column=1, columnspan=5,
+                                                                              sticky=(tk.W, tk.E), pady=(5, 0))
+        ttk.Button(settings_frame, text="📂", width=3,
+                   command=lambda: self.batch_output_dir_var.set(filedialog.askdirectory(
+                       title="Dossier des rapports") or self.batch_output_dir_var.get())).grid(row=1, column=6, padx=(5, 0),
+                                                                                             pady=(5, 0))
+        
+        # Boutons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        buttons = [
+            ("➕ Ajouter la Paire Actuelle", self._batch_add_current_pair),
+            ("📂 Charger une Liste", self._batch_load_list),
+            ("▶️ Lancer", self.run_batch_queue),
+            ("⏹️ Arrêter", self._batch_cancel)
+        ]
+        for text, command in buttons:
+            ttk.Button(button_frame, text=text, command=command,
+                       style='Modern.TButton').pack(side=tk.LEFT, padx=(0, 10))
+    
+    def _batch_add_current_pair(self):
+        """
+        Ajouter à la file la paire de répertoires saisie dans la fenêtre principale.
+        """
+        ref_path = self.ref_path_var.get().strip()
+        extract_path = self.extract_path_var.get().strip()
+        if not ref_path or not extract_path:
+            messagebox.showerror("❌ Chemins Manquants",
+                                 "Veuillez spécifier les chemins de référence et d'extraction.")
+            return
+        self.batch_jobs_text.insert(tk.END, f"{ref_path} ; {extract_path}\n")
+    
+    def _batch_load_list(self):
+        """
+        Charger un fichier liste de vérifications dans la file.
+        """
+        list_path = filedialog.askopenfilename(
+            title="📂 Charger une Liste de Vérifications",
+            filetypes=[("Fichiers texte", "*.txt *.lst *.csv"), ("Tous les fichiers", "*.*")]
+        )
+        if list_path:
+            try:
+                with open(list_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                parse_job_lines(content.splitlines())  # Valider avant d'ajouter
+                self.batch_jobs_text.insert(tk.END, content if content.endswith('\n') else content + '\n')
+            except Exception as e:
+                messagebox.showerror("❌ Liste Invalide", str(e))
+    
+    def _batch_cancel(self):
+        """
+        Ne plus démarrer de nouvelle vérification (celles en cours se terminent).
+        """
+        if self.batch_job_queue:
+            self.batch_job_queue.cancel()
+            self.log_message("⏹️ Arrêt de la file demandé: les vérifications en cours vont se terminer", 'warning')
+    
+    def run_batch_queue(self):
+        """
+        Lancer la file de vérifications en arrière-plan.
+        """
+        if self.batch_job_queue:
+            messagebox.showwarning("⚠️ File en Cours", "Une file de vérifications est déjà en cours.")
+            return
+        
+        try:
+            jobs = parse_job_lines(self.batch_jobs_text.get("1.0", tk.END).splitlines())
+            if not jobs:
+                raise ValueError("La file est vide.")
+            output_dir = self.batch_output_dir_var.get().strip() or None
+            if output_dir and not os.path.isdir(output_dir):
+                raise ValueError(f"Le dossier des rapports n'existe pas: {output_dir}")
+            self.batch_job_queue = BatchJobQueue(max_workers=int(self.batch_workers_var.get()),
+                                                 per_device_limit=int(self.batch_device_limit_var.get()),
+                                                 output_dir=output_dir,
+                                                 comparison_options=self.get_comparison_options())
         except Exception as e:
-            error_msg = f"❌ Erreur pendant la comparaison: {str(e)}"
-            self.log_message(error_msg)
-            messagebox.showerror("❌ Erreur de Comparaison", str(e))
-            self.update_status("Échec de la comparaison", "❌")
-        finally:
-            # Cacher la barre de progression
-            self.hide_progress_bar()
-            messagebox.showerror("❌ Comparison Error", str(e))
-            self.update_status("Comparison failed", "❌")
+            messagebox.showerror("❌ Erreur de File", str(e))
+            return
+        
+        for reference_path, extracted_path, output_path in jobs:
+            self.batch_job_queue.add_job(reference_path, extracted_path, output_path)
+        
+        self.log_message(f"📋 Démarrage de la file: {len(jobs)} vérifications, "
+                         f"{self.batch_job_queue.max_workers} simultanées, "
+                         f"{self.batch_job_queue.per_device_limit} par disque", 'info')
+        self.update_status(f"File de vérifications: 0/{len(jobs)}", "📋")
+        
+        job_queue = self.batch_job_queue
+        
+        def run():
+            try:
+                summary = job_queue.run(job_callback=lambda job: self.batch_messages.put(('job', job)))
+                self.batch_messages.put(('summary', summary))
+            except Exception as e:
+                self.batch_messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="batch-queue", daemon=True).start()
+        self.root.after(300, self._poll_batch_messages)
+    
+    def _poll_batch_messages(self):
+        """
+        Afficher dans l'interface l'avancement de la file de vérifications.
+        """
+        finished = False
+        while True:
+            try:
+                kind, payload = self.batch_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'job':
+                job = payload
+                done = sum(1 for j in self.batch_job_queue.jobs if j.status in ('done', 'failed'))
+                if job.status == 'done':
+                    report = job.report
+                    issues = report['num_missing'] + report['num_extra'] + report['num_modified']
+                    tag = 'success' if issues == 0 else 'warning'
+                    self.log_message(f"📋 [{job.job_id}] {job.extracted_path}: {issues} différences "
+                                     f"({format_duration(job.duration)})", tag)
+                    if self.report_store_var.get():
+                        self.store_report(report, job.reference_path, job.extracted_path, source=job.output_path)
+                else:
+                    self.log_message(f"❌ [{job.job_id}] {job.extracted_path}: échec - {job.error}")
+                self.update_status(f"File de vérifications: {done}/{len(self.batch_job_queue.jobs)}", "📋")
+            elif kind == 'summary':
+                finished = True
+                summary = payload
+                self.log_message("═══════════════════════════════════════════════════════")
+                self.log_message("📋 RÉSUMÉ DE LA FILE DE VÉRIFICATIONS", 'info')
+                self.log_message(f"✅ Réussies: {summary['succeeded']}/{summary['total_jobs']}", 'success')
+                if summary['failed']:
+                    self.log_message(f"❌ Échecs: {summary['failed']}")
+                if summary['not_run']:
+                    self.log_message(f"⏹️ Non lancées: {summary['not_run']}", 'warning')
+                self.log_message(f"⚠️ Vérifications avec différences: {summary['jobs_with_differences']}", 'warning')
+                self.log_message(f"📄 Manquants: {summary['total_missing']}, supplémentaires: {summary['total_extra']}, "
+                                 f"modifiés: {summary['total_modified']}")
+                self.log_message(f"⏱️ Durée: {format_duration(summary['wall_time'])} "
+                                 f"(cumul des vérifications: {format_duration(summary['cumulated_job_time'])})")
+                if summary.get('summary_path'):
+                    self.log_message(f"💾 Résumé: {summary['summary_path']}")
+                self.log_message("═══════════════════════════════════════════════════════\n")
+                self.update_status("File de vérifications terminée", "✅")
+            elif kind == 'error':
+                finished = True
+                self.log_message(f"❌ Erreur de la file de vérifications: {payload}")
+                self.update_status("Échec de la file de vérifications", "❌")
+        
+        if finished:
+            self.batch_job_queue = None
+        else:
+            self.root.after(300, self._poll_batch_messages)
     
     def update_progress(self, message):
         """
@@ -840,9 +1635,82 @@ class ArchiveComparerGUI:
             self.update_progress_bar(progress_percent)
         self.update_status(message, "🔄")
     
-    def display_comparison_results(self, report):
+    def update_live_stats(self, snapshot):
+        """
+        Afficher le débit et l'estimation du temps restant pendant la vérification d'intégrité.
+        """
+        if snapshot['total']:
+            # La phase de hachage occupe la plage 80-95% de la barre
+            self.update_progress_bar(80 + 15 * snapshot['done'] / snapshot['total'])
+        self.update_status(f"🔐 {snapshot['done']:,}/{snapshot['total']:,} fichiers - "
+                           f"{format_size(snapshot['bytes_per_second'])}/s - "
+                           f"ETA {format_duration(snapshot['eta_seconds'])}", "🔄")
+    
+    def display_content_matches(self, matches):
+        """
+        Afficher où se trouve le contenu des fichiers manquants et supplémentaires dans l'autre arborescence.
+        """
+        self.log_message("\n🧭 CONTENU RETROUVÉ DANS L'AUTRE ARBORESCENCE", 'info')
+        self.log_message("─" * 50)
+        missing_found = matches['missing_found_in_extracted']
+        extra_found = matches['extra_found_in_reference']
+        lost_tag = 'missing' if matches['num_missing_lost'] else 'success'
+        self.log_message(f"  Fichiers manquants réellement perdus: {matches['num_missing_lost']:,}", lost_tag)
+        self.log_message(f"  Fichiers manquants déplacés ou renommés: {len(missing_found):,}", 'success')
+        self.log_message(f"  Fichiers supplémentaires déjà présents dans la référence: {len(extra_found):,}", 'info')
+        self.log_message(f"  Fichiers supplémentaires au contenu nouveau: {matches['num_extra_new']:,}", 'extra')
+        for file_path, locations in missing_found.items():
+            self.log_message(f"  📄 {file_path} → {', '.join(locations)}", 'success', path=file_path)
+        for file_path, locations in extra_found.items():
+            self.log_message(f"  📄 {file_path} ≡ {', '.join(locations)}", 'info', path=file_path)
+    
+    def display_sampling_estimate(self, sampling):
+        """
+        Afficher l'estimation du taux de modification obtenue par échantillonnage.
+        """
+        self.log_message("\n🎲 ESTIMATION PAR ÉCHANTILLONNAGE", 'info')
+        self.log_message("─" * 50)
+        self.log_message(f"  Fichiers communs vérifiés: {sampling['sample_size']:,}/{sampling['population']:,} "
+                         f"({sampling['num_strata']} strates)")
+        self.log_message(f"  Taux de modification estimé: {sampling['estimated_modification_rate'] * 100:.2f}% "
+                         f"[{sampling['rate_lower_bound'] * 100:.2f}% - {sampling['rate_upper_bound'] * 100:.2f}%] "
+                         f"à {sampling['confidence'] * 100:.0f}% de confiance")
+        lower, upper = sampling['estimated_modified_files_bounds']
+        tag = 'success' if sampling['modified_in_sample'] == 0 else 'warning'
+        self.log_message(f"  Fichiers modifiés estimés: ~{sampling['estimated_modified_files']:,} "
+                         f"(entre {lower:,} et {upper:,})", tag)
+        self.log_message("  ⚠️ Pré-vérification: lancer une vérification complète pour un résultat exhaustif", 'warning')
+    
+    def display_run_stats(self, stats):
+        """
+        Afficher les statistiques d'exécution par phase (temps, débit, erreurs).
+        """
+        phase_labels = {
+            'scan': "🔍 Analyse",
+            'diff': "📝 Comparaison",
+            'hash': "🔐 Hachage",
+            'match': "🧭 Recherche de contenu",
+            'report': "📊 Rapport"
+        }
+        self.log_message("\n⏱️ STATISTIQUES D'EXÉCUTION", 'info')
+        self.log_message("─" * 50)
+        for name, phase in stats.get('phases', {}).items():
+            line = (f"  {phase_labels.get(name, name)}: {format_duration(phase['wall_time'])} "
+                    f"(CPU {phase['cpu_time']:.1f}s), {phase['files_processed']:,} fichiers")
+            if phase.get('bytes_read'):
+                line += f", {format_size(phase['bytes_read'])} lus à {format_size(phase['bytes_per_second'])}/s"
+            if phase.get('cache_hits'):
+                line += f", {phase['cache_hits']:,} hits cache"
+            if phase.get('errors'):
+                line += f", {phase['errors']:,} erreurs"
+            self.log_message(line)
+        self.log_message(f"  ⏱️ Durée totale: {format_duration(stats.get('total_time', 0))}")
+    
+    def display_comparison_results(self, report, streamed=False):
         """
         Afficher les résultats de comparaison dans un arbre explorateur de fichiers magnifiquement formaté.
+        
+        Avec streamed=True, les arbres des différences déjà affichés en direct ne sont pas répétés.
         """
         self.log_message("═══════════════════════════════════════════════════════")
         self.log_message("📊 RÉSUMÉ DES RÉSULTATS DE COMPARAISON", 'info')
@@ -861,6 +1729,36 @@ class ArchiveComparerGUI:
         for label, count, tag in stats:
             self.log_message(f"{label}: {count}", tag)
         
+        if report.get('filters'):
+            filters = report['filters']
+            rules = filters.get('exclude', []) + [f"+{rule}" for rule in filters.get('include', [])]
+            self.log_message(f"🧹 Filtres appliqués: {', '.join(rules) if rules else 'bornes de taille/âge uniquement'}", 'info')
+        if report.get('checksum_list'):
+            checksum_list = report['checksum_list']
+            self.log_message(f"🧾 Liste de sommes: {checksum_list['path']} ({checksum_list['entries']:,} entrées, "
+                             f"{', '.join(checksum_list['algorithms'])}, format {checksum_list['format']})", 'info')
+            if checksum_list['malformed_lines']:
+                self.log_message(f"⚠️ {checksum_list['malformed_lines']} lignes illisibles dans la liste", 'warning')
+            if checksum_list.get('name_conflicts'):
+                self.log_message(f"⚠️ {checksum_list['name_conflicts']} empreintes dont la longueur contredit l'algorithme "
+                                 f"suggéré par le nom de la liste (algorithme déduit de la longueur)", 'warning')
+        if report.get('scope'):
+            self.log_message(f"🎯 Périmètre: {', '.join(report['scope'])}", 'info')
+        if report.get('recheck'):
+            recheck = report['recheck']
+            self.log_message(f"🔁 Revérification: {recheck['rechecked_paths']:,} chemins revérifiés "
+                             f"({recheck['swept_files']:,} fichiers communs contrôlés par stat) en "
+                             f"{format_duration(recheck['duration'])}, {recheck['resolved']:,} différences corrigées, "
+                             f"{recheck['new_differences']:,} nouvelles", 'info')
+        if report.get('inode_dedup', {}).get('shared_inode_pairs'):
+            self.log_message(f"🔗 Fichiers partageant le même inode (non relus): "
+                             f"{report['inode_dedup']['shared_inode_pairs']}", 'info')
+        if report.get('chunk_analysis', {}).get('analyzed_files'):
+            chunk_analysis = report['chunk_analysis']
+            self.log_message(f"🧬 Analyse par blocs: {chunk_analysis['analyzed_files']} fichiers modifiés, "
+                             f"{format_size(chunk_analysis['shared_bytes'])} inchangés, "
+                             f"delta estimé {format_size(chunk_analysis['delta_bytes'])}", 'info')
+        
         # For backward compatibility with old reports
         if 'missing_directories' not in report:
             enhanced_report = self._enhance_report_with_directories(report)
@@ -868,7 +1766,7 @@ class ArchiveComparerGUI:
             enhanced_report = report
         
         # Display missing files and directories
-        if enhanced_report['missing_files'] or enhanced_report.get('missing_directories', []):
+        if not streamed and (enhanced_report['missing_files'] or enhanced_report.get('missing_directories', [])):
             missing_tree = {}
             
             # Add missing directories
@@ -887,7 +1785,7 @@ class ArchiveComparerGUI:
                 self.log_message("  (Aucun fichier ou dossier manquant)", 'success')
         
         # Display extra files and directories
-        if enhanced_report['extra_files'] or enhanced_report.get('extra_directories', []):
+        if not streamed and (enhanced_report['extra_files'] or enhanced_report.get('extra_directories', [])):
             extra_tree = {}
             
             # Add extra directories
@@ -906,7 +1804,7 @@ class ArchiveComparerGUI:
                 self.log_message("  (Aucun fichier ou dossier supplémentaire)", 'success')
         
         # Display modified files
-        if enhanced_report.get('modified_files', []):
+        if not streamed and enhanced_report.get('modified_files', []):
             modified_tree = {}
             
             for file_info in enhanced_report['modified_files']:
@@ -932,6 +1830,15 @@ class ArchiveComparerGUI:
                           len(enhanced_report.get('modified_files', [])))
             self.log_message(f"\n⚠️ Trouvé {total_issues} différences qui nécessitent une attention", 'warning')
         
+        if report.get('content_matches'):
+            self.display_content_matches(report['content_matches'])
+        
+        if report.get('sampling'):
+            self.display_sampling_estimate(report['sampling'])
+        
+        if report.get('stats'):
+            self.display_run_stats(report['stats'])
+        
         self.log_message("═══════════════════════════════════════════════════════")
         self.log_message("📊 FIN DES RÉSULTATS DE COMPARAISON", 'info')
         self.log_message("═══════════════════════════════════════════════════════\n")
@@ -1023,7 +1930,7 @@ class ArchiveComparerGUI:
                     current_level[part]['_is_file'] = False
                 current_level = current_level[part]
     
-    def _display_tree(self, tree, prefix, current_prefix):
+    def _display_tree(self, tree, prefix, current_prefix, parent_path=""):
         """
         Display the tree structure in file explorer format.
         """
@@ -1055,8 +1962,12 @@ class ArchiveComparerGUI:
                         display_name = f"➕ {name} (EXTRA FILE)"
                     elif status == 'modified':
                         size_ref = extra_info.get('size_ref', 0)
+                        if size_ref is None:
+                            size_ref = '?'  # checksum lists carry no size
                         size_ext = extra_info.get('size_ext', 0)
                         display_name = f"🔄 {name} (MODIFIED - Ref:{size_ref}B, Ext:{size_ext}B)"
+                        if extra_info.get('hash_type'):
+                            display_name += f" [{extra_info['hash_type']}]"
                     else:
                         display_name = f"📄 {name}"
                 else:
@@ -1076,7 +1987,8 @@ class ArchiveComparerGUI:
                 else:
                     display_name = f"📁 {name}/"
             
-            self.log_message(f"{current_prefix}{current_connector}{display_name}")
+            item_path = f"{parent_path}/{name}" if parent_path else name
+            self.log_message(f"{current_prefix}{current_connector}{display_name}", path=item_path)
             
             # Show additional details for modified files
             if data.get('_status') == 'modified' and data.get('_extra_info'):
@@ -1084,10 +1996,13 @@ class ArchiveComparerGUI:
                 if 'hash_ref' in info and 'hash_ext' in info:
                     self.log_message(f"{current_prefix}{'    ' if is_last else '│   '}    Ref hash: {info['hash_ref'][:16]}...")
                     self.log_message(f"{current_prefix}{'    ' if is_last else '│   '}    Ext hash: {info['hash_ext'][:16]}...")
+                if info.get('delta'):
+                    self.log_message(f"{current_prefix}{'    ' if is_last else '│   '}    🧬 "
+                                     f"{self._describe_chunk_delta(info['delta'])}")
             
             # Recursively display subdirectories/files
             if not data.get('_is_file', False):
-                self._display_tree(data, next_prefix, next_prefix)
+                self._display_tree(data, next_prefix, next_prefix, item_path)
     
     def export_result(self):
         """
@@ -1111,21 +2026,8 @@ class ArchiveComparerGUI:
                 self.update_status("Export des résultats...", "📤")
                 
                 # Ajouter de belles métadonnées à l'export
-                export_data = {
-                    "metadata": {
-                        "timestamp": str(datetime.datetime.now()),
-                        "reference_path": self.ref_path_var.get(),
-                        "extracted_path": self.extract_path_var.get(),
-                        "application": "Comparateur d'Archives v2.0 - APST2607",
-                        "total_differences": (self.current_report.get('num_missing', 0) + 
-                                            self.current_report.get('num_extra', 0) + 
-                                            self.current_report.get('num_modified', 0))
-                    },
-                    "results": self.current_report
-                }
-                
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, indent=2, ensure_ascii=False)
+                write_report_file(self.current_report, output_path,
+                                  self.ref_path_var.get(), self.extract_path_var.get())
                 
                 self.log_message(f"📤 Résultats exportés avec succès vers: {output_path}")
                 self.update_status("Export terminé avec succès", "✅")
@@ -1141,6 +2043,7 @@ class ArchiveComparerGUI:
     def import_result(self):
         """
         Importer et afficher des résultats de comparaison précédemment sauvegardés avec de beaux commentaires.
+        Le fichier est lu en flux; il n'est ajouté à la base de rapports que si celle-ci est activée.
         """
         file_path = filedialog.askopenfilename(
             title="📥 Importer les Résultats",
@@ -1151,17 +2054,17 @@ class ArchiveComparerGUI:
             try:
                 self.update_status("Importing results...", "📥")
                 
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                # Lecture en flux: le document n'est jamais analysé d'un bloc
+                report = read_report_file(file_path)
+                metadata = _read_export_metadata(file_path)
                 
                 # Gérer l'ancien format (résultats directs) et le nouveau format (avec métadonnées)
-                if 'results' in data:
-                    report = data['results']
-                    metadata = data.get('metadata', {})
-                    
+                if metadata:
                     self.log_message(f"📥 Résultats importés avec succès depuis: {file_path}")
                     if 'timestamp' in metadata:
                         self.log_message(f"🕒 Horodatage de comparaison original: {metadata['timestamp']}")
+                        # Point de départ d'une revérification des différences
+                        report.setdefault('timestamp', metadata['timestamp'])
                     if 'reference_path' in metadata:
                         self.log_message(f"📚 Chemin de référence original: {metadata['reference_path']}")
                     if 'extracted_path' in metadata:
@@ -1170,17 +2073,23 @@ class ArchiveComparerGUI:
                         self.log_message(f"📊 Total des différences trouvées: {metadata['total_differences']}")
                 else:
                     # Ancien format - résultats directs
-                    report = data
                     self.log_message(f"📥 Résultats legacy importés depuis: {file_path}")
                 
-                # Valider les données importées
-                required_keys = ['missing_files', 'extra_files', 'num_missing', 'num_extra']
-                if all(key in report for key in required_keys):
-                    self.current_report = report
-                    self.display_comparison_results(report)
-                    self.update_status("Import terminé avec succès", "✅")
-                else:
-                    raise ValueError("Format de fichier invalide - champs requis manquants")
+                # Base de rapports (option): un fichier déjà importé n'est pas ajouté une seconde fois
+                if self.report_store_var.get():
+                    timestamp = metadata.get('timestamp') or report.get('timestamp')
+                    run_id = self.get_report_store().find_run(file_path, timestamp)
+                    if run_id is None:
+                        run_id = self.get_report_store().add_report(report, metadata.get('reference_path'),
+                                                                    metadata.get('extracted_path'),
+                                                                    timestamp=timestamp, source=file_path)
+                        self.log_message(f"🗄️ Rapport enregistré dans la base (run #{run_id})", 'info')
+                    else:
+                        self.log_message(f"🗄️ Rapport déjà présent dans la base (run #{run_id})", 'info')
+                
+                self.current_report = report
+                self.display_comparison_results(report)
+                self.update_status("Import terminé avec succès", "✅")
                     
             except Exception as e:
                 error_msg = f"❌ Erreur lors de l'import: {str(e)}"
@@ -1188,93 +2097,897 @@ class ArchiveComparerGUI:
                 messagebox.showerror("❌ Erreur d'Import", str(e))
                 self.update_status("Échec de l'import", "❌")
 
-    def detect_duplicates(self):
+    def get_report_store(self):
         """
-        Détecter les fichiers en double dans un répertoire en utilisant des hachages SHA-256.
+        Ouvrir (une seule fois) la base de rapports configurée dans les options.
+        """
+        db_path = self.report_store_path_var.get().strip() or DEFAULT_REPORT_STORE_PATH
+        if self.report_store is None or self.report_store.db_path != db_path:
+            if self.report_store is not None:
+                self.report_store.close()
+            self.report_store = ReportStore(db_path)
+        return self.report_store
+    
+    def store_report(self, report, reference_path, extracted_path, source=None):
+        """
+        Enregistrer un rapport dans la base de rapports (une erreur n'interrompt pas la comparaison).
         """
-        # Demander à l'utilisateur de sélectionner un répertoire
-        directory = filedialog.askdirectory(
-            title="🔍 Sélectionner le Répertoire pour Détecter les Doublons",
-        )
-        
-        if not directory:
-            return
-        
-        if not os.path.exists(directory):
-            messagebox.showerror("❌ Erreur", f"Le répertoire n'existe pas: {directory}")
-            return
-        
         try:
-            # Afficher la barre de progression
-            self.show_progress_bar(100)
-            
-            self.update_status("Détection des doublons en cours...", "🔍")
-            self.log_message("🚀 Démarrage de la détection des fichiers en double...")
-            self.log_message(f"📁 Répertoire analysé: {directory}")
-            self.log_message("🔧 Filtres appliqués: fichiers entre 1KB et 2GB, exclusion des fichiers système", 'info')
-            
-            # Effectuer la détection des doublons
-            duplicates_report = self._scan_for_duplicates(directory)
-            
-            # Afficher les résultats
-            self.display_duplicates_results(duplicates_report)
-            
-            # Mettre à jour le statut
-            total_duplicates = sum(len(group) for group in duplicates_report['duplicate_groups'].values())
-            if total_duplicates == 0:
-                self.update_status("✨ Aucun doublon trouvé!", "✨")
+            run_id = self.get_report_store().add_report(report, reference_path, extracted_path, source=source)
+            self.log_message(f"🗄️ Rapport enregistré dans la base (run #{run_id})", 'info')
+        except Exception as e:
+            self.log_message(f"⚠️ Impossible d'enregistrer le rapport dans la base: {e}", 'warning')
+    
+    def open_report_store_browser(self):
+        """
+        Ouvrir la fenêtre de consultation de la base de rapports (requêtes filtrées, page par page).
+        """
+        if self.store_window and self.store_window.winfo_exists():
+            self.store_window.lift()
+            self.store_window.focus_force()
+            return
+        try:
+            store = self.get_report_store()
+        except Exception as e:
+            messagebox.showerror("❌ Base de Rapports", str(e))
+            return
+        
+        self.store_window = tk.Toplevel(self.root)
+        self.store_window.title(f"🗄️ Base de Rapports - {store.db_path}")
+        self.store_window.geometry("1100x650")
+        
+        main_frame = ttk.Frame(self.store_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        main_frame.rowconfigure(4, weight=2)
+        
+        # Liste des runs
+        ttk.Label(main_frame, text="Comparaisons enregistrées", style='Subtitle.TLabel').grid(row=0, column=0, sticky=tk.W)
+        run_columns = ("id", "timestamp", "reference", "extracted", "missing", "extra", "modified")
+        self.store_runs_tree = ttk.Treeview(main_frame, columns=run_columns, show="headings", height=6)
+        run_headings = ["#", "Date", "Référence", "Extrait", "Manquants", "Supplémentaires", "Modifiés"]
+        for column, heading, width in zip(run_columns, run_headings, (50, 170, 280, 280, 90, 110, 80)):
+            self.store_runs_tree.heading(column, text=heading)
+            self.store_runs_tree.column(column, width=width, stretch=column in ("reference", "extracted"))
+        self.store_runs_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Filtres des entrées
+        filter_frame = ttk.Frame(main_frame)
+        filter_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(10, 5))
+        self.store_status_var = tk.StringVar(value="tous")
+        self.store_path_query_var = tk.StringVar(value="")
+        self.store_digest_var = tk.StringVar(value="")
+        self.store_all_runs_var = tk.BooleanVar(value=False)
+        self.store_offset = 0
+        ttk.Label(filter_frame, text="Statut:").pack(side=tk.LEFT)
+        ttk.Combobox(filter_frame, textvariable=self.store_status_var, state="readonly", width=10,
+                     values=("tous", "missing", "extra", "modified")).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(filter_frame, text="Chemin contient:").pack(side=tk.LEFT)
+        path_entry = ttk.Entry(filter_frame, textvariable=self.store_path_query_var, width=30)
+        path_entry.pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(filter_frame, text="Empreinte:").pack(side=tk.LEFT)
+        ttk.Entry(filter_frame, textvariable=self.store_digest_var, width=20).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Checkbutton(filter_frame, text="Tous les runs",
+                        variable=self.store_all_runs_var).pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Button(filter_frame, text="🔍 Rechercher",
+                   command=lambda: self._store_query_entries(reset=True)).pack(side=tk.LEFT)
+        path_entry.bind('<Return>', lambda event: self._store_query_entries(reset=True))
+        
+        # Entrées
+        entry_columns = ("run", "status", "kind", "path", "digest_ref", "digest_ext")
+        self.store_entries_tree = ttk.Treeview(main_frame, columns=entry_columns, show="headings")
+        entry_headings = ["Run", "Statut", "Type", "Chemin", "Empreinte référence", "Empreinte extrait"]
+        for column, heading, width in zip(entry_columns, entry_headings, (50, 80, 50, 480, 200, 200)):
+            self.store_entries_tree.heading(column, text=heading)
+            self.store_entries_tree.column(column, width=width, stretch=column == "path")
+        self.store_entries_tree.grid(row=4, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        buttons = [
+            ("◀️ Précédents", lambda: self._store_query_entries(page=-1)),
+            ("▶️ Suivants", lambda: self._store_query_entries(page=1)),
+            ("📥 Afficher le Run", self._store_load_selected_run),
+            ("➕ Importer un Fichier JSON", self._store_import_file),
+            ("🗑️ Supprimer le Run", self._store_delete_selected_run)
+        ]
+        for text, command in buttons:
+            ttk.Button(button_frame, text=text, command=command,
+                       style='Modern.TButton').pack(side=tk.LEFT, padx=(0, 10))
+        self.store_page_label = ttk.Label(button_frame, text="")
+        self.store_page_label.pack(side=tk.LEFT)
+        
+        self.store_runs_tree.bind('<<TreeviewSelect>>', lambda event: self._store_query_entries(reset=True))
+        self._store_refresh_runs()
+    
+    def _store_refresh_runs(self):
+        """
+        Recharger la liste des runs de la base.
+        """
+        self.store_runs_tree.delete(*self.store_runs_tree.get_children())
+        for run in self.get_report_store().list_runs():
+            self.store_runs_tree.insert("", tk.END, iid=str(run['id']), values=(
+                run['id'], run['timestamp'], run['reference_path'] or "", run['extracted_path'] or "",
+                run['num_missing'], run['num_extra'], run['num_modified']))
+    
+    def _store_selected_run(self):
+        selection = self.store_runs_tree.selection()
+        return int(selection[0]) if selection else None
+    
+    def _store_query_entries(self, reset=False, page=0):
+        """
+        Afficher une page d'entrées correspondant aux filtres (la requête ne lit que cette page).
+        """
+        page_size = 500
+        if reset:
+            self.store_offset = 0
+        self.store_offset = max(0, self.store_offset + page * page_size)
+        status = self.store_status_var.get()
+        run_id = None if self.store_all_runs_var.get() else self._store_selected_run()
+        try:
+            entries = self.get_report_store().query_entries(
+                run_id=run_id, status=None if status == "tous" else status,
+                path_query=self.store_path_query_var.get().strip() or None,
+                digest=self.store_digest_var.get().strip() or None, limit=page_size, offset=self.store_offset)
+        except Exception as e:
+            messagebox.showerror("❌ Requête Invalide", str(e))
+            return
+        self.store_entries_tree.delete(*self.store_entries_tree.get_children())
+        for entry in entries:
+            self.store_entries_tree.insert("", tk.END, values=(
+                entry['run_id'], entry['status'], entry['kind'], entry['path'],
+                entry['digest_ref'] or "", entry['digest_ext'] or ""))
+        self.store_page_label.config(text=f"Entrées {self.store_offset + 1 if entries else 0}-"
+                                          f"{self.store_offset + len(entries)}")
+    
+    def _store_load_selected_run(self):
+        """
+        Afficher dans la console le rapport d'un run (remplace l'import du fichier JSON complet).
+        """
+        run_id = self._store_selected_run()
+        if run_id is None:
+            messagebox.showinfo("ℹ️ Aucun Run", "Sélectionnez un run dans la liste.")
+            return
+        report, run = self.get_report_store().load_report(run_id)
+        report.setdefault('timestamp', run['timestamp'])
+        self.current_report = report
+        self.log_message(f"🗄️ Run #{run_id} chargé depuis la base ({run['timestamp']})")
+        if run['reference_path']:
+            self.log_message(f"📚 Chemin de référence original: {run['reference_path']}")
+        if run['extracted_path']:
+            self.log_message(f"📦 Chemin d'extraction original: {run['extracted_path']}")
+        self.display_comparison_results(report)
+    
+    def _store_import_file(self):
+        """
+        Ajouter un rapport exporté à la base (lecture en flux des listes).
+        """
+        file_path = filedialog.askopenfilename(title="➕ Importer un Rapport dans la Base",
+                                               filetypes=[("Fichiers JSON", "*.json"), ("Tous les fichiers", "*.*")])
+        if not file_path:
+            return
+        try:
+            run_id = self.get_report_store().add_report_file(file_path)
+            self.log_message(f"🗄️ {file_path} importé dans la base (run #{run_id})", 'info')
+        except Exception as e:
+            messagebox.showerror("❌ Erreur d'Import", str(e))
+            return
+        self._store_refresh_runs()
+    
+    def _store_delete_selected_run(self):
+        run_id = self._store_selected_run()
+        if run_id is None:
+            return
+        if messagebox.askyesno("🗑️ Supprimer le Run", f"Supprimer le run #{run_id} de la base ?"):
+            self.get_report_store().delete_run(run_id)
+            self._store_refresh_runs()
+            self.store_entries_tree.delete(*self.store_entries_tree.get_children())
+    
+    def compare_saved_results(self):
+        """
+        Comparer deux rapports exportés (ou deux manifestes) sans relire les arborescences.
+        """
+        old_path = filedialog.askopenfilename(
+            title="🕰️ Ancien Rapport ou Manifeste",
+            filetypes=[("Rapports et manifestes", "*.json *.jsonl"), ("Tous les fichiers", "*.*")]
+        )
+        if not old_path:
+            return
+        new_path = filedialog.askopenfilename(
+            title="🕰️ Nouveau Rapport ou Manifeste",
+            filetypes=[("Rapports et manifestes", "*.json *.jsonl"), ("Tous les fichiers", "*.*")]
+        )
+        if not new_path:
+            return
+        # Fichier facultatif recevant toutes les évolutions (Annuler = affichage seul)
+        output_path = filedialog.asksaveasfilename(
+            title="💾 Enregistrer toutes les évolutions (facultatif)",
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl")]
+        ) or None
+        
+        self.log_message(f"🕰️ Comparaison de {os.path.basename(old_path)} → {os.path.basename(new_path)}...", 'info')
+        self.update_status("Comparaison des rapports...", "🕰️")
+        
+        def run():
+            try:
+                summary = diff_saved_results(old_path, new_path, output_path,
+                                             progress_callback=lambda message: self.report_diff_messages.put(('progress', message)))
+                self.report_diff_messages.put(('done', summary))
+            except Exception as e:
+                self.report_diff_messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="report-diff", daemon=True).start()
+        self.root.after(300, self._poll_report_diff)
+    
+    def _poll_report_diff(self):
+        """
+        Afficher le résultat de la comparaison de deux rapports une fois terminée.
+        """
+        while True:
+            try:
+                kind, payload = self.report_diff_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.log_message(payload)
+            elif kind == 'done':
+                self.display_report_diff(payload)
+                self.update_status("Comparaison des rapports terminée", "✅")
+                return
+            else:
+                self.log_message(f"❌ Erreur lors de la comparaison des rapports: {payload}")
+                messagebox.showerror("❌ Erreur de Comparaison", payload)
+                self.update_status("Échec de la comparaison des rapports", "❌")
+                return
+        self.root.after(300, self._poll_report_diff)
+    
+    def display_report_diff(self, summary):
+        """
+        Afficher les évolutions entre deux rapports ou manifestes.
+        """
+        self.log_message("═══════════════════════════════════════════════════════")
+        self.log_message("🕰️ ÉVOLUTION ENTRE DEUX " + ("MANIFESTES" if summary['format'] == 'manifest' else "RAPPORTS"), 'info')
+        self.log_message("═══════════════════════════════════════════════════════")
+        self.log_message(f"📜 Ancien: {summary['old']} ({summary['old_records']:,} entrées)")
+        self.log_message(f"📜 Nouveau: {summary['new']} ({summary['new_records']:,} entrées)")
+        
+        categories = [
+            ('newly_missing', "📄 Nouveaux manquants", 'missing'),
+            ('newly_extra', "📄 Nouveaux supplémentaires", 'extra'),
+            ('newly_modified', "🔄 Nouvellement modifiés", 'modified'),
+            ('resolved', "✅ Résolus", 'success')
+        ]
+        for category, label, tag in categories:
+            self.log_message(f"{label}: {summary['counts'][category]:,}", tag)
+        
+        for category, label, tag in categories:
+            samples = summary['samples'][category]
+            if not samples:
+                continue
+            self.log_message(f"\n{label.upper()}", tag)
+            self.log_message("─" * 50)
+            for entry in samples:
+                icon = "📁" if entry['kind'] == 'dir' else "📄"
+                transition = f" ({entry['previous'] or '-'} → {entry['current'] or '-'})" if summary['format'] == 'report' else ""
+                self.log_message(f"  {icon} {entry['path']}{transition}", tag)
+            if summary['counts'][category] > len(samples):
+                self.log_message(f"  ... et {summary['counts'][category] - len(samples):,} autres", tag)
+        
+        if summary['output_path']:
+            self.log_message(f"\n💾 Toutes les évolutions: {summary['output_path']}")
+        self.log_message("═══════════════════════════════════════════════════════\n")
+
+    def verify_checksum_list_gui(self):
+        """
+        Vérifier un dossier avec une liste de sommes de contrôle (SHA256SUMS, *.md5...) sans arborescence de référence.
+        """
+        if self.comparison_running:
+            messagebox.showwarning("⚠️ Comparaison en Cours", "Une comparaison est déjà en cours.")
+            return
+        list_path = filedialog.askopenfilename(
+            title="🧾 Liste de Sommes de Contrôle",
+            filetypes=[("Listes de sommes", "*SUMS *.sha256 *.sha512 *.sha1 *.md5 *.txt"), ("Tous les fichiers", "*.*")]
+        )
+        if not list_path:
+            return
+        # Dossier des fichiers listés (Annuler = dossier de la liste)
+        base_dir = filedialog.askdirectory(title="📁 Dossier des fichiers listés (Annuler = dossier de la liste)",
+                                           initialdir=os.path.dirname(list_path)) or os.path.dirname(list_path)
+        try:
+            options = self.get_comparison_options()
+        except ValueError as e:
+            messagebox.showerror("❌ Paramètres Invalides", str(e))
+            return
+        
+        self.show_progress_bar(100)
+        self.live_counts = {'missing': 0, 'extra': 0, 'modified': 0, 'verified': 0, 'total': None}
+        self._update_live_counts()
+        self.live_counts_label.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        self.update_status("Vérification de la liste de sommes...", "🧾")
+        self.log_message(f"🧾 Vérification de {list_path}")
+        self.log_message(f"📦 Dossier: {base_dir}")
+        self.comparison_running = True
+        
+        messages = self.comparison_messages
+        
+        def run():
+            try:
+                report = verify_checksum_list(list_path, base_dir, scan_filter=options['scan_filter'],
+                                              throttle=options['throttle'], cache_hints=options['cache_hints'],
+                                              progress_callback=lambda message: messages.put(('progress', message)),
+                                              stats_callback=lambda snapshot: messages.put(('stats', snapshot)),
+                                              result_callback=lambda kind, payload: messages.put(('result', (kind, payload))))
+                messages.put(('done', (report, list_path, base_dir)))
+            except Exception as e:
+                messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="checksum-verification", daemon=True).start()
+        self.root.after(200, self._poll_comparison)
+    
+    def recheck_differences_gui(self):
+        """
+        Revérifier seulement les différences du rapport courant (ou importé) après des corrections.
+        """
+        if self.comparison_running:
+            messagebox.showwarning("⚠️ Comparaison en Cours", "Une comparaison est déjà en cours.")
+            return
+        report = self.current_report
+        if report is None:
+            messagebox.showwarning("⚠️ Aucun Résultat",
+                                   "Veuillez d'abord effectuer une comparaison ou importer un rapport.")
+            return
+        ref_path = self.ref_path_var.get().strip()
+        extract_path = self.extract_path_var.get().strip()
+        if not (os.path.isdir(ref_path) and os.path.isdir(extract_path)):
+            messagebox.showerror("❌ Chemin Non Trouvé",
+                                 "Les répertoires de référence et d'extraction doivent exister pour la revérification.")
+            return
+        try:
+            options = self.get_comparison_options()
+        except ValueError as e:
+            messagebox.showerror("❌ Paramètres Invalides", str(e))
+            return
+        
+        self.show_progress_bar(100)
+        self.update_status("Revérification des différences...", "🔁")
+        total_issues = report.get('num_missing', 0) + report.get('num_extra', 0) + report.get('num_modified', 0)
+        self.log_message(f"🔁 Revérification de {total_issues:,} différences de la comparaison du "
+                         f"{report.get('timestamp') or 'date inconnue'}", 'info')
+        if not parse_report_timestamp(report.get('timestamp')):
+            self.log_message("⚠️ Rapport sans horodatage: seuls les différences et les nouveaux chemins sont revérifiés, "
+                             "pas les fichiers communs modifiés depuis", 'warning')
+        self.comparison_running = True
+        
+        messages = self.comparison_messages
+        
+        def run():
+            try:
+                recheck_report(extract_path, ref_path, report, throttle=options['throttle'],
+                               scan_workers=options['scan_workers'],
+                               progress_callback=lambda message: messages.put(('progress', message)))
+                messages.put(('done', (report, ref_path, extract_path, False)))
+            except Exception as e:
+                messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="recheck", daemon=True).start()
+        self.root.after(200, self._poll_comparison)
+    
+    def create_checksum_list_gui(self):
+        """
+        Écrire la liste des sommes de contrôle d'un dossier (format sha256sum/md5sum).
+        """
+        directory = filedialog.askdirectory(title="🧾 Dossier à Inventorier")
+        if not directory:
+            return
+        output_path = filedialog.asksaveasfilename(
+            title="💾 Liste de Sommes (SHA256SUMS, MD5SUMS, *.sha512...)",
+            initialdir=directory, initialfile="SHA256SUMS",
+            filetypes=[("Listes de sommes", "*SUMS *.sha256 *.sha512 *.sha1 *.md5"), ("Tous les fichiers", "*.*")]
+        )
+        if not output_path:
+            return
+        try:
+            options = self.get_comparison_options()
+        except ValueError as e:
+            messagebox.showerror("❌ Paramètres Invalides", str(e))
+            return
+        algorithm = checksum_algorithm_for_name(output_path) or 'sha256'
+        
+        self.log_message(f"🧾 Création de la liste {algorithm} de {directory}...", 'info')
+        self.update_status("Création de la liste de sommes...", "🧾")
+        
+        def run():
+            try:
+                summary = write_checksum_list(directory, output_path, algorithm, scan_filter=options['scan_filter'],
+                                              throttle=options['throttle'], cache_hints=options['cache_hints'],
+                                              progress_callback=lambda message: self.checksum_messages.put(('progress', message)))
+                self.checksum_messages.put(('done', summary))
+            except Exception as e:
+                self.checksum_messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="checksum-list", daemon=True).start()
+        self.root.after(300, self._poll_checksum_list)
+    
+    def _poll_checksum_list(self):
+        """
+        Afficher le résultat de la création d'une liste de sommes une fois terminée.
+        """
+        while True:
+            try:
+                kind, payload = self.checksum_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.log_message(payload)
+            elif kind == 'done':
+                self.log_message(f"✅ {payload['files']:,} sommes {payload['algorithm']} écrites dans {payload['output_path']}",
+                                 'success')
+                for relative_path in payload['unreadable'][:20]:
+                    self.log_message(f"  ⚠️ Illisible, non listé: {relative_path}", 'warning', path=relative_path)
+                if len(payload['unreadable']) > 20:
+                    self.log_message(f"  ... et {len(payload['unreadable']) - 20:,} autres fichiers illisibles", 'warning')
+                self.update_status("Liste de sommes créée", "✅")
+                return
+            else:
+                self.log_message(f"❌ Erreur lors de la création de la liste: {payload}")
+                messagebox.showerror("❌ Erreur", payload)
+                self.update_status("Échec de la création de la liste", "❌")
+                return
+        self.root.after(300, self._poll_checksum_list)
+    
+    def open_sharded_dialog(self):
+        """
+        Ouvrir la fenêtre de vérification répartie entre plusieurs processus ou machines.
+        """
+        if self.shard_window and self.shard_window.winfo_exists():
+            self.shard_window.lift()
+            self.shard_window.focus_force()
+            return
+        
+        self.shard_window = tk.Toplevel(self.root)
+        self.shard_window.title("🧩 Vérification Répartie")
+        self.shard_window.resizable(False, False)
+        
+        main_frame = ttk.Frame(self.shard_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(1, weight=1)
+        
+        self.shard_workers_var = tk.StringVar(value="")
+        self.shard_local_count_var = tk.StringVar(value="4")
+        self.shard_partition_var = tk.StringVar(value="top_level")
+        self.shard_token_var = tk.StringVar(value="")
+        
+        ttk.Label(main_frame, text="Workers distants (hôte:port, ...):").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(main_frame, textvariable=self.shard_workers_var, width=45).grid(row=0, column=1, sticky=(tk.W, tk.E),
+                                                                                  padx=(5, 0))
+        ttk.Label(main_frame, text="Sinon, workers locaux:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Spinbox(main_frame, from_=1, to=64, width=5,
+                    textvariable=self.shard_local_count_var).grid(row=1, column=1, sticky=tk.W, padx=(5, 0), pady=(5, 0))
+        ttk.Label(main_frame, text="Jeton partagé (facultatif):").grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(main_frame, textvariable=self.shard_token_var, show="•").grid(row=2, column=1, sticky=(tk.W, tk.E),
+                                                                                 padx=(5, 0), pady=(5, 0))
+        ttk.Radiobutton(main_frame, text="Partage par dossier de premier niveau",
+                        variable=self.shard_partition_var, value="top_level").grid(row=3, column=0, columnspan=2,
+                                                                                   sticky=tk.W, pady=(10, 0))
+        ttk.Radiobutton(main_frame, text="Partage par plage de hachage des chemins",
+                        variable=self.shard_partition_var, value="hash").grid(row=4, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(main_frame, text="Sur une autre machine: python main.py --shard-worker --host 0.0.0.0 --port 7700",
+                  style='Subtitle.TLabel').grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        ttk.Button(main_frame, text="▶️ Lancer", command=self.run_sharded_comparison,
+                   style='Modern.TButton').grid(row=6, column=0, sticky=tk.W, pady=(15, 0))
+    
+    def run_sharded_comparison(self):
+        """
+        Lancer la comparaison des chemins actuels, répartie entre les workers, en arrière-plan.
+        """
+        ref_path = self.ref_path_var.get().strip()
+        extract_path = self.extract_path_var.get().strip()
+        if not ref_path or not extract_path:
+            messagebox.showerror("❌ Chemins Manquants",
+                                 "Veuillez spécifier les chemins de référence et d'extraction.")
+            return
+        try:
+            workers = [spec for spec in re.split(r'[,\s]+', self.shard_workers_var.get().strip()) if spec]
+            for spec in workers:
+                _parse_shard_worker(spec)
+            local_count = int(self.shard_local_count_var.get())
+            options = self.get_comparison_options()
+            encode_shard_options(options)
+        except ValueError as e:
+            messagebox.showerror("❌ Paramètres Invalides", str(e))
+            return
+        partition = self.shard_partition_var.get()
+        token = self.shard_token_var.get().strip() or None
+        
+        self.log_message(f"🧩 Vérification répartie ({'workers distants' if workers else f'{local_count} workers locaux'}, "
+                         f"partage {'par dossier' if partition == 'top_level' else 'par hachage'})...", 'info')
+        self.update_status("Vérification répartie...", "🧩")
+        self.live_counts = {'missing': 0, 'extra': 0, 'modified': 0, 'verified': 0, 'total': None}
+        self._update_live_counts()
+        self.live_counts_label.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        
+        def run():
+            processes = []
+            try:
+                shard_workers = workers
+                if not shard_workers:
+                    processes, shard_workers = start_local_shard_workers(local_count, token)
+                report = compare_archives_sharded(extract_path, ref_path, shard_workers, partition=partition, token=token,
+                                                  progress_callback=lambda message: self.shard_messages.put(('progress', message)),
+                                                  result_callback=lambda kind, payload: self.shard_messages.put(('result', (kind, payload))),
+                                                  **options)
+                self.shard_messages.put(('done', (report, ref_path, extract_path)))
+            except Exception as e:
+                self.shard_messages.put(('error', str(e)))
+            finally:
+                stop_local_shard_workers(processes)
+        
+        threading.Thread(target=run, name="sharded-comparison", daemon=True).start()
+        self.root.after(300, self._poll_sharded_comparison)
+    
+    def _poll_sharded_comparison(self):
+        """
+        Relayer la progression de la vérification répartie et afficher le rapport fusionné.
+        """
+        while True:
+            try:
+                kind, payload = self.shard_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.log_message(payload)
+            elif kind == 'result':
+                self.display_streamed_result(*payload)
+            elif kind == 'done':
+                self.live_counts_label.grid_remove()
+                report, ref_path, extract_path = payload
+                self.current_report = report
+                self.display_comparison_results(report, streamed=True)
+                for worker in report['sharding']['workers']:
+                    self.log_message(f"🧩 {worker['address']}: {worker['shards']} shards, "
+                                     f"{worker['files_verified']:,} fichiers vérifiés ({worker['status']})", 'info')
+                if self.report_store_var.get():
+                    self.store_report(report, ref_path, extract_path)
+                total_issues = report['num_missing'] + report['num_extra'] + report['num_modified']
+                if total_issues == 0:
+                    self.update_status("✨ Les archives correspondent parfaitement!", "✨")
+                else:
+                    self.update_status(f"⚠️ Trouvé {total_issues} différences", "⚠️")
+                return
             else:
-                self.update_status(f"⚠️ Trouvé {len(duplicates_report['duplicate_groups'])} groupes de doublons", "⚠️")
+                self.live_counts_label.grid_remove()
+                self.log_message(f"❌ Erreur pendant la vérification répartie: {payload}")
+                messagebox.showerror("❌ Erreur de Comparaison", payload)
+                self.update_status("Échec de la vérification répartie", "❌")
+                return
+        self.root.after(300, self._poll_sharded_comparison)
+
+    def detect_duplicates(self):
+        """
+        Détecter les fichiers en double dans un répertoire en utilisant des hachages SHA-256.
+        """
+        if self.duplicates_running:
+            messagebox.showwarning("⚠️ Détection en Cours", "Une détection des doublons est déjà en cours.")
+            return
+        
+        # Demander à l'utilisateur de sélectionner un répertoire
+        directory = filedialog.askdirectory(
+            title="🔍 Sélectionner le Répertoire pour Détecter les Doublons",
+        )
+        
+        if not directory:
+            return
+        
+        if not os.path.exists(directory):
+            messagebox.showerror("❌ Erreur", f"Le répertoire n'existe pas: {directory}")
+            return
+        
+        # Afficher la barre de progression
+        self.show_progress_bar(100)
+        
+        self.update_status("Détection des doublons en cours...", "🔍")
+        self.log_message("🚀 Démarrage de la détection des fichiers en double...")
+        self.log_message(f"📁 Répertoire analysé: {directory}")
+        self.log_message("🔧 Filtres appliqués: fichiers de plus de 1KB, exclusion des fichiers système", 'info')
+        if self.filter_exclude_rules or self.filter_include_var.get().strip():
+            self.log_message("🧹 Filtres personnalisés actifs (voir ⚙️ Options)", 'info')
+        
+        # Appliquer les limitations d'E/S et les filtres configurés
+        self.io_throttle = self.get_io_throttle()
+        scan_filter = self.get_scan_filter(for_duplicates=True)
+        memory_budget = self.get_memory_budget()
+        near_duplicates = self.get_near_duplicate_options()
+        low_priority = self.low_priority_var.get()
+        profile_path = self._get_profiling_output_path("doublons") if self.profiling_var.get() else None
+        self.duplicates_running = True
+        messages = self.duplicates_messages
+        
+        def run():
+            try:
+                # La priorité basse ne s'applique qu'à ce thread: l'interface garde la sienne
+                if low_priority:
+                    applied = set_low_priority()
+                    messages.put(('log', (f"🐢 Priorité basse: {', '.join(applied) if applied else 'non supportée sur ce système'}",
+                                          'info')))
                 
-        except KeyboardInterrupt:
-            self.log_message("⚠️ Opération interrompue par l'utilisateur", 'warning')
-            self.update_status("Opération annulée", "⚠️")
-        except Exception as e:
-            error_msg = f"❌ Erreur lors de la détection des doublons: {str(e)}"
-            self.log_message(error_msg)
-            messagebox.showerror("❌ Erreur de Détection", str(e))
-            self.update_status("Échec de la détection", "❌")
-        finally:
-            # Cacher la barre de progression
-            self.hide_progress_bar()
+                # Effectuer la détection des doublons
+                if profile_path:
+                    duplicates_report, artifacts = run_with_profiling(profile_path, self._scan_for_duplicates, directory,
+                                                                      scan_filter, memory_budget, near_duplicates)
+                    messages.put(('profiling', artifacts))
+                else:
+                    duplicates_report = self._scan_for_duplicates(directory, scan_filter, memory_budget, near_duplicates)
+                messages.put(('done', duplicates_report))
+            except Exception as e:
+                messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="duplicates", daemon=True).start()
+        self.root.after(200, self._poll_duplicates_messages)
+    
+    def _poll_duplicates_messages(self):
+        """
+        Relayer l'avancement de la détection des doublons et afficher son rapport.
+        """
+        deadline = time.perf_counter() + 0.1  # garder l'interface réactive
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self.duplicates_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'log':
+                self.log_message(*payload)
+            elif kind == 'progress':
+                self.update_progress_bar(payload)
+            elif kind == 'profiling':
+                self._log_profiling_artifacts(payload)
+            else:
+                self.duplicates_running = False
+                self.hide_progress_bar()
+                if kind == 'done':
+                    # Afficher les résultats
+                    self.display_duplicates_results(payload)
+                    self.last_duplicates_report = payload
+                    
+                    # Mettre à jour le statut
+                    total_duplicates = sum(len(group) for group in payload['duplicate_groups'].values())
+                    if total_duplicates == 0:
+                        self.update_status("✨ Aucun doublon trouvé!", "✨")
+                    else:
+                        self.update_status(f"⚠️ Trouvé {len(payload['duplicate_groups'])} groupes de doublons", "⚠️")
+                else:
+                    error_msg = f"❌ Erreur lors de la détection des doublons: {payload}"
+                    self.log_message(error_msg)
+                    messagebox.showerror("❌ Erreur de Détection", payload)
+                    self.update_status("Échec de la détection", "❌")
+                return
+        self.root.after(200, self._poll_duplicates_messages)
+
+    def open_dedup_dialog(self):
+        """
+        Ouvrir la fenêtre de déduplication des doublons détectés (liens physiques ou reflinks).
+        """
+        if self.dedup_window and self.dedup_window.winfo_exists():
+            self.dedup_window.lift()
+            self.dedup_window.focus_force()
+            return
+        
+        self.dedup_window = tk.Toplevel(self.root)
+        self.dedup_window.title("♻️ Déduplication")
+        self.dedup_window.resizable(False, False)
+        
+        main_frame = ttk.Frame(self.dedup_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(1, weight=1)
+        
+        report = self.last_duplicates_report
+        if report and report['duplicate_groups']:
+            summary = (f"{len(report['duplicate_groups'])} groupes de doublons, "
+                       f"{format_size(report.get('reclaimable_space', 0))} récupérables")
+        else:
+            summary = "Aucun doublon détecté: lancer d'abord 🔍 Détecter Doublons"
+        ttk.Label(main_frame, text=summary, style='Subtitle.TLabel').grid(row=0, column=0, columnspan=3,
+                                                                          sticky=tk.W, pady=(0, 10))
+        
+        self.dedup_mode_var = tk.StringVar(value="hardlink")
+        self.dedup_dry_run_var = tk.BooleanVar(value=True)
+        self.dedup_journal_var = tk.StringVar(value="")
+        
+        ttk.Radiobutton(main_frame, text="Liens physiques (même disque, métadonnées partagées)",
+                        variable=self.dedup_mode_var, value="hardlink").grid(row=1, column=0, columnspan=3, sticky=tk.W)
+        ttk.Radiobutton(main_frame, text="Reflinks copy-on-write (btrfs, XFS..., copie conservée sinon)",
+                        variable=self.dedup_mode_var, value="reflink").grid(row=2, column=0, columnspan=3, sticky=tk.W)
+        ttk.Checkbutton(main_frame, text="Essai à blanc (vérifier et compter sans rien modifier)",
+                        variable=self.dedup_dry_run_var).grid(row=3, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        ttk.Label(main_frame, text="Journal d'annulation:").grid(row=4, column=0, sticky=tk.W, pady=(10, 0))
+        ttk.Entry(main_frame, textvariable=self.dedup_journal_var, width=50).grid(row=4, column=1, sticky=(tk.W, tk.E),
+                                                                                padx=(5, 0), pady=(10, 0))
+        ttk.Button(main_frame, text="💾", width=3,
+                   command=lambda: self.dedup_journal_var.set(filedialog.asksaveasfilename(
+                       title="Journal d'annulation", defaultextension=".jsonl",
+                       filetypes=[("Journal JSON Lines", "*.jsonl")]) or self.dedup_journal_var.get())).grid(
+            row=4, column=2, padx=(5, 0), pady=(10, 0))
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=5, column=0, columnspan=3, sticky=tk.W, pady=(15, 0))
+        buttons = [
+            ("▶️ Lancer", self.run_deduplication),
+            ("↩️ Annuler une Déduplication", self.run_dedup_rollback)
+        ]
+        for text, command in buttons:
+            ttk.Button(button_frame, text=text, command=command,
+                       style='Modern.TButton').pack(side=tk.LEFT, padx=(0, 10))
+    
+    def run_deduplication(self):
+        """
+        Remplacer les copies redondantes du dernier rapport de doublons en arrière-plan.
+        """
+        if self.dedup_running:
+            messagebox.showwarning("⚠️ Déduplication en Cours", "Une déduplication est déjà en cours.")
+            return
+        report = self.last_duplicates_report
+        if not report or not report['duplicate_groups']:
+            messagebox.showinfo("ℹ️ Aucun Doublon", "Lancez d'abord la détection des doublons.")
+            return
+        
+        mode = self.dedup_mode_var.get()
+        dry_run = self.dedup_dry_run_var.get()
+        journal_path = self.dedup_journal_var.get().strip() or None
+        if not dry_run:
+            if not journal_path:
+                journal_path = os.path.join(os.path.dirname(self.output_file_var.get().strip()) or os.getcwd(),
+                                            f"dedup_journal_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+                self.dedup_journal_var.set(journal_path)
+            if not messagebox.askyesno("♻️ Confirmer la Déduplication",
+                                       f"Remplacer les copies redondantes par des "
+                                       f"{'liens physiques' if mode == 'hardlink' else 'reflinks'} ?\n\n"
+                                       f"Journal d'annulation: {journal_path}"):
+                return
+        
+        self.dedup_running = True
+        self.log_message(f"♻️ Déduplication ({mode}{', essai à blanc' if dry_run else ''}) de "
+                         f"{len(report['duplicate_groups'])} groupes...", 'info')
+        self.update_status("Déduplication en cours...", "♻️")
+        throttle = self.get_io_throttle()
+        
+        def run():
+            try:
+                summary = deduplicate_groups(report['duplicate_groups'], mode=mode, dry_run=dry_run,
+                                             journal_path=journal_path, throttle=throttle,
+                                             progress_callback=lambda message: self.dedup_messages.put(('progress', message)))
+                self.dedup_messages.put(('dedup', summary))
+            except Exception as e:
+                self.dedup_messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="dedup", daemon=True).start()
+        self.root.after(300, self._poll_dedup_messages)
+    
+    def run_dedup_rollback(self):
+        """
+        Annuler une déduplication à partir de son journal.
+        """
+        if self.dedup_running:
+            messagebox.showwarning("⚠️ Déduplication en Cours", "Une déduplication est déjà en cours.")
+            return
+        journal_path = filedialog.askopenfilename(title="↩️ Journal de Déduplication",
+                                                  filetypes=[("Journal JSON Lines", "*.jsonl"),
+                                                             ("Tous les fichiers", "*.*")])
+        if not journal_path:
+            return
+        
+        self.dedup_running = True
+        self.log_message(f"↩️ Annulation de la déduplication: {journal_path}", 'info')
+        self.update_status("Annulation de la déduplication...", "↩️")
+        
+        def run():
+            try:
+                summary = rollback_dedup(journal_path,
+                                         progress_callback=lambda message: self.dedup_messages.put(('progress', message)))
+                self.dedup_messages.put(('rollback', summary))
+            except Exception as e:
+                self.dedup_messages.put(('error', str(e)))
+        
+        threading.Thread(target=run, name="dedup-rollback", daemon=True).start()
+        self.root.after(300, self._poll_dedup_messages)
+    
+    def _poll_dedup_messages(self):
+        """
+        Afficher dans l'interface l'avancement de la déduplication ou de son annulation.
+        """
+        finished = False
+        while True:
+            try:
+                kind, payload = self.dedup_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.log_message(payload)
+            elif kind == 'dedup':
+                finished = True
+                summary = payload
+                verb = "récupérables" if summary['dry_run'] else "récupérés"
+                self.log_message(f"✅ {summary['verified']}/{summary['candidates']} copies vérifiées octet par octet, "
+                                 f"{summary['replaced']} {'à remplacer' if summary['dry_run'] else 'remplacées'}", 'success')
+                self.log_message(f"💾 Espace {verb}: {format_size(summary['reclaimed_bytes'])}", 'info')
+                if summary['reflink_unsupported']:
+                    self.log_message(f"⚠️ {summary['reflink_unsupported']} copies conservées: reflinks non supportés "
+                                     f"par le système de fichiers", 'warning')
+                for skipped in summary['skipped'][:20]:
+                    self.log_message(f"  ⏩ {self._get_display_path(skipped['file'])}: {skipped['reason']}", 'warning')
+                for error in summary['errors'][:20]:
+                    self.log_message(f"  ❌ {self._get_display_path(error['file'])}: {error['error']}")
+                if summary['journal_path']:
+                    self.log_message(f"📒 Journal d'annulation: {summary['journal_path']}")
+                self.update_status(f"Déduplication terminée: {format_size(summary['reclaimed_bytes'])} {verb}", "✅")
+            elif kind == 'rollback':
+                finished = True
+                summary = payload
+                self.log_message(f"↩️ {summary['restored']}/{summary['records']} fichiers restaurés en copies indépendantes",
+                                 'success')
+                for skipped in summary['skipped'][:20]:
+                    self.log_message(f"  ⏩ {self._get_display_path(skipped['file'])}: {skipped['reason']}", 'warning')
+                for error in summary['errors'][:20]:
+                    self.log_message(f"  ❌ {self._get_display_path(error['file'])}: {error['error']}")
+                self.update_status("Annulation de la déduplication terminée", "✅")
+            elif kind == 'error':
+                finished = True
+                self.log_message(f"❌ Erreur de déduplication: {payload}")
+                self.update_status("Échec de la déduplication", "❌")
+        
+        if finished:
+            self.dedup_running = False
+        else:
+            self.root.after(300, self._poll_dedup_messages)
 
-    def _scan_for_duplicates(self, directory):
+    def _scan_for_duplicates(self, directory, scan_filter=None, memory_budget=None, near_duplicates=None):
         """
         Scanner le répertoire pour identifier les fichiers en double avec optimisations pour gros volumes.
+        
+        Avec un budget mémoire (octets), les enregistrements hachés sont triés par segments sur disque
+        et regroupés par fusion externe au lieu d'être gardés dans un dictionnaire.
+        Avec near_duplicates ({'threshold', 'max_bytes'}), un contenu par groupe est ensuite relu
+        pour regrouper les fichiers similaires (voir find_near_duplicates).
+        Exécuté dans un thread de travail: messages et progression passent par duplicates_messages.
         """
-        file_hashes = {}  # hash -> [list of file paths]
+        messages = self.duplicates_messages
+        
+        def log(message, tag=None):
+            messages.put(('log', (message, tag)))
+        
+        def progress(value):
+            messages.put(('progress', value))
+        
         total_files = 0
         processed_files = 0
         skipped_files = 0
         error_files = 0
         
+        # Filtres par défaut: fichiers système, cachés, temporaires et très petits (< 1KB)
+        if scan_filter is None:
+            scan_filter = ScanFilter.duplicate_scan_defaults()
+        
         # Compter le nombre total de fichiers avec filtrage
-        self.log_message("🔍 Comptage des fichiers à analyser...")
+        log("🔍 Comptage des fichiers à analyser...")
         for root, dirs, files in os.walk(directory):
-            # Ignorer les dossiers système et cachés
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['System Volume Information', '$RECYCLE.BIN', 'hiberfil.sys', 'pagefile.sys']]
+            # Ignorer les dossiers exclus sans les parcourir
+            relative_root = _relative_walk_root(root, directory)
+            scan_filter.prune(relative_root, dirs)
             
             for file in files:
-                # Ignorer les fichiers système, temporaires et très petits
-                if not file.startswith('.') and not file.lower().endswith(('.tmp', '.temp', '.log')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        # Ignorer les fichiers très petits (< 1KB) et très gros (> 2GB pour éviter la saturation mémoire)
-                        file_size = os.path.getsize(file_path)
-                        if 1024 <= file_size <= 2 * 1024 * 1024 * 1024:  # Entre 1KB et 2GB
-                            total_files += 1
-                        else:
-                            skipped_files += 1
-                    except (OSError, PermissionError):
-                        skipped_files += 1
+                relative_path = f"{relative_root}/{file}" if relative_root else file
+                if scan_filter.accepts_file(relative_path, os.path.join(root, file)):
+                    total_files += 1
+                else:
+                    skipped_files += 1
         
         if skipped_files > 0:
-            self.log_message(f"⚠️ {skipped_files} fichiers ignorés (système, trop petits/gros, ou inaccessibles)", 'warning')
+            log(f"⚠️ {skipped_files} fichiers ignorés (système, trop petits/gros, ou inaccessibles)", 'warning')
         
-        self.log_message(f"📊 Analyse de {total_files} fichiers pour détecter les doublons...")
+        log(f"📊 Analyse de {total_files} fichiers pour détecter les doublons...")
         
         if total_files == 0:
-            self.log_message("⚠️ Aucun fichier valide à analyser", 'warning')
+            log("⚠️ Aucun fichier valide à analyser", 'warning')
             return {
                 'total_files': 0,
                 'unique_files': 0,
@@ -1283,99 +2996,152 @@ class ArchiveComparerGUI:
             }
         
         # Initialiser la barre de progression
-        self.update_progress_bar(0)
-        
-        # Scanner tous les fichiers et calculer leurs hachages avec gestion d'erreurs robuste
-        for root, dirs, files in os.walk(directory):
-            # Ignorer les dossiers système et cachés
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['System Volume Information', '$RECYCLE.BIN', 'hiberfil.sys', 'pagefile.sys']]
-            
-            for file in files:
-                if not file.startswith('.') and not file.lower().endswith(('.tmp', '.temp', '.log')):
+        progress(0)
+        
+        # Hacher les fichiers acceptés: un enregistrement [hachage, taille, inode, chemin] par chemin
+        def hashed_records():
+            nonlocal processed_files, error_files
+            last_percent = None
+            inode_hashes = {}  # (st_dev, st_ino) -> hachage, seulement pour les fichiers à liens physiques multiples
+            for root, dirs, files in os.walk(directory):
+                # Ignorer les dossiers exclus sans les parcourir
+                relative_root = _relative_walk_root(root, directory)
+                scan_filter.prune(relative_root, dirs)
+                
+                for file in files:
+                    relative_path = f"{relative_root}/{file}" if relative_root else file
                     file_path = os.path.join(root, file)
+                    if not scan_filter.accepts_file(relative_path, file_path):
+                        continue
                     try:
-                        # Vérifier la taille du fichier
-                        file_size = os.path.getsize(file_path)
-                        if not (1024 <= file_size <= 2 * 1024 * 1024 * 1024):
+                        # Identifier le fichier physique: les liens physiques partagent (st_dev, st_ino)
+                        st = os.stat(file_path)
+                        file_size = st.st_size
+                        inode_key = f"{st.st_dev}:{st.st_ino}" if st.st_ino else f"path:{file_path}"
+                        
+                        if inode_key in inode_hashes:
+                            # Lien physique d'un fichier déjà haché: pas de relecture
+                            processed_files += 1
+                            yield [inode_hashes[inode_key], file_size, inode_key, file_path]
                             continue
                         
                         # Calculer le hachage SHA-256 avec gestion d'erreurs
-                        file_hash = self._calculate_file_hash_safe(file_path)
+                        if file_size >= LARGE_FILE_THRESHOLD:
+                            file_hash = self._calculate_large_file_hash_safe(file_path)
+                        else:
+                            file_hash = self._calculate_file_hash_safe(file_path)
                         
+                        processed_files += 1
                         if file_hash:  # Seulement si le hachage a réussi
-                            if file_hash not in file_hashes:
-                                file_hashes[file_hash] = []
-                            file_hashes[file_hash].append(file_path)
+                            if st.st_nlink > 1:
+                                inode_hashes[inode_key] = file_hash
+                            yield [file_hash, file_size, inode_key, file_path]
                         else:
                             error_files += 1
                         
-                        processed_files += 1
-                        
-                        # Mise à jour de progression avec libération périodique de mémoire
                         progress_percent = min(int((processed_files / total_files) * 90), 90)
-                        self.update_progress_bar(progress_percent)
+                        if progress_percent != last_percent:
+                            last_percent = progress_percent
+                            progress(progress_percent)
                         
-                        # Mise à jour de progression et nettoyage mémoire tous les 100 fichiers
+                        # Mise à jour de progression tous les 100 fichiers
                         if processed_files % 100 == 0:
                             progress_msg = f"Traitement: {processed_files}/{total_files} fichiers"
                             if error_files > 0:
                                 progress_msg += f" ({error_files} erreurs)"
-                            self.log_message(f"🔄 {progress_msg}")
-                            self.root.update_idletasks()
-                            
-                            # Forcer le garbage collection pour libérer la mémoire
-                            import gc
-                            gc.collect()
-                        
-                        # Pause périodique pour éviter de bloquer l'interface
-                        if processed_files % 50 == 0:
-                            self.root.update()
+                            log(f"🔄 {progress_msg}")
                             
                     except (OSError, PermissionError, FileNotFoundError) as e:
                         error_files += 1
                         if error_files <= 10:  # Limiter les messages d'erreur
-                            self.log_message(f"⚠️ Accès refusé: {os.path.basename(file_path)}", 'warning')
+                            log(f"⚠️ Accès refusé: {os.path.basename(file_path)}", 'warning')
                         elif error_files == 11:
-                            self.log_message("⚠️ Plus de 10 erreurs d'accès, les suivantes seront comptées silencieusement", 'warning')
+                            log("⚠️ Plus de 10 erreurs d'accès, les suivantes seront comptées silencieusement", 'warning')
                     except KeyboardInterrupt:
-                        self.log_message("⚠️ Opération interrompue par l'utilisateur", 'warning')
+                        log("⚠️ Opération interrompue par l'utilisateur", 'warning')
                         raise
                     except Exception as e:
                         error_files += 1
                         if error_files <= 5:  # Limiter les messages d'erreur détaillés
-                            self.log_message(f"⚠️ Erreur inattendue pour {os.path.basename(file_path)}: {str(e)[:100]}", 'warning')
+                            log(f"⚠️ Erreur inattendue pour {os.path.basename(file_path)}: {str(e)[:100]}", 'warning')
+        
+        # Hacher tous les fichiers puis regrouper par hachage (tri externe sur disque au-delà du budget mémoire)
+        max_records = records_for_memory_budget(memory_budget) if memory_budget else None
+        spill_info = {'runs': 0, 'records_spilled': 0}
+        distinct_contents = [] if near_duplicates else None
+        groups = group_duplicate_records(hashed_records(), max_records, spill_info,
+                                         distinct_contents.append if near_duplicates else None)
         
         # Phase finale : identification des doublons (10% restants)
-        self.update_progress_bar(90)
-        self.log_message("🔄 Identification des groupes de doublons...")
+        progress(90)
+        log("🔄 Identification des groupes de doublons...")
+        if spill_info['runs']:
+            log(f"💾 {spill_info['records_spilled']:,} enregistrements triés sur disque "
+                             f"({spill_info['runs']} segments, budget {format_size(memory_budget)})", 'info')
         
-        # Identifier les doublons (hachages avec plus d'un fichier)
+        # Groupes de doublons: un chemin par fichier physique partageant le même hachage
         duplicate_groups = {}
-        unique_files = 0
-        
-        for file_hash, file_paths in file_hashes.items():
-            if len(file_paths) > 1:
-                # Créer un nom de groupe basé sur le premier fichier
-                group_name = os.path.basename(file_paths[0])
-                duplicate_groups[group_name] = file_paths
-            else:
-                unique_files += 1
+        for file_paths in groups['duplicate_groups']:
+            # Créer un nom de groupe basé sur le premier fichier, sans écraser un groupe homonyme
+            group_name = self._unique_group_name(duplicate_groups, os.path.basename(file_paths[0]))
+            duplicate_groups[group_name] = file_paths
+        unique_files = groups['unique_files']
+        reclaimable_space = groups['reclaimable_space']
+        
+        # Liens physiques: plusieurs chemins, un seul fichier sur le disque (aucun espace à récupérer)
+        hardlink_groups = {}
+        for file_paths in groups['hardlink_groups']:
+            group_name = self._unique_group_name(hardlink_groups, os.path.basename(file_paths[0]))
+            hardlink_groups[group_name] = file_paths
+        
+        # Quasi-doublons: signatures MinHash d'un fichier par contenu distinct, candidats par LSH
+        near_duplicate_clusters = None
+        if near_duplicates:
+            log(f"🪞 Recherche des fichiers similaires parmi {len(distinct_contents):,} contenus distincts "
+                             f"(≥ {near_duplicates['threshold']:.0%}, {format_size(near_duplicates['max_bytes'])} "
+                             f"lus au plus par fichier)...")
+            
+            def signing_progress(signed_files):
+                progress(90 + int(signed_files / max(len(distinct_contents), 1) * 9))
+                if signed_files % 1000 == 0:
+                    log(f"🪞 Signatures: {signed_files:,}/{len(distinct_contents):,}")
+            
+            near_duplicate_clusters = find_near_duplicates(distinct_contents, near_duplicates['threshold'],
+                                                           near_duplicates['max_bytes'], throttle=self.io_throttle,
+                                                           progress_callback=signing_progress)
         
         # Finaliser la barre de progression
-        self.update_progress_bar(100)
+        progress(100)
         
         if error_files > 0:
-            self.log_message(f"⚠️ Total: {error_files} fichiers non traités à cause d'erreurs", 'warning')
+            log(f"⚠️ Total: {error_files} fichiers non traités à cause d'erreurs", 'warning')
         
         return {
             'total_files': processed_files,
             'unique_files': unique_files,
             'duplicate_groups': duplicate_groups,
             'total_duplicate_files': sum(len(group) for group in duplicate_groups.values()),
+            'hardlink_groups': hardlink_groups,
+            'hardlinked_files': sum(len(group) for group in hardlink_groups.values()),
+            'reclaimable_space': reclaimable_space,
             'error_files': error_files,
-            'skipped_files': skipped_files
+            'skipped_files': skipped_files,
+            'filters': scan_filter.to_dict(),
+            'memory_budget': dict(spill_info, budget=memory_budget) if memory_budget else None,
+            'near_duplicates': dict(near_duplicate_clusters, **near_duplicates) if near_duplicates else None
         }
 
+    def _unique_group_name(self, groups, name):
+        """
+        Nom de groupe unique: deux groupes de même nom de fichier reçoivent un suffixe numéroté.
+        """
+        group_name = name
+        index = 2
+        while group_name in groups:
+            group_name = f"{name} ({index})"
+            index += 1
+        return group_name
+
     def _calculate_file_hash(self, file_path):
         """
         Calculer le hachage SHA-256 d'un fichier.
@@ -1405,16 +3171,19 @@ class ArchiveComparerGUI:
                 return None
             
             with open(file_path, "rb") as f:
-                # Lire le fichier par blocs plus petits pour les gros fichiers
-                chunk_size = 8192  # 8KB chunks
+                # Lire le fichier par blocs (plus grands sous limitation, une opération comptée par lecture)
+                chunk_size = THROTTLED_HASH_READ_SIZE if self.io_throttle else HASH_READ_SIZE
                 while True:
-                    chunk = f.read(chunk_size)
+                    if self.io_throttle:
+                        read_start = time.perf_counter()
+                        chunk = f.read(chunk_size)
+                        if chunk:
+                            self.io_throttle.acquire(len(chunk), time.perf_counter() - read_start)
+                    else:
+                        chunk = f.read(chunk_size)
                     if not chunk:
                         break
                     hash_sha256.update(chunk)
-                    
-                    # Permettre l'interruption pour les très gros fichiers
-                    self.root.update_idletasks()
             
             return hash_sha256.hexdigest()
             
@@ -1423,7 +3192,7 @@ class ArchiveComparerGUI:
             return None
         except MemoryError:
             # Fichier trop gros pour la mémoire disponible
-            self.log_message(f"⚠️ Fichier trop volumineux pour la mémoire: {os.path.basename(file_path)}", 'warning')
+            self.duplicates_messages.put(('log', (f"⚠️ Fichier trop volumineux pour la mémoire: {os.path.basename(file_path)}", 'warning')))
             return None
         except KeyboardInterrupt:
             # Permettre l'interruption utilisateur
@@ -1432,6 +3201,16 @@ class ArchiveComparerGUI:
             # Toute autre erreur inattendue
             return None
 
+    def _calculate_large_file_hash_safe(self, file_path):
+        """
+        Calculer l'empreinte en arbre d'un très gros fichier en hachant ses blocs en parallèle.
+        """
+        file_hash = calculate_file_tree_hash(file_path, throttle=self.io_throttle)
+        if file_hash == "ERROR_READING_FILE":
+            return None
+        # Préfixe pour ne jamais confondre une empreinte en arbre avec un SHA-256 simple
+        return f"tree:{file_hash}"
+    
     def display_duplicates_results(self, report):
         """
         Afficher les résultats de détection des doublons dans un format d'arbre magnifiquement formaté.
@@ -1467,12 +3246,41 @@ class ArchiveComparerGUI:
                 for i, file_path in enumerate(file_paths, 1):
                     # Afficher le chemin de façon sécurisée pour tous les disques
                     display_path = self._get_display_path(file_path)
-                    self.log_message(f"  {i}. {display_path}", 'warning')
+                    self.log_message(f"  {i}. {display_path}", 'warning', path=file_path)
         else:
             self.log_message("\n✨ AUCUN DOUBLON DÉTECTÉ! Tous les fichiers sont uniques! ✨", 'success')
         
+        # Afficher les liens physiques: mêmes données sur le disque, rien à récupérer
+        if report.get('hardlink_groups'):
+            self.log_message(f"\n🔗 LIENS PHYSIQUES ({report['hardlinked_files']} chemins, aucun espace récupérable)", 'info')
+            self.log_message("─" * 50)
+            for group_name, file_paths in report['hardlink_groups'].items():
+                self.log_message(f"\n🔗 Inode: {group_name} ({len(file_paths)} chemins)", 'info')
+                for i, file_path in enumerate(file_paths, 1):
+                    self.log_message(f"  {i}. {self._get_display_path(file_path)}")
+        
+        # Afficher les quasi-doublons: contenus différents mais similaires
+        if report.get('near_duplicates'):
+            near_duplicates = report['near_duplicates']
+            self.log_message(f"\n🪞 FICHIERS SIMILAIRES ({len(near_duplicates['clusters'])} groupes, "
+                             f"similarité ≥ {near_duplicates['threshold']:.0%}, "
+                             f"{near_duplicates['candidate_pairs']:,} paires candidates comparées)", 'modified')
+            self.log_message("─" * 50)
+            if not near_duplicates['clusters']:
+                self.log_message("  (Aucun fichier similaire)", 'success')
+            for cluster in near_duplicates['clusters']:
+                self.log_message(f"\n🪞 {len(cluster['files'])} fichiers, similarité estimée ≥ "
+                                 f"{cluster['similarity']:.0%}", 'modified')
+                for i, file_path in enumerate(cluster['files'], 1):
+                    self.log_message(f"  {i}. {self._get_display_path(file_path)}", 'warning', path=file_path)
+            self.log_message("  (un seul chemin par groupe de doublons exacts)", 'info')
+        
         # Calcul de l'espace potentiellement économisable
-        if report['duplicate_groups']:
+        if 'reclaimable_space' in report:
+            if report['reclaimable_space'] > 0:
+                self.log_message(f"\n💾 Espace potentiellement économisable: {format_size(report['reclaimable_space'])}", 'info')
+        elif report['duplicate_groups']:
+            # Anciens rapports sans analyse des inodes
             total_wasted_space = 0
             for file_paths in report['duplicate_groups'].values():
                 if file_paths:
@@ -1538,13 +3346,22 @@ class ArchiveComparerGUI:
 #### functions
 def main():
     """ 
-        main function - launches GUI
+        main function - launches GUI, or a shard worker with --shard-worker
     """
+    if '--shard-worker' in sys.argv[1:]:
+        run_shard_worker(sys.argv[1:])
+        return
     root = tk.Tk()
     app = ArchiveComparerGUI(root)
     root.mainloop()
 
-def compare_archives_with_progress(extracted_path, reference_path, progress_callback=None):
+def compare_archives_with_progress(extracted_path, reference_path, progress_callback=None, stats_callback=None,
+                                   io_order=None, cache_hints=False, throttle=None, low_priority=False,
+                                   large_file_threshold=None, tree_chunk_size=None, hash_workers=None,
+                                   sample_confidence=None, sample_margin=0.01, sample_strategy='stratified',
+                                   sample_seed=None, scan_filter=None, inode_aware=True, content_matching=False,
+                                   scan_workers=None, shard=None, memory_budget=None, result_callback=None,
+                                   chunk_analysis=False, scope=None):
     """
         Compare the contents of an archive with a reference directory with progress updates.
         
@@ -1552,78 +3369,187 @@ def compare_archives_with_progress(extracted_path, reference_path, progress_call
         - extracted_path: Path to the extracted archive directory.
         - reference_path: Path to the reference directory.
         - progress_callback: Function to call for progress updates.
+        - stats_callback: Function called with a live statistics snapshot (throughput, ETA) while hashing.
+        - io_order: None to hash in arbitrary order, 'inode' or 'extent' to hash common files
+          in on-disk order (see order_paths_for_io).
+        - cache_hints: Advise the kernel of sequential reads and drop the hashed pages from the
+          page cache afterwards (posix_fadvise, ignored where unavailable).
+        - throttle: Optional IOThrottle capping the read bandwidth / IOPS of the hash pass.
+        - low_priority: Lower the CPU and I/O priority of the calling thread (see set_low_priority).
+        - large_file_threshold: Size in bytes from which a file is hashed in parallel chunks with
+          calculate_file_tree_hash (None = always hash sequentially). The digests of such files
+          are tree digests and are flagged with 'hash_type' in the report.
+        - tree_chunk_size: Chunk size of the tree digests (default: TREE_HASH_CHUNK_SIZE).
+        - hash_workers: Number of threads hashing the chunks of one large file (default: CPU count).
+        - sample_confidence: When set (e.g. 0.95), only a sample of the common files is
+          content-verified; its size is derived from this confidence level and sample_margin.
+          The report then carries a 'sampling' block with the estimated modification rate.
+        - sample_margin: Target margin of error of the estimated modification rate.
+        - sample_strategy: 'stratified' (by size band and top-level directory) or 'random'.
+        - sample_seed: Seed of the random selection, for reproducible samples.
+        - scan_filter: Optional ScanFilter applied to both trees while they are walked;
+          its rules are recorded under 'filters' in the report.
+        - inode_aware: Treat reference/extracted files sharing the same (st_dev, st_ino) as
+          identical without reading them, and hash each hardlinked inode only once.
+        - content_matching: Look for the content of missing/extra files anywhere in the
+          other tree (see find_content_matches); recorded under 'content_matches'.
+        - scan_workers: Number of threads listing directories (see scan_directory_tree),
+          SCAN_WORKERS by default; the two trees are also scanned at the same time when they are on different devices.
+        - shard: Optional dict restricting the comparison to one part of the path space,
+          either {'top_level': [root entry names]} or {'hash_range': [index, count]}
+          (see plan_shards); used by the shard workers of compare_archives_sharded.
+        - memory_budget: Optional memory budget in bytes for the scan and diff state. The
+          path lists are then sorted in runs spilled to disk and the two trees are
+          compared by external merge (see _compare_trees_bounded); only the differences
+          are kept in memory. Incompatible with sampling.
+        - result_callback: Function called with (kind, payload) as soon as findings are
+          known, before the run ends: ('differences', dict with the new missing/extra
+          files and directories) once the lists are compared (in several calls with a
+          memory budget), then ('modified', entry) for each modified file.
+        - chunk_analysis: Compare each modified file with its reference by content-defined
+          chunks (see analyze_chunk_delta): the entry gets a 'delta' block with the shared
+          percentage, the estimated delta size and the changed byte ranges, and the report
+          a 'chunk_analysis' block with the totals.
+        - scope: Optional ScanScope or list of relative subpaths / glob patterns: only
+          these subtrees are scanned, diffed and hashed (see ScanScope). Recorded under
+          'scope'; merge_reports folds such a report into a full one.
         
         Returns:
-        - A report of missing, extra, and modified files along with directories.
+        - A report of missing, extra, and modified files along with directories,
+          plus a 'stats' entry holding the per-phase counters.
     """
+    stats = ComparisonStats()
+    started_at = datetime.datetime.now()
+    
     def update_progress(message):
         if progress_callback:
             progress_callback(message)
     
-    # Get the list of files and directories in the extracted archive and reference directory
-    update_progress("Scanning reference directory...")
-    reference_files = get_file_list(reference_path)
-    reference_dirs = get_directory_list(reference_path)
+    if low_priority:
+        applied = set_low_priority()
+        update_progress(f"🐢 Low priority mode: {', '.join(applied) if applied else 'not supported on this system'}")
     
-    update_progress("Scanning extracted directory...")
-    extracted_files = get_file_list(extracted_path)
-    extracted_dirs = get_directory_list(extracted_path)
+    scan_workers = scan_workers or SCAN_WORKERS
+    top_level = set(shard['top_level']) if shard and shard.get('top_level') is not None else None
+    if scope is not None and not isinstance(scope, ScanScope):
+        scope = ScanScope.from_list(scope, ignore_case=scan_filter.ignore_case if scan_filter else False)
+    verifier = FileVerifier(extracted_path, reference_path, stats=stats, throttle=throttle, cache_hints=cache_hints,
+                            large_file_threshold=large_file_threshold, tree_chunk_size=tree_chunk_size,
+                            hash_workers=hash_workers, inode_aware=inode_aware, chunk_analysis=chunk_analysis)
+    spill_info = None
+    if memory_budget:
+        if sample_confidence:
+            raise ValueError("Sampling needs the full list of common files and cannot run with a memory budget")
+        # Bounded memory: sorted runs on disk, merged while the common files are verified
+        spill_info = {'runs': 0, 'records_spilled': 0}
+        (missing_files, extra_files, missing_dirs, extra_dirs,
+         modified_files, num_verified) = _compare_trees_bounded(extracted_path, reference_path, verifier, stats,
+                                                                records_for_memory_budget(memory_budget), spill_info,
+                                                                scan_filter, top_level, shard, io_order,
+                                                                update_progress, stats_callback, result_callback, scope)
+        sample_strata = None
+    else:
+        # Get the list of files and directories in the extracted archive and reference directory
+        stats.start_phase('scan')
+        if get_device_id(reference_path) != get_device_id(extracted_path):
+            # Different devices: the two walks don't compete for the same disk or share
+            update_progress("Scanning reference directory...")
+            update_progress("Scanning extracted directory (concurrently, different device)...")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                reference_scan = executor.submit(scan_directory_tree, reference_path, scan_filter, scan_workers, top_level,
+                                                 scope)
+                extracted_scan = executor.submit(scan_directory_tree, extracted_path, scan_filter, scan_workers, top_level,
+                                                 scope)
+                reference_files, reference_dirs = reference_scan.result()
+                extracted_files, extracted_dirs = extracted_scan.result()
+        else:
+            update_progress("Scanning reference directory...")
+            reference_files, reference_dirs = scan_directory_tree(reference_path, scan_filter, scan_workers, top_level,
+                                                                  scope)
+        
+            update_progress("Scanning extracted directory...")
+            extracted_files, extracted_dirs = scan_directory_tree(extracted_path, scan_filter, scan_workers, top_level,
+                                                                  scope)
+        if shard and shard.get('hash_range'):
+            # Keep only the paths of this hash range
+            index, count = shard['hash_range']
+            reference_files, reference_dirs, extracted_files, extracted_dirs = (
+                {path for path in paths if shard_of_path(path, count) == index}
+                for paths in (reference_files, reference_dirs, extracted_files, extracted_dirs))
+        stats.add_files(len(reference_files) + len(extracted_files))
 
-    # Compare the file lists
-    update_progress("Comparing file lists...")
-    missing_files = reference_files - extracted_files
-    extra_files = extracted_files - reference_files
-    common_files = reference_files & extracted_files
-    
-    # Compare the directory lists
-    missing_dirs = reference_dirs - extracted_dirs
-    extra_dirs = extracted_dirs - reference_dirs
-    
-    # Check integrity of common files
-    update_progress(f"🔐 Checking integrity of {len(common_files)} common files...")
-    modified_files = []
+        # Compare the file lists
+        stats.start_phase('diff')
+        update_progress("Comparing file lists...")
+        missing_files = reference_files - extracted_files
+        extra_files = extracted_files - reference_files
+        common_files = reference_files & extracted_files
+        
+        # Compare the directory lists
+        missing_dirs = reference_dirs - extracted_dirs
+        extra_dirs = extracted_dirs - reference_dirs
+        stats.add_files(len(reference_files) + len(extracted_files))
+        if result_callback:
+            # First findings, long before the hash pass ends
+            result_callback('differences', {
+                "missing_files": sorted(missing_files),
+                "extra_files": sorted(extra_files),
+                "missing_directories": sorted(missing_dirs),
+                "extra_directories": sorted(extra_dirs)
+            })
+        
+        # Check integrity of common files
+        stats.start_phase('hash')
+        files_to_verify = common_files
+        sample_strata = None
+        if sample_confidence:
+            # Content-verify only a statistically sized sample of the common files
+            sample_size = sample_size_for_confidence(len(common_files), sample_confidence, sample_margin)
+            update_progress(f"🎲 Selecting a {sample_strategy} sample of {sample_size:,}/{len(common_files):,} common files...")
+            files_to_verify, sample_strata = select_verification_sample(reference_path, common_files, sample_size,
+                                                                        sample_strategy, sample_seed)
+        if io_order:
+            # Read the files in on-disk order of the reference tree to avoid seeks
+            update_progress(f"💽 Ordering {len(files_to_verify):,} files by physical position ({io_order})...")
+            files_to_verify = order_paths_for_io(reference_path, files_to_verify, io_order)
+        update_progress(f"🔐 Checking integrity of {len(files_to_verify)} common files...")
+        modified_files = []
+        
+        # Batch progress updates for better performance with large datasets
+        batch_size = max(1, len(files_to_verify) // 100)  # Update progress every 1% of files
+        if batch_size < 50:
+            batch_size = 50  # Minimum batch size for performance
+        
+        for i, file_path in enumerate(files_to_verify):
+            if i % batch_size == 0:  # Update progress in batches
+                progress_pct = int((i / len(files_to_verify)) * 100)
+                snapshot = stats.snapshot(i, len(files_to_verify))
+                update_progress(f"🔐 Checking file integrity... {i + 1:,}/{len(files_to_verify):,} ({progress_pct}%) - "
+                                f"{format_size(snapshot['bytes_per_second'])}/s, ETA {format_duration(snapshot['eta_seconds'])}")
+                if stats_callback:
+                    stats_callback(snapshot)
+        
+            modified_entry = verifier.verify(file_path)
+            if modified_entry:
+                modified_files.append(modified_entry)
+                if result_callback:
+                    result_callback('modified', modified_entry)
+            stats.add_files()
+        
+        if stats_callback and files_to_verify:
+            stats_callback(stats.snapshot(len(files_to_verify), len(files_to_verify)))
+        num_verified = len(files_to_verify)
+        
+    content_matches = None
+    if content_matching and (missing_files or extra_files):
+        stats.start_phase('match')
+        update_progress(f"🧭 Locating the content of {len(missing_files):,} missing and {len(extra_files):,} extra files...")
+        content_matches = find_content_matches(extracted_path, reference_path, sorted(missing_files),
+                                               sorted(extra_files), verifier=verifier, scan_filter=scan_filter,
+                                               progress_callback=update_progress)
     
-    # Batch progress updates for better performance with large datasets
-    batch_size = max(1, len(common_files) // 100)  # Update progress every 1% of files
-    if batch_size < 50:
-        batch_size = 50  # Minimum batch size for performance
-    
-    for i, file_path in enumerate(common_files):
-        if i % batch_size == 0:  # Update progress in batches
-            progress_pct = int((i / len(common_files)) * 100)
-            update_progress(f"🔐 Checking file integrity... {i + 1:,}/{len(common_files):,} ({progress_pct}%)")
-        
-        ref_file_path = os.path.join(reference_path, file_path.replace('/', os.sep))
-        ext_file_path = os.path.join(extracted_path, file_path.replace('/', os.sep))
-        
-        try:
-            ref_hash = calculate_file_hash(ref_file_path)
-            ext_hash = calculate_file_hash(ext_file_path)
-            
-            if ref_hash != ext_hash:
-                # Files are different
-                ref_size = os.path.getsize(ref_file_path)
-                ext_size = os.path.getsize(ext_file_path)
-                
-                modified_files.append({
-                    'file': file_path,
-                    'hash_ref': ref_hash,
-                    'hash_ext': ext_hash,
-                    'size_ref': ref_size,
-                    'size_ext': ext_size
-                })
-        except (OSError, IOError) as e:
-            # Handle file access errors
-            modified_files.append({
-                'file': file_path,
-                'error': str(e),
-                'hash_ref': 'ERROR',
-                'hash_ext': 'ERROR',
-                'size_ref': 0,
-                'size_ext': 0
-            })
-    
-    update_progress("Generating final report...")
+    stats.start_phase('report')
+    update_progress("Generating final report...")
     
     # Generate report
     report = {
@@ -1637,113 +3563,5150 @@ def compare_archives_with_progress(extracted_path, reference_path, progress_call
         "num_modified": len(modified_files),
         "num_missing_dirs": len(missing_dirs),
         "num_extra_dirs": len(extra_dirs),
-        "num_common": len(common_files) - len(modified_files)  # Files that are identical
+        "num_common": num_verified - len(modified_files),  # Files that are identical
+        "timestamp": str(started_at)
     }
+    if scan_filter:
+        report["filters"] = scan_filter.to_dict()
+    if sample_strata is not None:
+        report["sampling"] = estimate_modification_rate(sample_strata, {entry['file'] for entry in modified_files},
+                                                        len(common_files), sample_confidence)
+        report["sampling"].update({
+            "strategy": sample_strategy,
+            "target_margin": sample_margin,
+            "seed": sample_seed
+        })
+    if large_file_threshold is not None:
+        report["hashing"] = verifier.hashing_info()
+    if inode_aware:
+        report["inode_dedup"] = verifier.inode_info()
+    if chunk_analysis:
+        report["chunk_analysis"] = verifier.chunk_info()
+    if content_matches is not None:
+        report["content_matches"] = content_matches
+    if shard:
+        report["shard"] = shard
+    if scope:
+        report["scope"] = scope.to_list()
+    if spill_info is not None:
+        report["memory_budget"] = dict(spill_info, budget=memory_budget,
+                                       max_records=records_for_memory_budget(memory_budget))
+    stats.end_phase()
+    report["stats"] = stats.to_dict()
+    if throttle:
+        report["throttling"] = throttle.to_dict()
     
     return report
 
-def compare_archives(extracted_path, reference_path):
+BOUNDED_VERIFY_BATCH = 10000  # common files verified (and ordered for I/O) per batch during the external merge
+
+def _compare_trees_bounded(extracted_path, reference_path, verifier, stats, max_records, spill_info,
+                           scan_filter=None, top_level=None, shard=None, io_order=None,
+                           progress_callback=None, stats_callback=None, result_callback=None, scope=None):
+    """
+        Memory-bounded scan, diff and verification of compare_archives_with_progress.
+        
+        Each tree is walked into sorted runs of at most max_records / 2 records spilled
+        to disk, then the two sorted streams are merged side by side: the paths found on
+        one side only are differences, the common files are verified in batches (in I/O
+        order within a batch when io_order is set). The differences found since the
+        previous batch are passed to result_callback before each batch is verified.
+        
+        Returns:
+        - A tuple (missing files, extra files, missing directories, extra directories,
+          modified entries, number of verified files).
+    """
+    def update_progress(message):
+        if progress_callback:
+            progress_callback(message)
+    
+    hash_range = shard.get('hash_range') if shard else None
+    run_size = max(MIN_BUDGET_RECORDS, max_records // 2)
+    stats.start_phase('scan')
+    update_progress("Scanning reference directory...")
+    reference_records, reference_count = sorted_tree_records(reference_path, scan_filter, run_size, top_level,
+                                                             hash_range, spill_info, scope)
+    update_progress("Scanning extracted directory...")
+    extracted_records, extracted_count = sorted_tree_records(extracted_path, scan_filter, run_size, top_level,
+                                                             hash_range, spill_info, scope)
+    stats.add_files(reference_count + extracted_count)
+    if spill_info['runs']:
+        update_progress(f"💾 {spill_info['records_spilled']:,} scan records spilled to {spill_info['runs']} sorted runs on disk")
+    
+    missing_files, extra_files, missing_dirs, extra_dirs, modified_files = [], [], [], [], []
+    reported = [0, 0, 0, 0]  # differences already passed to result_callback, per list
+    batch = []
+    verified = 0
+    expected = min(reference_count, extracted_count)  # upper bound of the number of common files
+    progress_every = max(50, expected // 100)
+    
+    def report_differences():
+        lists = (missing_files, extra_files, missing_dirs, extra_dirs)
+        if not result_callback or all(len(paths) == count for paths, count in zip(lists, reported)):
+            return
+        result_callback('differences', {
+            "missing_files": missing_files[reported[0]:],
+            "extra_files": extra_files[reported[1]:],
+            "missing_directories": missing_dirs[reported[2]:],
+            "extra_directories": extra_dirs[reported[3]:]
+        })
+        reported[:] = [len(paths) for paths in lists]
+    
+    def verify_batch():
+        nonlocal verified
+        report_differences()
+        stats.start_phase('hash')
+        for file_path in (order_paths_for_io(reference_path, batch, io_order) if io_order else batch):
+            if verified % progress_every == 0:
+                snapshot = stats.snapshot(verified, expected)
+                update_progress(f"🔐 Checking file integrity... {verified + 1:,}/≤{expected:,} - "
+                                f"{format_size(snapshot['bytes_per_second'])}/s")
+                if stats_callback:
+                    stats_callback(snapshot)
+            modified_entry = verifier.verify(file_path)
+            if modified_entry:
+                modified_files.append(modified_entry)
+                if result_callback:
+                    result_callback('modified', modified_entry)
+            verified += 1
+            stats.add_files()
+        batch.clear()
+        stats.start_phase('diff')
+    
+    stats.start_phase('diff')
+    update_progress("Comparing file lists (external merge)...")
+    for reference_record, extracted_record in merge_join_sorted(reference_records, extracted_records,
+                                                                key=lambda record: (record[0], record[1])):
+        if extracted_record is None:
+            (missing_dirs if reference_record[1] == 'd' else missing_files).append(reference_record[0])
+        elif reference_record is None:
+            (extra_dirs if extracted_record[1] == 'd' else extra_files).append(extracted_record[0])
+        elif reference_record[1] == 'f':
+            batch.append(reference_record[0])
+            if len(batch) >= min(BOUNDED_VERIFY_BATCH, run_size):
+                verify_batch()
+    if batch:
+        verify_batch()
+    report_differences()
+    stats.add_files(reference_count + extracted_count)
+    
+    if stats_callback and verified:
+        stats_callback(stats.snapshot(verified, verified))
+    return missing_files, extra_files, missing_dirs, extra_dirs, modified_files, verified
+
+def compare_archives(extracted_path, reference_path, profile_path=None):
     """
         Compare the contents of an archive with a reference directory.
         
         Parameters:
         - extracted_path: Path to the extracted archive directory.
         - reference_path: Path to the reference directory.
+        - profile_path: Optional path of the exported JSON report; when set, the run is
+          profiled and the .prof / memory report files are written next to it.
 
         Returns:
         - A report of missing, extra, and modified files along with directories.
     """
+    if profile_path:
+        report, artifacts = run_with_profiling(profile_path, compare_archives_with_progress,
+                                               extracted_path, reference_path)
+        report['profiling'] = artifacts
+        return report
     return compare_archives_with_progress(extracted_path, reference_path)
 
-def calculate_file_hash(file_path, hash_algorithm='sha256'):
+def run_with_profiling(output_path, func, *args, top_n=25, **kwargs):
     """
-        Calculate the hash of a file.
+        Run a function under cProfile and tracemalloc and dump the results to disk.
         
         Parameters:
-        - file_path: Path to the file.
-        - hash_algorithm: Hash algorithm to use (default: sha256).
-        
+        - output_path: Path of the exported report; the artifacts share its base name
+          ('<base>.prof' for cProfile, '<base>.mem.txt' for the memory report).
+        - func: Function to profile, called with *args and **kwargs.
+        - top_n: Number of allocation sites and functions listed in the memory report.
+
         Returns:
-        - The hexadecimal hash string of the file.
+        - A tuple (result of func, dict with the paths of the written artifacts).
     """
-    hash_obj = hashlib.new(hash_algorithm)
+    base_path = os.path.splitext(output_path)[0]
+    prof_path = base_path + ".prof"
+    memory_path = base_path + ".mem.txt"
     
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
     try:
-        with open(file_path, 'rb') as f:
-            # Read file in chunks to handle large files efficiently
-            for chunk in iter(lambda: f.read(8192), b""):
-                hash_obj.update(chunk)
-    except (OSError, IOError):
-        # Return a special hash for files that can't be read
-        return "ERROR_READING_FILE"
+        result = profiler.runcall(func, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        
+        profiler.dump_stats(prof_path)
+        with open(memory_path, 'w', encoding='utf-8') as f:
+            f.write(f"Profiled call: {getattr(func, '__name__', repr(func))}\n")
+            f.write(f"Wall time: {elapsed:.3f}s\n")
+            f.write(f"Traced memory: current {format_size(current)}, peak {format_size(peak)}\n\n")
+            f.write(f"Top {top_n} allocation sites:\n")
+            for statistic in snapshot.statistics('lineno')[:top_n]:
+                f.write(f"  {statistic}\n")
+            f.write(f"\nTop {top_n} functions by cumulative time:\n")
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(top_n)
     
-    return hash_obj.hexdigest()
+    return result, {
+        'profile': prof_path,
+        'memory_report': memory_path,
+        'wall_time': round(elapsed, 3),
+        'peak_memory': peak
+    }
 
-def get_directory_list(directory):
+class FileVerifier:
     """
-        Get a set of all directory paths in the given directory and its subdirectories.
+        Content verification of common files, one relative path at a time.
+        
+        Holds the hashing options shared by the comparison modes (throttle, fadvise,
+        tree digests of large files) and an inode-keyed digest cache: two paths that
+        are the same physical file (same st_dev and st_ino, e.g. trees snapshotted with
+        'cp -al') are identical without being read, and a hardlinked inode is hashed once.
+        With chunk_analysis, the modified files are also compared chunk by chunk
+        (see analyze_chunk_delta) and their entry gets a 'delta' block.
+    """
+
+    def __init__(self, extracted_path, reference_path, stats=None, throttle=None, cache_hints=False,
+                 large_file_threshold=None, tree_chunk_size=None, hash_workers=None, inode_aware=True,
+                 chunk_analysis=False):
+        self.extracted_path = extracted_path
+        self.reference_path = reference_path
+        self.stats = stats
+        self.throttle = throttle
+        self.cache_hints = cache_hints
+        self.large_file_threshold = large_file_threshold
+        self.tree_chunk_size = tree_chunk_size or TREE_HASH_CHUNK_SIZE
+        self.hash_workers = hash_workers
+        self.inode_aware = inode_aware
+        self.chunk_analysis = chunk_analysis
+        self.chunk_analyzed_files = 0
+        self.chunk_shared_bytes = 0
+        self.chunk_delta_bytes = 0
+        self.tree_hashed_files = 0
+        self.shared_inode_pairs = 0
+        self.hash_cache_hits = 0
+        self._inode_hashes = {}  # (st_dev, st_ino, tree) -> digest, only for hardlinked inodes
+        self._lock = threading.Lock()
+
+    def hash_file(self, file_path, st, use_tree):
+        """
+            Hash one file, reusing the digest of an already hashed hardlink of the same inode.
+        """
+        key = None
+        if self.inode_aware and st.st_ino and st.st_nlink > 1:
+            key = (st.st_dev, st.st_ino, use_tree)
+            with self._lock:
+                if key in self._inode_hashes:
+                    self.hash_cache_hits += 1
+                    if self.stats:
+                        self.stats.add_cache_hit()
+                    return self._inode_hashes[key]
+        
+        if use_tree:
+            digest = calculate_file_tree_hash(file_path, chunk_size=self.tree_chunk_size, max_workers=self.hash_workers,
+                                              stats=self.stats, throttle=self.throttle, cache_hints=self.cache_hints)
+        else:
+            digest = calculate_file_hash(file_path, stats=self.stats, cache_hints=self.cache_hints,
+                                         throttle=self.throttle)
+        if key and digest != "ERROR_READING_FILE":
+            with self._lock:
+                self._inode_hashes[key] = digest
+        return digest
+
+    def verify(self, relative_path):
+        """
+            Compare the reference and extracted copies of a common file.
+            
+            Parameters:
+            - relative_path: '/' separated path present in both trees.
+
+            Returns:
+            - None when both copies are identical, otherwise the modified entry of the report.
+        """
+        ref_file_path = os.path.join(self.reference_path, relative_path.replace('/', os.sep))
+        ext_file_path = os.path.join(self.extracted_path, relative_path.replace('/', os.sep))
+        
+        try:
+            ref_st = os.stat(ref_file_path)
+            ext_st = os.stat(ext_file_path)
+            
+            if self.inode_aware and ref_st.st_ino and (ref_st.st_dev, ref_st.st_ino) == (ext_st.st_dev, ext_st.st_ino):
+                # Same physical file in both trees: identical by construction
+                with self._lock:
+                    self.shared_inode_pairs += 1
+                if self.stats:
+                    self.stats.add_cache_hit()
+                return None
+            
+            use_tree = self.large_file_threshold is not None and ref_st.st_size >= self.large_file_threshold
+            if use_tree:
+                # Very large file: hash fixed-size chunks in parallel on both sides
+                with self._lock:
+                    self.tree_hashed_files += 1
+            ref_hash = self.hash_file(ref_file_path, ref_st, use_tree)
+            ext_hash = self.hash_file(ext_file_path, ext_st, use_tree)
+            
+            if ref_hash != ext_hash:
+                # Files are different
+                modified_entry = {
+                    'file': relative_path,
+                    'hash_ref': ref_hash,
+                    'hash_ext': ext_hash,
+                    'size_ref': ref_st.st_size,
+                    'size_ext': ext_st.st_size
+                }
+                if use_tree:
+                    modified_entry['hash_type'] = f"tree-sha256/{self.tree_chunk_size}"
+                if self.chunk_analysis:
+                    modified_entry['delta'] = self.analyze_delta(ref_file_path, ext_file_path)
+                return modified_entry
+        except (OSError, IOError) as e:
+            # Handle file access errors
+            if self.stats:
+                self.stats.add_error()
+            return {
+                'file': relative_path,
+                'error': str(e),
+                'hash_ref': 'ERROR',
+                'hash_ext': 'ERROR',
+                'size_ref': 0,
+                'size_ext': 0
+            }
+        return None
+
+    def analyze_delta(self, ref_file_path, ext_file_path):
+        """
+            Chunk analysis of a modified pair, counted in the chunk_info totals.
+        """
+        try:
+            delta = analyze_chunk_delta(ref_file_path, ext_file_path, stats=self.stats, throttle=self.throttle)
+        except (OSError, IOError) as e:
+            if self.stats:
+                self.stats.add_error()
+            return {'error': str(e)}
+        with self._lock:
+            self.chunk_analyzed_files += 1
+            self.chunk_shared_bytes += delta['shared_bytes']
+            self.chunk_delta_bytes += delta['delta_bytes']
+        return delta
+
+    def chunk_info(self):
+        return {
+            "analyzed_files": self.chunk_analyzed_files,
+            "shared_bytes": self.chunk_shared_bytes,
+            "delta_bytes": self.chunk_delta_bytes
+        }
+
+    def hashing_info(self):
+        return {
+            "algorithm": "sha256",
+            "large_file_threshold": self.large_file_threshold,
+            "tree_chunk_size": self.tree_chunk_size,
+            "tree_hashed_files": self.tree_hashed_files
+        }
+
+    def inode_info(self):
+        return {
+            "shared_inode_pairs": self.shared_inode_pairs,
+            "hash_cache_hits": self.hash_cache_hits
+        }
+
+def sample_size_for_confidence(population, confidence=0.95, margin=0.01, expected_rate=0.5):
+    """
+        Compute the sample size needed to estimate a proportion (Cochran's formula with
+        finite population correction).
         
         Parameters:
-        - directory: Path to the directory.
+        - population: Number of files the sample is drawn from.
+        - confidence: Confidence level of the estimate (e.g. 0.95).
+        - margin: Accepted margin of error on the proportion (e.g. 0.01 for ±1%).
+        - expected_rate: Expected proportion; 0.5 gives the most conservative size.
 
         Returns:
-        - A set of directory paths relative to the given directory.
+        - The number of files to verify (at most the population).
     """
-    dir_set = set()
-    for root, dirs, _ in os.walk(directory):
-        for dir_name in dirs:
-            try:
-                relative_path = os.path.relpath(os.path.join(root, dir_name), directory)
-                # Normalize path separators
-                relative_path = relative_path.replace('\\', '/')
-                dir_set.add(relative_path)
-            except ValueError:
-                # Handle different drives on Windows
-                full_path = os.path.join(root, dir_name)
-                # Use path relative to the directory's drive
-                try:
-                    # Remove the directory prefix manually if on same drive
-                    if full_path.startswith(directory):
-                        relative_path = full_path[len(directory):].lstrip('\\/')
-                        relative_path = relative_path.replace('\\', '/')
-                        dir_set.add(relative_path)
-                except:
-                    # If all else fails, use basename
-                    dir_set.add(os.path.basename(full_path))
-    return dir_set
+    if population <= 0:
+        return 0
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    n0 = z * z * expected_rate * (1 - expected_rate) / (margin * margin)
+    n = n0 / (1 + (n0 - 1) / population)
+    return min(population, max(1, math.ceil(n)))
 
-def get_file_list(directory):
+def get_size_band(file_size):
     """
-        Get a set of all file paths in the given directory and its subdirectories.
+        Classify a file size into a band used as sampling stratum.
+
+        Returns:
+        - A label such as '<64KB' or '>=256MB'.
+    """
+    for limit, label in ((64 * 1024, '<64KB'), (1024 * 1024, '<1MB'),
+                         (16 * 1024 * 1024, '<16MB'), (256 * 1024 * 1024, '<256MB')):
+        if file_size < limit:
+            return label
+    return '>=256MB'
+
+def select_verification_sample(reference_path, common_files, sample_size, strategy='stratified', seed=None):
+    """
+        Select the common files that will be content-verified in sampling mode.
+        
+        The stratified strategy groups files by size band and top-level directory, gives
+        one file to each group and allocates the rest of the sample proportionally to
+        each group (largest remainder), so that small and large files and every
+        department folder are represented. When there are more groups than files to
+        select, the smallest groups are pooled into a single stratum.
         
         Parameters:
-        - directory: Path to the directory.
+        - reference_path: Path to the reference directory (used to stat the files).
+        - common_files: Iterable of relative paths present on both sides.
+        - sample_size: Number of files to select.
+        - strategy: 'stratified' or 'random'.
+        - seed: Seed of the random generator.
 
         Returns:
-        - A set of file paths relative to the given directory.
+        - A tuple (selected paths, dict stratum -> {'population': N_h, 'sample': [paths]}).
     """
-    file_set = set()
-    for root, _, files in os.walk(directory):
-        for file in files:
+    rng = random.Random(seed)
+    population = sorted(common_files)  # Sorted so that a seed gives a reproducible sample
+    
+    if strategy == 'random':
+        selected = rng.sample(population, min(sample_size, len(population)))
+        return selected, {'all': {'population': len(population), 'sample': selected}}
+    
+    groups = {}
+    for relative_path in population:
+        try:
+            band = get_size_band(os.path.getsize(os.path.join(reference_path, relative_path.replace('/', os.sep))))
+        except OSError:
+            band = 'unknown'
+        top_dir = relative_path.split('/', 1)[0] if '/' in relative_path else '.'
+        groups.setdefault((top_dir, band), []).append(relative_path)
+    
+    # Every stratum needs at least one sampled file, otherwise its files are not estimated
+    if population and len(groups) > sample_size:
+        by_size = sorted(groups, key=lambda k: len(groups[k]), reverse=True)
+        pooled = [path for key in by_size[max(0, sample_size - 1):] for path in groups.pop(key)]
+        groups[('*', 'autres')] = pooled
+    
+    # One file per stratum, then proportional allocation with largest remainder rounding
+    spare = max(0, sample_size - len(groups))
+    quotas = {key: spare * len(paths) / len(population) for key, paths in groups.items()}
+    allocation = {key: 1 + int(quota) for key, quota in quotas.items()}
+    remaining = sample_size - sum(allocation.values())
+    while remaining > 0:
+        open_keys = [key for key in quotas if allocation[key] < len(groups[key])]
+        if not open_keys:
+            break
+        for key in sorted(open_keys, key=lambda k: quotas[k] - allocation[k], reverse=True)[:remaining]:
+            allocation[key] += 1
+            remaining -= 1
+    
+    selected = []
+    strata = {}
+    for key, paths in groups.items():
+        stratum_sample = rng.sample(paths, min(allocation[key], len(paths)))
+        selected.extend(stratum_sample)
+        strata[f"{key[0]} | {key[1]}"] = {'population': len(paths), 'sample': stratum_sample}
+    return selected, strata
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """
+        Wilson score confidence interval of a proportion.
+
+        Returns:
+        - A tuple (lower bound, upper bound), (0.0, 1.0) when there are no trials.
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+def estimate_modification_rate(strata, modified_paths, population, confidence=0.95):
+    """
+        Estimate the modification rate of all common files from a verified sample.
+        
+        Parameters:
+        - strata: Strata returned by select_verification_sample.
+        - modified_paths: Set of sampled paths found modified (or unreadable).
+        - population: Total number of common files.
+        - confidence: Confidence level of the bounds.
+
+        Returns:
+        - A dict with the sample size, the stratified rate estimate, its Wilson bounds
+          and the corresponding estimated number of modified files.
+    """
+    sample_size = sum(len(stratum['sample']) for stratum in strata.values())
+    modified_in_sample = sum(1 for stratum in strata.values() for path in stratum['sample'] if path in modified_paths)
+    
+    # Stratified estimator: each sampled stratum weighs by its share of the sampled strata
+    # population, so that a stratum without sample does not count as unmodified
+    sampled_strata = [stratum for stratum in strata.values() if stratum['sample']]
+    covered = sum(stratum['population'] for stratum in sampled_strata)
+    rate = 0.0
+    variance = 0.0
+    for stratum in sampled_strata:
+        weight = stratum['population'] / covered
+        stratum_size = len(stratum['sample'])
+        stratum_rate = sum(1 for path in stratum['sample'] if path in modified_paths) / stratum_size
+        rate += weight * stratum_rate
+        variance += (weight * weight * stratum_rate * (1 - stratum_rate) / stratum_size
+                     * (1 - stratum_size / stratum['population']))
+    
+    # Wilson bounds on the stratified estimate, using the effective sample size of its variance
+    effective_size = rate * (1 - rate) / variance if variance > 0 else sample_size
+    lower, upper = wilson_interval(rate * effective_size, effective_size, confidence)
+    
+    return {
+        "population": population,
+        "sample_size": sample_size,
+        "num_unverified": population - sample_size,
+        "num_strata": len(strata),
+        "confidence": confidence,
+        "modified_in_sample": modified_in_sample,
+        "estimated_modification_rate": round(rate, 6),
+        "rate_lower_bound": round(lower, 6),
+        "rate_upper_bound": round(upper, 6),
+        "estimated_modified_files": round(rate * population),
+        "estimated_modified_files_bounds": [math.floor(lower * population), math.ceil(upper * population)]
+    }
+
+def build_export_data(report, reference_path, extracted_path):
+    """
+        Wrap a report with the metadata block used by exported JSON files.
+        
+        Parameters:
+        - report: Comparison report.
+        - reference_path: Path to the reference directory.
+        - extracted_path: Path to the extracted archive directory.
+
+        Returns:
+        - A dict with 'metadata' and 'results' keys.
+    """
+    return {
+        "metadata": {
+            "timestamp": str(datetime.datetime.now()),
+            "reference_path": reference_path,
+            "extracted_path": extracted_path,
+            "application": "Comparateur d'Archives v2.0 - APST2607",
+            "total_differences": (report.get('num_missing', 0) + 
+                                report.get('num_extra', 0) + 
+                                report.get('num_modified', 0))
+        },
+        "results": report
+    }
+
+def write_report_file(report, output_path, reference_path, extracted_path):
+    """
+        Export a report with its metadata to a JSON file.
+        
+        Parameters:
+        - report: Comparison report.
+        - output_path: Path of the JSON file to write.
+        - reference_path: Path to the reference directory.
+        - extracted_path: Path to the extracted archive directory.
+    """
+    export_data = build_export_data(report, reference_path, extracted_path)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(export_data, f, indent=2, ensure_ascii=False)
+
+# Report sections describing the entries found by one run: stale once the entries are updated
+REPORT_RUN_SECTIONS = ('stats', 'profiling', 'recheck', 'hashing', 'inode_dedup', 'chunk_analysis', 'content_matches',
+                       'sampling', 'near_duplicates')
+
+def merge_reports(base, scoped, reference_path=None, extracted_path=None):
+    """
+        Fold the report of a scoped comparison into a previous (full) report.
+        
+        The entries of the base report lying in the scope are replaced by those of the
+        scoped report; the entries outside the scope are kept. The number of identical
+        files is rebuilt from the scoped counts, assuming the scope only changed through
+        the differences listed in the base report.
+        
+        Parameters:
+        - base: Full report (or a report of other scopes) of the same two trees.
+        - scoped: Report of compare_archives_with_progress with a 'scope'.
+        - reference_path / extracted_path: Roots of the two trees, used to tell the missing
+          or extra files of the base that became common from those deleted since (without
+          them, every such resolved file is counted as common).
+
+        Returns:
+        - A new merged report; it keeps the 'scope' of the base when the base was itself scoped.
+          The sections describing the entries of a single run (REPORT_RUN_SECTIONS) are left out.
+    """
+    if not scoped.get('scope'):
+        raise ValueError("The report to merge has no scope")
+    filters = base.get('filters') or scoped.get('filters')
+    scope = ScanScope.from_list(scoped['scope'], ignore_case=bool(filters and filters.get('ignore_case')))
+    list_keys = ('missing_files', 'extra_files', 'missing_directories', 'extra_directories')
+    
+    merged = {key: value for key, value in base.items() if key not in REPORT_RUN_SECTIONS}
+    for key in list_keys:
+        merged[key] = sorted([path for path in base.get(key, []) if not scope.contains(path)] + scoped.get(key, []))
+    merged['modified_files'] = sorted([entry for entry in base.get('modified_files', [])
+                                       if not scope.contains(entry['file'])] + scoped.get('modified_files', []),
+                                      key=lambda entry: entry['file'])
+    
+    # Identical files of the base inside the scope: the common files found now, minus the
+    # base's missing/extra files of the scope that became common
+    now_different = set(scoped.get('missing_files', [])) | set(scoped.get('extra_files', []))
+    def is_common(relative_path):
+        if reference_path is None or extracted_path is None:
+            return True
+        return all(os.path.isfile(os.path.join(root, relative_path.replace('/', os.sep)))
+                   for root in (reference_path, extracted_path))
+    
+    became_common = sum(1 for key in ('missing_files', 'extra_files') for path in base.get(key, [])
+                        if scope.contains(path) and path not in now_different and is_common(path))
+    base_modified = sum(1 for entry in base.get('modified_files', []) if scope.contains(entry['file']))
+    base_identical = scoped.get('num_common', 0) + scoped.get('num_modified', 0) - became_common - base_modified
+    
+    merged.update({
+        "num_missing": len(merged['missing_files']),
+        "num_extra": len(merged['extra_files']),
+        "num_modified": len(merged['modified_files']),
+        "num_missing_dirs": len(merged['missing_directories']),
+        "num_extra_dirs": len(merged['extra_directories']),
+        "num_common": max(0, base.get('num_common', 0) - max(0, base_identical)) + scoped.get('num_common', 0),
+        "merged_scopes": base.get('merged_scopes', []) + [{"scope": scope.to_list(),
+                                                             "timestamp": scoped.get('timestamp')}]
+    })
+    if base.get('scope'):
+        merged['scope'] = list(base['scope']) + [entry for entry in scope.to_list() if entry not in base['scope']]
+    return merged
+
+#### saved results diff
+EXTERNAL_SORT_RUN_SIZE = 200000  # records kept in memory before a sorted run is spilled to disk
+STREAM_READ_SIZE = 1024 * 1024
+REPORT_LIST_KINDS = {
+    'missing_files': ('file', 'missing'),
+    'extra_files': ('file', 'extra'),
+    'modified_files': ('file', 'modified'),
+    'missing_directories': ('dir', 'missing'),
+    'extra_directories': ('dir', 'extra')
+}
+
+def iter_json_array_items(file_path, keys, read_size=STREAM_READ_SIZE):
+    """
+        Stream the items of the arrays stored under the given keys of a JSON file,
+        without loading the whole document (the first array of each key is read).
+        
+        The file is read in chunks; each '"key": [' is located and its items are
+        decoded one at a time with raw_decode. Items must be strings or objects,
+        which is the case of every list of an exported report.
+        
+        Parameters:
+        - file_path: Path of the JSON file.
+        - keys: Names of the arrays to stream (at any nesting level).
+        - read_size: Size of the chunks read from the file.
+
+        Yields:
+        - (key, item) tuples in file order.
+    """
+    decoder = json.JSONDecoder()
+    remaining_keys = list(keys)
+    whitespace = re.compile(r'\s*')
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        eof = False
+        current_key = None
+        position = 0
+        
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+        
+        while True:
+            if current_key is None:
+                if not remaining_keys:
+                    return
+                # Each array is read once: the report lists come before any nested section
+                key_pattern = re.compile(r'(?<!\\)"(' + '|'.join(re.escape(key) for key in remaining_keys) +
+                                         r')"\s*:\s*\[')
+                match = key_pattern.search(buffer, position)
+                if match is None:
+                    if eof:
+                        return
+                    # Keep a tail in case a key is split across two chunks
+                    position = max(position, len(buffer) - 256)
+                    fill()
+                    continue
+                current_key = match.group(1)
+                remaining_keys.remove(current_key)
+                position = match.end()
+                continue
+            
+            position = whitespace.match(buffer, position).end()
+            if position >= len(buffer):
+                if eof:
+                    raise ValueError(f"Unexpected end of file in '{current_key}'")
+                fill()
+                continue
+            if buffer[position] == ']':
+                position += 1
+                current_key = None
+                continue
+            if buffer[position] == ',':
+                position += 1
+                continue
             try:
-                relative_path = os.path.relpath(os.path.join(root, file), directory)
-                # Normalize path separators
-                relative_path = relative_path.replace('\\', '/')
-                file_set.add(relative_path)
+                item, end = decoder.raw_decode(buffer, position)
+                # The item is complete only if its separator is already in the buffer
+                after = whitespace.match(buffer, end).end()
+                if after >= len(buffer) and not eof:
+                    raise ValueError("item may be truncated")
             except ValueError:
-                # Handle different drives on Windows
-                full_path = os.path.join(root, file)
-                # Use path relative to the directory's drive
+                if eof:
+                    raise ValueError(f"Invalid JSON item in '{current_key}' near offset {position}")
+                fill()
+                continue
+            position = end
+            yield current_key, item
+
+def iter_report_members(file_path, list_keys, read_size=STREAM_READ_SIZE):
+    """
+        Stream the members of the report stored in an exported JSON file (its 'results'
+        object, or the whole document for legacy exports) without loading the file.
+        
+        The arrays named in list_keys are streamed item by item; every other member is
+        decoded whole (counters and small sections). The export 'metadata' block is
+        skipped (see _read_export_metadata).
+        
+        Parameters:
+        - file_path: Path of the exported report.
+        - list_keys: Names of the entry lists to stream.
+        - read_size: Size of the chunks read from the file.
+
+        Yields:
+        - (key, item) tuples for the items of the lists and (key, value) tuples for the
+          other members, in file order.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r'\s*')
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        eof = False
+        position = 0
+        
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+        
+        def peek():
+            nonlocal position
+            while True:
+                position = whitespace.match(buffer, position).end()
+                if position < len(buffer):
+                    return buffer[position]
+                if eof:
+                    raise ValueError("Unexpected end of file")
+                fill()
+        
+        def decode():
+            nonlocal position
+            while True:
+                peek()
                 try:
-                    # Remove the directory prefix manually if on same drive
-                    if full_path.startswith(directory):
-                        relative_path = full_path[len(directory):].lstrip('\\/')
-                        relative_path = relative_path.replace('\\', '/')
-                        file_set.add(relative_path)
-                except:
-                    # If all else fails, use basename
-                    file_set.add(os.path.basename(full_path))
-    return file_set
+                    value, end = decoder.raw_decode(buffer, position)
+                    # The value is complete only if its separator is already in the buffer
+                    if whitespace.match(buffer, end).end() >= len(buffer) and not eof:
+                        raise ValueError("value may be truncated")
+                except ValueError:
+                    if eof:
+                        raise ValueError(f"Invalid JSON near offset {position}")
+                    fill()
+                    continue
+                position = end
+                return value
+        
+        def expect(char):
+            nonlocal position
+            if peek() != char:
+                raise ValueError(f"Expected '{char}' near offset {position}")
+            position += 1
+        
+        expect('{')
+        in_results = False
+        while True:
+            char = peek()
+            if char == ',':
+                position += 1
+                continue
+            if char == '}':
+                position += 1
+                if not in_results:
+                    return
+                in_results = False
+                continue
+            key = decode()
+            expect(':')
+            if not in_results and key == 'results' and peek() == '{':
+                position += 1
+                in_results = True
+            elif key in list_keys and peek() == '[':
+                position += 1
+                while True:
+                    char = peek()
+                    if char == ',':
+                        position += 1
+                    elif char == ']':
+                        position += 1
+                        break
+                    else:
+                        yield key, decode()
+            elif not in_results and key == 'metadata':
+                decode()
+            else:
+                yield key, decode()
+
+def read_report_file(file_path):
+    """
+        Load the report of an exported JSON file (new format with metadata or legacy
+        report) with the streaming reader, never parsing the document in one block.
+
+        Returns:
+        - The report dict, with every entry list present.
+    """
+    report = {list_key: [] for list_key in REPORT_LIST_KINDS}
+    for key, value in iter_report_members(file_path, REPORT_LIST_KINDS):
+        if key in REPORT_LIST_KINDS:
+            report[key].append(value)
+        else:
+            report[key] = value
+    if 'num_missing' not in report or 'num_extra' not in report:
+        raise ValueError(f"Not a comparison report (missing counters): {file_path}")
+    return report
+
+def external_sorted(records, key, max_records=EXTERNAL_SORT_RUN_SIZE, tmp_dir=None, spill_info=None):
+    """
+        Sort an iterable of JSON-serializable records in bounded memory.
+        
+        Up to max_records records are sorted in memory; larger inputs are spilled to
+        sorted runs in temporary JSON Lines files that are merged with heapq.merge.
+        
+        Parameters:
+        - records: Iterable of lists (or other JSON-serializable values).
+        - key: Sort key function.
+        - max_records: Maximum number of records held in memory.
+        - tmp_dir: Directory of the temporary runs (default: system temp directory).
+        - spill_info: Optional dict whose 'runs' and 'records_spilled' counters are
+          incremented for each run written to disk.
+
+        Yields:
+        - The records in sorted order.
+    """
+    run_paths = []
+    run = []
+    try:
+        for record in records:
+            run.append(record)
+            if len(run) >= max_records:
+                run.sort(key=key)
+                fd, run_path = tempfile.mkstemp(prefix="chckfiles-run-", suffix=".jsonl", dir=tmp_dir)
+                run_paths.append(run_path)
+                # surrogatepass: undecodable file names (surrogate escapes) survive the round trip
+                with os.fdopen(fd, 'w', encoding='utf-8', errors='surrogatepass') as f:
+                    for item in run:
+                        f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                if spill_info is not None:
+                    spill_info['runs'] = spill_info.get('runs', 0) + 1
+                    spill_info['records_spilled'] = spill_info.get('records_spilled', 0) + len(run)
+                run = []
+        run.sort(key=key)
+        if not run_paths:
+            yield from run
+            return
+        
+        def read_run(run_path):
+            with open(run_path, 'r', encoding='utf-8', errors='surrogatepass') as f:
+                for line in f:
+                    yield json.loads(line)
+        
+        yield from heapq.merge(*[read_run(run_path) for run_path in run_paths], iter(run), key=key)
+    finally:
+        for run_path in run_paths:
+            try:
+                os.remove(run_path)
+            except OSError:
+                pass
+
+def detect_saved_result_format(file_path):
+    """
+        Tell whether a file is an exported report ('report') or a JSON Lines manifest
+        ('manifest', one {"path": ..., "sha256"|"hash"|"digest": ...} object per line).
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        first_line = f.readline().strip()
+    try:
+        record = json.loads(first_line)
+    except ValueError:
+        return 'report'
+    if isinstance(record, dict) and ('path' in record or 'file' in record) and 'results' not in record:
+        return 'manifest'
+    return 'report'
+
+def iter_saved_result_records(file_path, result_format):
+    """
+        Read a saved report or manifest as [path, kind, status, digest] records.
+        
+        Reports yield one record per missing/extra/modified file or directory (status
+        'missing', 'extra' or 'modified', digest = 'hash_ref|hash_ext' of modified files);
+        manifests yield one 'present' record per listed file.
+    """
+    if result_format == 'manifest':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                path = entry.get('path', entry.get('file'))
+                digest = entry.get('sha256', entry.get('hash', entry.get('digest')))
+                yield [path, 'file', 'present', digest]
+        return
+    
+    for list_key, item in iter_json_array_items(file_path, REPORT_LIST_KINDS):
+        kind, status = REPORT_LIST_KINDS[list_key]
+        if isinstance(item, dict):
+            yield [item['file'], kind, status, f"{item.get('hash_ref')}|{item.get('hash_ext')}"]
+        else:
+            yield [item, kind, status, None]
+
+def diff_saved_results(old_path, new_path, output_path=None, max_records=EXTERNAL_SORT_RUN_SIZE,
+                       sample_limit=200, progress_callback=None):
+    """
+        Compare two saved reports (or two manifests) from their contents only.
+        
+        Both inputs are streamed, externally sorted by path and merge-joined, so the
+        memory used does not depend on their size and the compared trees are never read.
+        
+        Parameters:
+        - old_path: Older exported report / manifest.
+        - new_path: Newer exported report / manifest of the same kind.
+        - output_path: Optional JSON Lines file receiving every change.
+        - max_records: Records kept in memory by the external sort.
+        - sample_limit: Number of changes per category kept in the returned summary.
+        - progress_callback: Optional function receiving progress messages.
+
+        Returns:
+        - A summary dict with the counts of 'newly_missing', 'newly_extra', 'newly_modified'
+          and 'resolved' changes and up to sample_limit entries of each.
+    """
+    old_format = detect_saved_result_format(old_path)
+    new_format = detect_saved_result_format(new_path)
+    if old_format != new_format:
+        raise ValueError("Both files must be exported reports or both must be manifests")
+    
+    categories = ('newly_missing', 'newly_extra', 'newly_modified', 'resolved')
+    summary = {
+        'old': old_path,
+        'new': new_path,
+        'format': old_format,
+        'counts': {category: 0 for category in categories},
+        'samples': {category: [] for category in categories},
+        'old_records': 0,
+        'new_records': 0,
+        'output_path': output_path
+    }
+    sort_key = lambda record: (record[0], record[1])
+    
+    def counted(records, counter):
+        for record in records:
+            summary[counter] += 1
+            if progress_callback and summary[counter] % 500000 == 0:
+                progress_callback(f"🕰️ {summary[counter]:,} entries read")
+            yield record
+    
+    old_records = external_sorted(counted(iter_saved_result_records(old_path, old_format), 'old_records'),
+                                  sort_key, max_records)
+    new_records = external_sorted(counted(iter_saved_result_records(new_path, new_format), 'new_records'),
+                                  sort_key, max_records)
+    
+    output = open(output_path, 'w', encoding='utf-8') if output_path else None
+    try:
+        def emit(category, record, previous, current):
+            entry = {'path': record[0], 'kind': record[1], 'change': category,
+                     'previous': previous[2] if previous else None,
+                     'current': current[2] if current else None}
+            if record[1] == 'file' and (previous and previous[3] or current and current[3]):
+                entry['digest_old'] = previous[3] if previous else None
+                entry['digest_new'] = current[3] if current else None
+            summary['counts'][category] += 1
+            if len(summary['samples'][category]) < sample_limit:
+                summary['samples'][category].append(entry)
+            if output:
+                output.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        
+        old_record = next(old_records, None)
+        new_record = next(new_records, None)
+        while old_record is not None or new_record is not None:
+            if new_record is None or (old_record is not None and sort_key(old_record) < sort_key(new_record)):
+                previous, current = old_record, None
+                old_record = next(old_records, None)
+            elif old_record is None or sort_key(new_record) < sort_key(old_record):
+                previous, current = None, new_record
+                new_record = next(new_records, None)
+            else:
+                previous, current = old_record, new_record
+                old_record = next(old_records, None)
+                new_record = next(new_records, None)
+            record = current or previous
+            
+            if old_format == 'manifest':
+                # Listings of a tree: disappeared, appeared or changed content
+                if current is None:
+                    emit('newly_missing', record, previous, current)
+                elif previous is None:
+                    emit('newly_extra', record, previous, current)
+                elif previous[3] != current[3]:
+                    emit('newly_modified', record, previous, current)
+            else:
+                # Differences of two verifications
+                if current is None:
+                    emit('resolved', record, previous, current)
+                elif previous is None or previous[2] != current[2] or previous[3] != current[3]:
+                    emit(f"newly_{current[2]}", record, previous, current)
+    finally:
+        if output:
+            output.close()
+        old_records.close()
+        new_records.close()
+    return summary
+
+#### memory budget
+SCAN_RECORD_MEMORY = 320  # estimated bytes held per scan record (list + path string) while a run is sorted
+MIN_BUDGET_RECORDS = 1000
+
+def records_for_memory_budget(memory_budget):
+    """
+        Number of scan records that fit in a memory budget given in bytes.
+    """
+    return max(MIN_BUDGET_RECORDS, int(memory_budget) // SCAN_RECORD_MEMORY)
+
+def merge_join_sorted(left, right, key):
+    """
+        Walk two iterables sorted on the same key side by side.
+        
+        Yields:
+        - (left item, right item) pairs; the item missing on one side is None.
+    """
+    end = object()
+    left = iter(left)
+    right = iter(right)
+    left_item = next(left, end)
+    right_item = next(right, end)
+    while left_item is not end or right_item is not end:
+        if right_item is end or (left_item is not end and key(left_item) < key(right_item)):
+            yield left_item, None
+            left_item = next(left, end)
+        elif left_item is end or key(right_item) < key(left_item):
+            yield None, right_item
+            right_item = next(right, end)
+        else:
+            yield left_item, right_item
+            left_item = next(left, end)
+            right_item = next(right, end)
+
+def iter_directory_tree(directory, scan_filter=None, top_level=None, scope=None):
+    """
+        Walk a tree one directory at a time without keeping its listing.
+        
+        Yields:
+        - [relative path, kind] records, kind being 'd' for directories and 'f' for files;
+          same entries as scan_directory_tree.
+    """
+    pending = ['']
+    while pending:
+        file_paths, dir_paths, subdirs = _list_directory_entries(directory, pending.pop(), scan_filter, top_level, scope)
+        for dir_path in dir_paths:
+            yield [dir_path, 'd']
+        for file_path in file_paths:
+            yield [file_path, 'f']
+        pending.extend(subdirs)
+
+def sorted_tree_records(directory, scan_filter=None, max_records=EXTERNAL_SORT_RUN_SIZE, top_level=None,
+                        hash_range=None, spill_info=None, scope=None):
+    """
+        Walk a tree and return its records sorted by path in bounded memory.
+        
+        The walk runs (and spills its sorted runs) before this function returns, so
+        the caller can time and report the scan separately from the merge.
+        
+        Parameters:
+        - directory: Path to the directory.
+        - scan_filter: Optional ScanFilter.
+        - max_records: Records held in memory before a sorted run is spilled to disk.
+        - top_level / hash_range: Shard restriction (see compare_archives_with_progress).
+        - spill_info: Optional dict whose 'runs' and 'records_spilled' counters are updated.
+        - scope: Optional ScanScope restricting the walk to some subtrees.
+
+        Returns:
+        - A tuple (iterator of [path, kind] records, number of files).
+    """
+    counts = {'f': 0, 'd': 0}
+    
+    def records():
+        for record in iter_directory_tree(directory, scan_filter, top_level, scope):
+            if hash_range and shard_of_path(record[0], hash_range[1]) != hash_range[0]:
+                continue
+            counts[record[1]] += 1
+            yield record
+    
+    ordered = external_sorted(records(), key=lambda record: (record[0], record[1]), max_records=max_records,
+                              spill_info=spill_info)
+    first = next(ordered, None)  # forces the walk and the spill of the runs
+    if first is None:
+        return iter(()), 0
+    return itertools.chain([first], ordered), counts['f']
+
+def group_duplicate_records(records, max_records=None, spill_info=None, content_callback=None):
+    """
+        Group hashed files into duplicate groups and hardlink groups.
+        
+        Parameters:
+        - records: Iterable of [digest, size, inode key, path] records (the inode key
+          identifies the physical file, e.g. 'st_dev:st_ino').
+        - max_records: Records held in memory before a sorted run is spilled to disk
+          (None = sort in memory).
+        - spill_info: Optional dict updated with the spill counters (see external_sorted).
+        - content_callback: Function called with one path per distinct digest (the first
+          path of its group), e.g. to collect the candidates of find_near_duplicates.
+
+        Returns:
+        - A dict with 'duplicate_groups' (lists of paths, one per physical file, for the
+          digests shared by several physical files), 'hardlink_groups' (lists of paths
+          of the same physical file), 'unique_files' and 'reclaimable_space'.
+    """
+    ordered = external_sorted(records, key=lambda record: (record[0], record[2], record[3]),
+                              max_records=max_records or sys.maxsize, spill_info=spill_info)
+    duplicate_groups = []
+    hardlink_groups = []
+    unique_files = 0
+    reclaimable_space = 0
+    for _, digest_records in itertools.groupby(ordered, key=lambda record: record[0]):
+        physical_files = []
+        size = 0
+        for _, inode_records in itertools.groupby(digest_records, key=lambda record: record[2]):
+            inode_records = list(inode_records)
+            size = inode_records[0][1]
+            physical_files.append(inode_records[0][3])
+            if len(inode_records) > 1:
+                hardlink_groups.append([record[3] for record in inode_records])
+        if content_callback:
+            content_callback(physical_files[0])
+        if len(physical_files) > 1:
+            duplicate_groups.append(physical_files)
+            reclaimable_space += size * (len(physical_files) - 1)
+        else:
+            unique_files += 1
+    return {
+        'duplicate_groups': duplicate_groups,
+        'hardlink_groups': hardlink_groups,
+        'unique_files': unique_files,
+        'reclaimable_space': reclaimable_space
+    }
+
+HASH_READ_SIZE = 8192
+BLAKE2B_SIZED_ALGORITHM = re.compile(r'^blake2b-(\d+)$')  # BLAKE2b with a shorter digest, in bits (b2sum -l)
+
+def new_hash(hash_algorithm):
+    """
+        Create a hash object for a hashlib algorithm name or 'blake2b-<bits>'.
+    """
+    match = BLAKE2B_SIZED_ALGORITHM.match(hash_algorithm)
+    if match:
+        return hashlib.blake2b(digest_size=int(match.group(1)) // 8)
+    return hashlib.new(hash_algorithm)
+
+THROTTLED_HASH_READ_SIZE = 1024 * 1024  # under a throttle each read is one paced operation, keep them large
+
+def calculate_file_hash(file_path, hash_algorithm='sha256', stats=None, cache_hints=False, throttle=None):
+    """
+        Calculate the hash of a file.
+        
+        Parameters:
+        - file_path: Path to the file.
+        - hash_algorithm: Hash algorithm to use (default: sha256), see new_hash.
+        - stats: Optional ComparisonStats receiving the bytes read and read errors.
+        - cache_hints: Use posix_fadvise to announce a sequential read and drop the
+          file from the page cache once hashed, so a full pass does not evict hot data.
+        - throttle: Optional IOThrottle pacing the reads.
+        
+        Returns:
+        - The hexadecimal hash string of the file.
+    """
+    hash_obj = new_hash(hash_algorithm)
+    bytes_read = 0
+    use_fadvise = cache_hints and hasattr(os, 'posix_fadvise')
+    
+    try:
+        with open(file_path, 'rb') as f:
+            if use_fadvise:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            # Read file in chunks to handle large files efficiently
+            read_size = THROTTLED_HASH_READ_SIZE if throttle else HASH_READ_SIZE
+            while True:
+                if throttle:
+                    read_start = time.perf_counter()
+                    chunk = f.read(read_size)
+                    if chunk:
+                        throttle.acquire(len(chunk), time.perf_counter() - read_start)
+                else:
+                    chunk = f.read(read_size)
+                if not chunk:
+                    break
+                hash_obj.update(chunk)
+                bytes_read += len(chunk)
+            if use_fadvise:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    except (OSError, IOError):
+        # Return a special hash for files that can't be read
+        if stats:
+            stats.add_bytes(bytes_read)
+            stats.add_error()
+        return "ERROR_READING_FILE"
+    
+    if stats:
+        stats.add_bytes(bytes_read)
+    return hash_obj.hexdigest()
+
+# Large files are split in chunks of this size and hashed in parallel
+LARGE_FILE_THRESHOLD = 256 * 1024 * 1024
+TREE_HASH_CHUNK_SIZE = 64 * 1024 * 1024
+
+def _hash_file_range(file_path, hash_algorithm, offset, length, stats=None, throttle=None, cache_hints=False):
+    """
+        Hash a byte range of a file (one chunk of a tree digest).
+
+        Returns:
+        - The raw digest of the range.
+    """
+    block_size = 1024 * 1024
+    hash_obj = hashlib.new(hash_algorithm)
+    remaining = length
+    with open(file_path, 'rb') as f:
+        use_fadvise = cache_hints and hasattr(os, 'posix_fadvise')
+        if use_fadvise:
+            os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_SEQUENTIAL)
+        f.seek(offset)
+        while remaining > 0:
+            if throttle:
+                read_start = time.perf_counter()
+                block = f.read(min(block_size, remaining))
+                if block:
+                    throttle.acquire(len(block), time.perf_counter() - read_start)
+            else:
+                block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            hash_obj.update(block)
+            remaining -= len(block)
+        if use_fadvise:
+            os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_DONTNEED)
+    if stats:
+        stats.add_bytes(length - remaining)
+    return hash_obj.digest()
+
+def calculate_file_tree_hash(file_path, hash_algorithm='sha256', chunk_size=TREE_HASH_CHUNK_SIZE, max_workers=None,
+                             stats=None, throttle=None, cache_hints=False, poll_callback=None):
+    """
+        Calculate a tree digest of a file by hashing fixed-size chunks in parallel.
+        
+        The digest is the hash of the chunk size followed by the digests of every chunk,
+        so it only matches another tree digest computed with the same chunk size and
+        algorithm (never a plain digest of the file).
+        
+        Parameters:
+        - file_path: Path to the file.
+        - hash_algorithm: Hash algorithm to use (default: sha256).
+        - chunk_size: Size of the chunks hashed independently.
+        - max_workers: Number of hashing threads (default: CPU count).
+        - stats: Optional ComparisonStats receiving the bytes read and read errors.
+        - throttle: Optional IOThrottle pacing the reads.
+        - cache_hints: Use posix_fadvise on each chunk (see calculate_file_hash).
+        - poll_callback: Function called regularly while waiting for the chunks (e.g. to keep a GUI responsive).
+        
+        Returns:
+        - The hexadecimal tree digest, or 'ERROR_READING_FILE' when the file can't be read.
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        offsets = range(0, max(file_size, 1), chunk_size)
+        max_workers = max_workers or min(32, os.cpu_count() or 1)
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_hash_file_range, file_path, hash_algorithm, offset,
+                                       min(chunk_size, file_size - offset), stats, throttle, cache_hints)
+                       for offset in offsets]
+            pending = set(futures)
+            while pending:
+                _, pending = concurrent.futures.wait(pending, timeout=0.1)
+                if poll_callback:
+                    poll_callback()
+            chunk_digests = [future.result() for future in futures]
+    except (OSError, IOError):
+        if stats:
+            stats.add_error()
+        return "ERROR_READING_FILE"
+    
+    tree_hash = hashlib.new(hash_algorithm)
+    tree_hash.update(struct.pack('>Q', chunk_size))
+    for digest in chunk_digests:
+        tree_hash.update(digest)
+    return tree_hash.hexdigest()
+
+_CHUNK_BYTE_RANKS = sorted(range(256), key=lambda value: hashlib.sha256(bytes([value])).digest())
+CHUNK_SYMBOLS = bytes(_CHUNK_BYTE_RANKS.index(value) % 4 for value in range(256))  # 2-bit fingerprint, 64 bytes each
+CHUNK_ANCHOR = bytes([1, 3, 0, 2, 2, 0, 3, 1, 0, 1, 2, 3])  # symbols ending a chunk (prefix of length log4(average))
+CHUNK_MIN_AVERAGE_SIZE = 4 ** 6  # 4 KiB
+CHUNK_TARGET_COUNT = 32768  # the average chunk size grows with the file so that an index stays about this long
+CHUNK_READ_SIZE = 4 * 1024 * 1024
+CHUNK_MAX_RANGES = 100  # changed ranges kept per side in the report
+CHUNK_REFERENCE_COST = 16  # estimated bytes of a delta instruction copying a run of shared chunks
+CHUNK_NARROW_LIMIT = 4 * 1024 * 1024  # aligned changed ranges up to this size are narrowed byte by byte
+
+def chunk_average_size(file_size):
+    """
+        Pick the average content-defined chunk size of a file: a power of 4 from
+        CHUNK_MIN_AVERAGE_SIZE, large enough to keep about CHUNK_TARGET_COUNT chunks.
+    """
+    average_size = CHUNK_MIN_AVERAGE_SIZE
+    while file_size // average_size > CHUNK_TARGET_COUNT and average_size < 4 ** len(CHUNK_ANCHOR):
+        average_size *= 4
+    return average_size
+
+def iter_content_chunks(file_path, average_size=CHUNK_MIN_AVERAGE_SIZE, stats=None, throttle=None):
+    """
+        Split a file into content-defined chunks, streaming it block by block.
+        
+        Every byte is reduced to a 2-bit fingerprint (CHUNK_SYMBOLS) and a chunk ends
+        after each window of log4(average_size) bytes whose fingerprints spell
+        CHUNK_ANCHOR, so the cut points depend on the local content only: an insertion
+        or a deletion shifts the following cut points with the data instead of
+        changing every chunk after it. Chunks are kept between a quarter and 8 times
+        the average size. The fingerprints are computed with bytes.translate and the
+        windows found with bytes.find, so the file is chunked at C speed.
+        
+        Parameters:
+        - file_path: Path to the file.
+        - average_size: Average chunk size, a power of 4 (see chunk_average_size).
+        - stats: Optional ComparisonStats receiving the bytes read.
+        - throttle: Optional IOThrottle pacing the reads.
+        
+        Returns:
+        - An iterator of (offset, length, digest) tuples, digest being the 16-byte BLAKE2b of the chunk.
+    """
+    anchor_length = max(1, round(math.log(average_size, 4)))
+    anchor = CHUNK_ANCHOR[:anchor_length]
+    min_size = max(1, average_size // 4)
+    max_size = average_size * 8
+    chunk_start = 0
+    position = 0  # offset of the current block in the file
+    tail = b''  # fingerprints of the last bytes of the previous block (anchor across two blocks)
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        while True:
+            if throttle:
+                read_start = time.perf_counter()
+                block = f.read(CHUNK_READ_SIZE)
+                if block:
+                    throttle.acquire(len(block), time.perf_counter() - read_start)
+            else:
+                block = f.read(CHUNK_READ_SIZE)
+            if not block:
+                break
+            if stats:
+                stats.add_bytes(len(block))
+            fingerprints = tail + block.translate(CHUNK_SYMBOLS)
+            base = position - len(tail)
+            cut_points = []
+            found = fingerprints.find(anchor)
+            while found >= 0:
+                cut_points.append(base + found + anchor_length)
+                found = fingerprints.find(anchor, found + 1)
+            cut_points.append(None)  # end of the block: only the maximum size applies
+            block_end = position + len(block)
+            consumed = 0
+            for cut in cut_points:
+                limit = block_end if cut is None else cut
+                while limit - chunk_start > max_size:
+                    end = chunk_start + max_size
+                    hasher.update(block[consumed:end - position])
+                    yield chunk_start, max_size, hasher.digest()
+                    hasher = hashlib.blake2b(digest_size=16)
+                    chunk_start, consumed = end, end - position
+                if cut is not None and cut - chunk_start >= min_size:
+                    hasher.update(block[consumed:cut - position])
+                    yield chunk_start, cut - chunk_start, hasher.digest()
+                    hasher = hashlib.blake2b(digest_size=16)
+                    chunk_start, consumed = cut, cut - position
+            hasher.update(block[consumed:])
+            tail = fingerprints[-(anchor_length - 1):] if anchor_length > 1 else b''
+            position = block_end
+    if position > chunk_start:
+        yield chunk_start, position - chunk_start, hasher.digest()
+
+def _merge_chunk_ranges(chunks, shared_digests):
+    """
+        Merge the adjacent chunks whose digest is not in shared_digests into [start, end) ranges.
+    """
+    ranges = []
+    for offset, length, digest in chunks:
+        if digest in shared_digests:
+            continue
+        if ranges and ranges[-1][1] == offset:
+            ranges[-1][1] = offset + length
+        else:
+            ranges.append([offset, offset + length])
+    return ranges
+
+def _narrow_changed_range(reference_file, extracted_file, start, end):
+    """
+        Shrink a range at the same place on both sides to its first and last differing bytes.
+    """
+    with open(reference_file, 'rb') as ref, open(extracted_file, 'rb') as ext:
+        ref.seek(start)
+        ext.seek(start)
+        ref_data = ref.read(end - start)
+        ext_data = ext.read(end - start)
+    if len(ref_data) != len(ext_data) or ref_data == ext_data:
+        return [start, end]
+    first = next(i for i in range(len(ref_data)) if ref_data[i] != ext_data[i])
+    last = next(i for i in range(len(ref_data) - 1, -1, -1) if ref_data[i] != ext_data[i])
+    return [start + first, start + last + 1]
+
+def analyze_chunk_delta(reference_file, extracted_file, average_size=None, stats=None, throttle=None,
+                        max_ranges=CHUNK_MAX_RANGES):
+    """
+        Locate the changes between two versions of a file with content-defined chunks.
+        
+        Both files are chunked with iter_content_chunks; only the chunk indexes (offset,
+        length, 16-byte digest) are kept in memory, so multi-GB files are analysed in one
+        streaming pass per side. Chunks whose digest exists on the other side are shared,
+        the others are merged into changed byte ranges. When the two sides have the same
+        changed ranges at the same offsets (bytes overwritten in place), each range is
+        narrowed to the differing bytes.
+        
+        Parameters:
+        - reference_file: Path of the reference version.
+        - extracted_file: Path of the extracted version.
+        - average_size: Average chunk size (default: chunk_average_size of the larger file).
+        - stats: Optional ComparisonStats receiving the bytes read.
+        - throttle: Optional IOThrottle pacing the reads.
+        - max_ranges: Number of changed ranges kept per side.
+        
+        Returns:
+        - A dict with the chunk size, the number of chunks of each side and shared by the
+          extracted one, the shared bytes and their percentage of the extracted file,
+          'delta_bytes' (estimated size of a delta rebuilding the extracted file from the
+          reference one: its unshared bytes plus CHUNK_REFERENCE_COST per shared run), and
+          the changed [start, end) ranges of each side ('changed_ranges_ref' and
+          'changed_ranges_ext', with 'ranges_truncated' when more than max_ranges).
+    """
+    ref_size = os.path.getsize(reference_file)
+    ext_size = os.path.getsize(extracted_file)
+    average_size = average_size or chunk_average_size(max(ref_size, ext_size))
+    ref_chunks = list(iter_content_chunks(reference_file, average_size, stats, throttle))
+    ext_chunks = list(iter_content_chunks(extracted_file, average_size, stats, throttle))
+    ref_digests = {digest for _, _, digest in ref_chunks}
+    ext_digests = {digest for _, _, digest in ext_chunks}
+    
+    shared_chunks = 0
+    shared_bytes = 0
+    shared_runs = 0
+    previous_shared = False
+    for _, length, digest in ext_chunks:
+        is_shared = digest in ref_digests
+        if is_shared:
+            shared_chunks += 1
+            shared_bytes += length
+            if not previous_shared:
+                shared_runs += 1
+        previous_shared = is_shared
+    changed_ref = _merge_chunk_ranges(ref_chunks, ext_digests)
+    changed_ext = _merge_chunk_ranges(ext_chunks, ref_digests)
+    if changed_ref == changed_ext:
+        # Overwritten in place: same ranges on both sides, narrow them to the differing bytes
+        changed_ref = [_narrow_changed_range(reference_file, extracted_file, start, end)
+                       if end - start <= CHUNK_NARROW_LIMIT else [start, end]
+                       for start, end in changed_ref[:max_ranges]] + changed_ref[max_ranges:]
+        changed_ext = [list(changed_range) for changed_range in changed_ref]
+    
+    result = {
+        "chunk_size": average_size,
+        "ref_chunks": len(ref_chunks),
+        "ext_chunks": len(ext_chunks),
+        "shared_chunks": shared_chunks,
+        "shared_bytes": shared_bytes,
+        "shared_percent": round(100 * shared_bytes / ext_size, 2) if ext_size else 0.0,
+        "delta_bytes": ext_size - shared_bytes + CHUNK_REFERENCE_COST * shared_runs,
+        "changed_ranges_ref": changed_ref[:max_ranges],
+        "changed_ranges_ext": changed_ext[:max_ranges]
+    }
+    if len(changed_ref) > max_ranges or len(changed_ext) > max_ranges:
+        result["ranges_truncated"] = max(len(changed_ref), len(changed_ext))
+    return result
+
+# FS_IOC_FIEMAP = _IOWR('f', 11, struct fiemap)
+FS_IOC_FIEMAP = 0xC020660B
+
+def get_physical_offset(file_path):
+    """
+        Get the physical position of the first extent of a file using FIEMAP.
+        
+        Parameters:
+        - file_path: Path to the file.
+
+        Returns:
+        - The physical byte offset of the first extent on its device, or None when
+          FIEMAP is not supported (other OS, network share, empty or inline file).
+    """
+    if fcntl is None:
+        return None
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        # struct fiemap header (32 bytes) followed by room for one fiemap_extent (56 bytes)
+        request = bytearray(struct.pack('=QQIIII', 0, 0xFFFFFFFFFFFFFFFF, 0, 0, 1, 0) + bytes(56))
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, request, True)
+        mapped_extents = struct.unpack_from('=I', request, 20)[0]
+        if not mapped_extents:
+            return None
+        return struct.unpack_from('=Q', request, 32 + 8)[0]  # fe_physical
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def order_paths_for_io(base_path, relative_paths, mode='inode'):
+    """
+        Order relative file paths so that reading them follows the on-disk layout.
+        
+        Parameters:
+        - base_path: Directory the relative paths are relative to.
+        - relative_paths: Iterable of '/' separated relative file paths.
+        - mode: 'inode' to sort by (device, inode number), 'extent' to sort by the physical
+          offset of the first extent (FIEMAP), falling back to the inode number.
+
+        Returns:
+        - A list of the relative paths in read order; paths that cannot be stat'ed come last.
+    """
+    positioned = []
+    unknown = []
+    for relative_path in relative_paths:
+        full_path = os.path.join(base_path, relative_path.replace('/', os.sep))
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            unknown.append(relative_path)
+            continue
+        
+        offset = get_physical_offset(full_path) if mode == 'extent' else None
+        if offset is not None:
+            positioned.append((st.st_dev, 0, offset, relative_path))
+        else:
+            positioned.append((st.st_dev, 1, st.st_ino, relative_path))
+    
+    positioned.sort()
+    return [entry[-1] for entry in positioned] + sorted(unknown)
+
+def get_directory_list(directory, scan_filter=None):
+    """
+        Get a set of all directory paths in the given directory and its subdirectories.
+        
+        Parameters:
+        - directory: Path to the directory.
+        - scan_filter: Optional ScanFilter; excluded directories are pruned.
+
+        Returns:
+        - A set of directory paths relative to the given directory.
+    """
+    dir_set = set()
+    for root, dirs, _ in os.walk(directory):
+        if scan_filter:
+            scan_filter.prune(_relative_walk_root(root, directory), dirs)
+        for dir_name in dirs:
+            try:
+                relative_path = os.path.relpath(os.path.join(root, dir_name), directory)
+                # Normalize path separators
+                relative_path = relative_path.replace('\\', '/')
+                dir_set.add(relative_path)
+            except ValueError:
+                # Handle different drives on Windows
+                full_path = os.path.join(root, dir_name)
+                # Use path relative to the directory's drive
+                try:
+                    # Remove the directory prefix manually if on same drive
+                    if full_path.startswith(directory):
+                        relative_path = full_path[len(directory):].lstrip('\\/')
+                        relative_path = relative_path.replace('\\', '/')
+                        dir_set.add(relative_path)
+                except:
+                    # If all else fails, use basename
+                    dir_set.add(os.path.basename(full_path))
+    return dir_set
+
+def get_file_list(directory, scan_filter=None):
+    """
+        Get a set of all file paths in the given directory and its subdirectories.
+        
+        Parameters:
+        - directory: Path to the directory.
+        - scan_filter: Optional ScanFilter; excluded directories are pruned and
+          excluded files are left out.
+
+        Returns:
+        - A set of file paths relative to the given directory.
+    """
+    file_set = set()
+    for root, dirs, files in os.walk(directory):
+        if scan_filter:
+            scan_filter.prune(_relative_walk_root(root, directory), dirs)
+        for file in files:
+            try:
+                relative_path = os.path.relpath(os.path.join(root, file), directory)
+                # Normalize path separators
+                relative_path = relative_path.replace('\\', '/')
+            except ValueError:
+                # Handle different drives on Windows
+                full_path = os.path.join(root, file)
+                # Use path relative to the directory's drive
+                try:
+                    # Remove the directory prefix manually if on same drive
+                    if full_path.startswith(directory):
+                        relative_path = full_path[len(directory):].lstrip('\\/')
+                        relative_path = relative_path.replace('\\', '/')
+                    else:
+                        continue
+                except:
+                    # If all else fails, use basename
+                    relative_path = os.path.basename(full_path)
+            if scan_filter and not scan_filter.accepts_file(relative_path, os.path.join(root, file)):
+                continue
+            file_set.add(relative_path)
+    return file_set
+
+def _build_size_index(directory, wanted_sizes, scan_filter=None):
+    """
+        Index the files of a tree by size, keeping only the sizes that are looked up.
+        
+        Parameters:
+        - directory: Root of the tree.
+        - wanted_sizes: Set of file sizes of interest.
+        - scan_filter: Optional ScanFilter applied to the walk.
+
+        Returns:
+        - A dict {size: [(relative path, os.stat_result)]}.
+    """
+    size_index = {}
+    for root, dirs, files in os.walk(directory):
+        relative_root = _relative_walk_root(root, directory)
+        if scan_filter:
+            scan_filter.prune(relative_root, dirs)
+        for file in files:
+            relative_path = f"{relative_root}/{file}" if relative_root else file
+            full_path = os.path.join(root, file)
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            if st.st_size not in wanted_sizes:
+                continue
+            if scan_filter and not scan_filter.accepts_file(relative_path, full_path, st):
+                continue
+            size_index.setdefault(st.st_size, []).append((relative_path, st))
+    return size_index
+
+def find_content_matches(extracted_path, reference_path, missing_files, extra_files, verifier=None,
+                         scan_filter=None, progress_callback=None):
+    """
+        Look for the content of missing and extra files anywhere in the other tree.
+        
+        A missing file whose content still exists in the extracted tree was moved or
+        renamed rather than lost; an extra file whose content exists in the reference
+        is a copy rather than new data. Both trees are indexed by size first, so only
+        files that have a same-size candidate are ever hashed.
+        
+        Parameters:
+        - extracted_path: Path to the extracted archive directory.
+        - reference_path: Path to the reference directory.
+        - missing_files: Relative paths present only in the reference.
+        - extra_files: Relative paths present only in the extracted tree.
+        - verifier: Optional FileVerifier providing the hashing options (throttle,
+          tree digests, inode cache); a default one is created otherwise.
+        - scan_filter: Optional ScanFilter applied when indexing the trees.
+        - progress_callback: Optional function receiving progress messages.
+
+        Returns:
+        - A dict with 'missing_found_in_extracted' {missing path: [extracted paths]},
+          'extra_found_in_reference' {extra path: [reference paths]}, the number of
+          missing files whose content is really lost, the number of extra files with
+          new content and the number of files hashed.
+    """
+    if verifier is None:
+        verifier = FileVerifier(extracted_path, reference_path)
+    digests = {}  # full path -> digest, each file is hashed at most once
+    
+    def digest_of(full_path, st):
+        if full_path not in digests:
+            use_tree = (verifier.large_file_threshold is not None
+                        and st.st_size >= verifier.large_file_threshold)
+            digests[full_path] = verifier.hash_file(full_path, st, use_tree)
+        return digests[full_path]
+    
+    def match(queries, query_root, candidate_root, label):
+        queried = []
+        for relative_path in queries:
+            try:
+                queried.append((relative_path, os.stat(os.path.join(query_root, relative_path.replace('/', os.sep)))))
+            except OSError:
+                continue
+        if not queried:
+            return {}, len(queries)
+        if progress_callback:
+            progress_callback(f"🧭 Indexing {label} ({len(queried):,} files to locate)...")
+        size_index = _build_size_index(candidate_root, {st.st_size for _, st in queried}, scan_filter)
+        
+        found = {}
+        for relative_path, st in queried:
+            candidates = size_index.get(st.st_size)
+            if not candidates:
+                continue
+            query_digest = digest_of(os.path.join(query_root, relative_path.replace('/', os.sep)), st)
+            if query_digest == "ERROR_READING_FILE":
+                continue
+            same_content = [candidate_path for candidate_path, candidate_st in candidates
+                            if digest_of(os.path.join(candidate_root, candidate_path.replace('/', os.sep)),
+                                         candidate_st) == query_digest]
+            if same_content:
+                found[relative_path] = sorted(same_content)
+        return found, len(queries) - len(found)
+    
+    missing_found, missing_lost = match(missing_files, reference_path, extracted_path, "extracted tree")
+    extra_found, extra_new = match(extra_files, extracted_path, reference_path, "reference tree")
+    return {
+        "missing_found_in_extracted": missing_found,
+        "extra_found_in_reference": extra_found,
+        "num_missing_lost": missing_lost,
+        "num_extra_new": extra_new,
+        "files_hashed": len(digests)
+    }
+
+SCAN_WORKERS = 8  # threads listing directories concurrently (network shares: one round-trip per listing)
+
+def _list_directory_entries(directory, relative_root, scan_filter=None, top_level=None, scope=None):
+    """
+        List one directory of a walk: returns (file paths, directory paths, directories to descend into).
+    """
+    full_root = os.path.join(directory, relative_root.replace('/', os.sep)) if relative_root else directory
+    try:
+        with os.scandir(full_root) as iterator:
+            entries = list(iterator)
+    except OSError:
+        return [], [], []
+    if top_level is not None and not relative_root:
+        entries = [entry for entry in entries if entry.name in top_level]
+    # Above the scoped subtrees: keep only what is in scope or leads to it
+    outside_scope = scope is not None and not scope.contains(relative_root)
+    passing_through = set()
+    
+    dir_entries = {}
+    file_paths = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        relative_path = f"{relative_root}/{entry.name}" if relative_root else entry.name
+        if outside_scope and not scope.contains(relative_path):
+            if not (is_dir and scope.leads_to(relative_path)):
+                continue
+            passing_through.add(relative_path)
+        if is_dir:
+            dir_entries[entry.name] = entry
+        else:
+            if scan_filter and not scan_filter.accepts_file(relative_path, entry.path):
+                continue
+            file_paths.append(relative_path)
+    
+    dir_names = list(dir_entries)
+    if scan_filter:
+        scan_filter.prune(relative_root, dir_names)
+    dir_paths = [f"{relative_root}/{name}" if relative_root else name for name in dir_names]
+    # Like os.walk, symbolic links to directories are listed but not followed
+    subdirs = [dir_path for name, dir_path in zip(dir_names, dir_paths) if not dir_entries[name].is_symlink()]
+    if passing_through:
+        dir_paths = [dir_path for dir_path in dir_paths if dir_path not in passing_through]
+    return file_paths, dir_paths, subdirs
+
+def scan_directory_tree(directory, scan_filter=None, max_workers=SCAN_WORKERS, top_level=None, scope=None):
+    """
+        Walk a tree with several threads and return its files and directories.
+        
+        Directories are listed with os.scandir by up to max_workers threads. Each
+        thread takes its next directory from its own deque (depth first) and steals
+        the oldest pending directory of another thread when its deque is empty, so
+        the listing round-trips of a network share overlap. The results are exactly
+        those of get_file_list and get_directory_list (same filter, symlinked
+        directories listed but not followed, unreadable directories skipped).
+        
+        Parameters:
+        - directory: Path to the directory.
+        - scan_filter: Optional ScanFilter; excluded directories are pruned and
+          excluded files are left out.
+        - max_workers: Maximum number of concurrent directory listings.
+        - top_level: Optional collection of names; only these entries of the root
+          directory (and what lies below them) are listed.
+        - scope: Optional ScanScope; only the scoped subtrees are listed (and the
+          directories leading to them walked through).
+
+        Returns:
+        - A tuple (set of file paths, set of directory paths) relative to the directory.
+    """
+    def list_directory(relative_root):
+        return _list_directory_entries(directory, relative_root, scan_filter, top_level, scope)
+    
+    files = set()
+    dirs = set()
+    max_workers = max(1, max_workers or 1)
+    if max_workers == 1:
+        pending = ['']
+        while pending:
+            file_paths, dir_paths, subdirs = list_directory(pending.pop())
+            files.update(file_paths)
+            dirs.update(dir_paths)
+            pending.extend(subdirs)
+        return files, dirs
+    
+    deques = [collections.deque() for _ in range(max_workers)]
+    deques[0].append('')
+    condition = threading.Condition()
+    state = {'outstanding': 1, 'error': None}
+    results = [([], []) for _ in range(max_workers)]
+    
+    def steal(index):
+        for offset in range(1, max_workers):
+            try:
+                return deques[(index + offset) % max_workers].popleft()
+            except IndexError:
+                continue
+        return None
+    
+    def worker(index):
+        own = deques[index]
+        while True:
+            try:
+                relative_root = own.pop()
+            except IndexError:
+                relative_root = steal(index)
+            if relative_root is None:
+                with condition:
+                    if state['outstanding'] == 0:
+                        return
+                    condition.wait(0.05)
+                continue
+            
+            try:
+                file_paths, dir_paths, subdirs = list_directory(relative_root)
+            except Exception as e:
+                file_paths, dir_paths, subdirs = [], [], []
+                state['error'] = state['error'] or e
+            results[index][0].extend(file_paths)
+            results[index][1].extend(dir_paths)
+            with condition:
+                own.extend(subdirs)
+                state['outstanding'] += len(subdirs) - 1
+                if state['outstanding'] == 0:
+                    condition.notify_all()
+                elif subdirs:
+                    condition.notify(len(subdirs))
+    
+    threads = [threading.Thread(target=worker, args=(index,), name=f"tree-walker-{index}", daemon=True)
+               for index in range(max_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if state['error']:
+        raise state['error']
+    for file_paths, dir_paths in results:
+        files.update(file_paths)
+        dirs.update(dir_paths)
+    return files, dirs
+
+def _relative_walk_root(root, directory):
+    """
+        Relative, '/' separated path of an os.walk root ('' for the top directory).
+    """
+    try:
+        relative_root = os.path.relpath(root, directory).replace('\\', '/')
+    except ValueError:
+        relative_root = root[len(directory):].lstrip('\\/').replace('\\', '/')
+    return '' if relative_root == '.' else relative_root
+
+def format_size(num_bytes):
+    """
+        Format a byte count with a human readable unit.
+        
+        Parameters:
+        - num_bytes: Number of bytes.
+
+        Returns:
+        - A string such as '12.34 MB'.
+    """
+    if num_bytes < 1024:
+        return f"{int(num_bytes)} bytes"
+    elif num_bytes < 1024 * 1024:
+        return f"{num_bytes / 1024:.2f} KB"
+    elif num_bytes < 1024 * 1024 * 1024:
+        return f"{num_bytes / (1024 * 1024):.2f} MB"
+    else:
+        return f"{num_bytes / (1024 * 1024 * 1024):.2f} GB"
+
+def format_duration(seconds):
+    """
+        Format a duration in seconds as HH:MM:SS.
+        
+        Parameters:
+        - seconds: Duration in seconds, or None when unknown.
+
+        Returns:
+        - A string such as '01:02:03', or '--:--:--' when the duration is unknown.
+    """
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+#### checksum lists
+CHECKSUM_WORKERS = min(8, os.cpu_count() or 1)
+CHECKSUM_BATCH = 1024  # files submitted to the hashing threads at a time
+CHECKSUM_DIGEST_LENGTHS = {32: 'md5', 40: 'sha1', 56: 'sha224', 64: 'sha256', 96: 'sha384', 128: 'sha512'}
+CHECKSUM_BSD_TAGS = {'md5': 'MD5', 'sha1': 'SHA1', 'sha224': 'SHA224', 'sha256': 'SHA256', 'sha384': 'SHA384',
+                     'sha512': 'SHA512', 'blake2b': 'BLAKE2b'}
+CHECKSUM_BSD_LINE = re.compile(r'^(?P<tag>[A-Za-z0-9-]+) \((?P<path>.*)\) = (?P<digest>[0-9a-fA-F]+)$')
+CHECKSUM_GNU_LINE = re.compile(r'^(?P<digest>[0-9a-fA-F]+) (?P<mode>[ *])(?P<path>.+)$')
+
+def checksum_algorithm_for_name(file_name):
+    """
+        Guess the algorithm of a checksum list from its name (SHA256SUMS, archive.md5, B2SUMS...).
+        
+        Only whole dot-separated parts of the name count: '<algorithm>', '<algorithm>sum'
+        or '<algorithm>sums' (e.g. 'SHA256SUMS', 'archive.sha256', 'B2SUMS', 'disk.b2'),
+        never a substring such as the 'b2' of 'job2SUMS'.
+        
+        Returns:
+        - A hashlib algorithm name, or None when the name gives no hint.
+    """
+    parts = os.path.basename(file_name).lower().split('.')
+    for hint, algorithm in (('sha512', 'sha512'), ('sha384', 'sha384'), ('sha256', 'sha256'), ('sha224', 'sha224'),
+                            ('sha1', 'sha1'), ('md5', 'md5'), ('b2', 'blake2b')):
+        if any(part in (hint, hint + 'sum', hint + 'sums') for part in parts):
+            return algorithm
+    return None
+
+def _unescape_checksum_path(path):
+    return re.sub(r'\\(.)', lambda match: {'n': '\n', 'r': '\r', '\\': '\\'}.get(match.group(1), match.group(0)), path)
+
+def _blake2b_algorithm(bits, digest):
+    """
+        Algorithm name of a BLAKE2b digest of the given size in bits, or None when the
+        size is invalid or does not match the digest.
+    """
+    if not bits.isdigit() or int(bits) % 8 or not 8 <= int(bits) <= 512 or int(bits) != len(digest) * 4:
+        return None
+    return 'blake2b' if int(bits) == 512 else f"blake2b-{bits}"
+
+def parse_checksum_list(list_path):
+    """
+        Read a checksum list in the GNU format ('<digest>  <path>', '*' before binary paths)
+        or the BSD/--tag format ('SHA256 (<path>) = <digest>'), with the GNU escaping of
+        paths holding a backslash or a newline.
+        
+        Parameters:
+        - list_path: Path of the list (SHA256SUMS, *.md5...).
+
+        The algorithm of a GNU line is inferred from the length of its digest; the name of
+        the list only decides between algorithms with the same digest length (B2SUMS:
+        BLAKE2b rather than SHA-512). A name hint contradicted by the digest length is
+        ignored and the line counted as a name conflict, except for BLAKE2b whose digest
+        length is chosen when hashing (b2sum -l 256: 'blake2b-256', also read from the
+        'BLAKE2b-256' tags of the BSD format).
+        
+        Returns:
+        - A tuple (dict path -> (algorithm, lowercase digest), number of malformed lines,
+          format 'gnu', 'bsd' or 'mixed', number of name conflicts). Paths are '/'
+          separated, without a leading './'.
+    """
+    name_algorithm = checksum_algorithm_for_name(list_path)
+    name_digest_length = hashlib.new(name_algorithm).digest_size * 2 if name_algorithm else None
+    entries = {}
+    malformed = 0
+    name_conflicts = 0
+    formats = set()
+    with open(list_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            escaped = line.startswith('\\')
+            if escaped:
+                line = line[1:]
+            
+            match = CHECKSUM_BSD_LINE.match(line)
+            if match:
+                tag = match.group('tag').lower()
+                if tag.startswith('blake2b'):
+                    # 'BLAKE2b-256 (...)': the digest size is part of the tag
+                    bits = tag[len('blake2b-'):] if tag.startswith('blake2b-') else str(len(match.group('digest')) * 4)
+                    algorithm = _blake2b_algorithm(bits, match.group('digest'))
+                else:
+                    algorithm = tag.replace('-', '')
+                formats.add('bsd')
+            else:
+                match = CHECKSUM_GNU_LINE.match(line)
+                if not match:
+                    malformed += 1
+                    continue
+                digest_length = len(match.group('digest'))
+                if name_algorithm and digest_length == name_digest_length:
+                    algorithm = name_algorithm
+                elif name_algorithm == 'blake2b':
+                    algorithm = _blake2b_algorithm(str(digest_length * 4), match.group('digest'))
+                else:
+                    algorithm = CHECKSUM_DIGEST_LENGTHS.get(digest_length)
+                    if name_algorithm:
+                        name_conflicts += 1
+                formats.add('gnu')
+            if algorithm is None or not (algorithm in hashlib.algorithms_available
+                                         or BLAKE2B_SIZED_ALGORITHM.match(algorithm)):
+                malformed += 1
+                continue
+            
+            path = match.group('path')
+            if escaped:
+                path = _unescape_checksum_path(path)
+            while path.startswith('./'):
+                path = path[2:]
+            entries[path] = (algorithm, match.group('digest').lower())
+    list_format = formats.pop() if len(formats) == 1 else ('mixed' if formats else 'gnu')
+    return entries, malformed, list_format, name_conflicts
+
+def format_checksum_line(relative_path, digest, algorithm='sha256', style='gnu'):
+    """
+        Format one line of a checksum list ('gnu' as written by sha256sum, 'bsd' as with --tag).
+    """
+    escaped = any(char in relative_path for char in '\\\n\r')
+    if escaped:
+        relative_path = relative_path.replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r')
+    prefix = '\\' if escaped else ''
+    if style == 'bsd':
+        sized = BLAKE2B_SIZED_ALGORITHM.match(algorithm)
+        tag = f"BLAKE2b-{sized.group(1)}" if sized else CHECKSUM_BSD_TAGS.get(algorithm, algorithm.upper())
+        return f"{prefix}{tag} ({relative_path}) = {digest}\n"
+    return f"{prefix}{digest}  {relative_path}\n"
+
+def _hash_in_parallel(paths, full_path, algorithms, max_workers, stats=None, throttle=None, cache_hints=False):
+    """
+        Hash files on a thread pool, in batches, yielding (relative path, digest) in input order.
+    """
+    def hash_one(relative_path):
+        return calculate_file_hash(full_path(relative_path), algorithms(relative_path), stats=stats,
+                                   cache_hints=cache_hints, throttle=throttle)
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or CHECKSUM_WORKERS) as executor:
+        for start in range(0, len(paths), CHECKSUM_BATCH):
+            batch = paths[start:start + CHECKSUM_BATCH]
+            yield from zip(batch, executor.map(hash_one, batch))
+
+def verify_checksum_list(list_path, base_dir=None, max_workers=None, check_extra=True, scan_filter=None,
+                         throttle=None, cache_hints=False, progress_callback=None, stats_callback=None,
+                         result_callback=None):
+    """
+        Verify the files of a directory against a checksum list (SHA256SUMS, *.md5...).
+        
+        Parameters:
+        - list_path: Path of the checksum list (see parse_checksum_list).
+        - base_dir: Directory the listed paths are relative to (default: the list's directory).
+        - max_workers: Number of hashing threads (default: CHECKSUM_WORKERS).
+        - check_extra: Also report the files of base_dir that are not listed.
+        - scan_filter: Optional ScanFilter applied when looking for unlisted files.
+        - throttle / cache_hints: See calculate_file_hash.
+        - progress_callback / stats_callback / result_callback: See compare_archives_with_progress.
+
+        Returns:
+        - A report in the schema of compare_archives_with_progress: listed files that are
+          absent are missing, unlisted files extra, digest mismatches modified (with the
+          listed digest as 'hash_ref', 'size_ref' unknown and the algorithm as 'hash_type');
+          a 'checksum_list' block describes the list.
+    """
+    def update_progress(message):
+        if progress_callback:
+            progress_callback(message)
+    
+    stats = ComparisonStats()
+    stats.start_phase('scan')
+    update_progress(f"Reading checksum list {os.path.basename(list_path)}...")
+    entries, malformed, list_format, name_conflicts = parse_checksum_list(list_path)
+    if name_conflicts:
+        update_progress(f"⚠️ {name_conflicts} digests do not match the algorithm suggested by the list name "
+                        f"({checksum_algorithm_for_name(list_path)}): algorithm taken from the digest length")
+    base_dir = base_dir or os.path.dirname(os.path.abspath(list_path))
+    
+    def full_path(relative_path):
+        return relative_path if os.path.isabs(relative_path) else os.path.join(base_dir, relative_path.replace('/', os.sep))
+    
+    missing_files = []
+    present = []
+    for relative_path in sorted(entries):
+        (present if os.path.isfile(full_path(relative_path)) else missing_files).append(relative_path)
+    extra_files = []
+    if check_extra:
+        update_progress("Scanning for unlisted files...")
+        files, _ = scan_directory_tree(base_dir, scan_filter)
+        list_relative = os.path.relpath(os.path.abspath(list_path), os.path.abspath(base_dir)).replace('\\', '/')
+        extra_files = sorted(path for path in files if path not in entries and path != list_relative)
+    stats.add_files(len(entries))
+    if result_callback and (missing_files or extra_files):
+        result_callback('differences', {"missing_files": missing_files, "extra_files": extra_files,
+                                        "missing_directories": [], "extra_directories": []})
+    
+    stats.start_phase('hash')
+    update_progress(f"🔐 Checking integrity of {len(present)} listed files...")
+    modified_files = []
+    progress_every = max(50, len(present) // 100)
+    hashed = _hash_in_parallel(present, full_path, lambda relative_path: entries[relative_path][0], max_workers,
+                               stats=stats, throttle=throttle, cache_hints=cache_hints)
+    for i, (relative_path, digest) in enumerate(hashed):
+        if i % progress_every == 0:
+            snapshot = stats.snapshot(i, len(present))
+            update_progress(f"🔐 Checking file integrity... {i + 1:,}/{len(present):,} "
+                            f"({int(i / len(present) * 100)}%) - {format_size(snapshot['bytes_per_second'])}/s, "
+                            f"ETA {format_duration(snapshot['eta_seconds'])}")
+            if stats_callback:
+                stats_callback(snapshot)
+        stats.add_files()
+        algorithm, expected = entries[relative_path]
+        if digest == expected:
+            continue
+        try:
+            size_ext = os.path.getsize(full_path(relative_path))
+        except OSError:
+            size_ext = 0
+        modified_entry = {
+            'file': relative_path,
+            'hash_ref': expected,
+            'hash_ext': digest,
+            'size_ref': None,
+            'size_ext': size_ext,
+            'hash_type': algorithm
+        }
+        if digest == "ERROR_READING_FILE":
+            modified_entry['error'] = "unreadable"
+        modified_files.append(modified_entry)
+        if result_callback:
+            result_callback('modified', modified_entry)
+    if stats_callback and present:
+        stats_callback(stats.snapshot(len(present), len(present)))
+    
+    stats.start_phase('report')
+    update_progress("Generating final report...")
+    report = {
+        "missing_files": missing_files,
+        "extra_files": extra_files,
+        "modified_files": modified_files,
+        "missing_directories": [],
+        "extra_directories": [],
+        "num_missing": len(missing_files),
+        "num_extra": len(extra_files),
+        "num_modified": len(modified_files),
+        "num_missing_dirs": 0,
+        "num_extra_dirs": 0,
+        "num_common": len(present) - len(modified_files),
+        "checksum_list": {
+            "path": list_path,
+            "base_dir": base_dir,
+            "format": list_format,
+            "algorithms": sorted({algorithm for algorithm, _ in entries.values()}),
+            "entries": len(entries),
+            "malformed_lines": malformed,
+            "name_conflicts": name_conflicts
+        }
+    }
+    if scan_filter:
+        report["filters"] = scan_filter.to_dict()
+    stats.end_phase()
+    report["stats"] = stats.to_dict()
+    if throttle:
+        report["throttling"] = throttle.to_dict()
+    return report
+
+def write_checksum_list(directory, output_path, algorithm='sha256', style='gnu', scan_filter=None, max_workers=None,
+                        throttle=None, cache_hints=False, progress_callback=None):
+    """
+        Hash every file of a directory and write a checksum list that sha256sum -c / md5sum -c
+        (or verify_checksum_list) can check later without a second tree.
+        
+        Parameters:
+        - directory: Directory to scan; the listed paths are relative to it.
+        - output_path: Path of the list to write (replaced atomically).
+        - algorithm: hashlib algorithm (sha256, md5, sha1, sha512...).
+        - style: 'gnu' ('<digest>  <path>') or 'bsd' ('SHA256 (<path>) = <digest>').
+        - scan_filter: Optional ScanFilter.
+        - max_workers: Number of hashing threads (default: CHECKSUM_WORKERS).
+        - throttle / cache_hints: See calculate_file_hash.
+        - progress_callback: Function to call for progress updates.
+
+        Returns:
+        - A dict with output_path, algorithm, style, files (written lines) and
+          unreadable (paths left out because they could not be read).
+    """
+    def update_progress(message):
+        if progress_callback:
+            progress_callback(message)
+    
+    update_progress(f"Scanning {directory}...")
+    files, _ = scan_directory_tree(directory, scan_filter)
+    output_relative = os.path.relpath(os.path.abspath(output_path), os.path.abspath(directory)).replace('\\', '/')
+    paths = sorted(path for path in files if path != output_relative)
+    
+    written = 0
+    unreadable = []
+    progress_every = max(50, len(paths) // 100)
+    fd, temporary_path = tempfile.mkstemp(prefix=".chckfiles-", suffix=".sums",
+                                          dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape', newline='\n') as f:
+            hashed = _hash_in_parallel(paths, lambda relative_path: os.path.join(directory, relative_path.replace('/', os.sep)),
+                                       lambda relative_path: algorithm, max_workers, throttle=throttle,
+                                       cache_hints=cache_hints)
+            for i, (relative_path, digest) in enumerate(hashed):
+                if i % progress_every == 0:
+                    update_progress(f"🧾 Hashing {i + 1:,}/{len(paths):,} files ({algorithm})...")
+                if digest == "ERROR_READING_FILE":
+                    unreadable.append(relative_path)
+                    continue
+                f.write(format_checksum_line(relative_path, digest, algorithm, style))
+                written += 1
+        os.replace(temporary_path, output_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return {
+        'output_path': output_path,
+        'algorithm': algorithm,
+        'style': style,
+        'files': written,
+        'unreadable': unreadable
+    }
+
+#### console log
+def classify_console_message(message, tag=None):
+    """
+        Color tag of a console message, derived from its icons and keywords
+        (French and English). Returns the given tag when no keyword matches.
+    """
+    lower_message = message.lower()
+    if ("✨" in message or "✅" in message or 
+        "successfully" in lower_message or "success" in lower_message or
+        "réussi" in lower_message or "parfaitement" in lower_message or
+        "terminé avec succès" in lower_message or "aucun doublon" in lower_message):
+        tag = 'success'
+    elif ("❌" in message or 
+          "error" in lower_message or "failed" in lower_message or
+          "erreur" in lower_message or "échec" in lower_message):
+        tag = 'error'
+    elif ("⚠️" in message or 
+          "warning" in lower_message or "attention" in lower_message or
+          "impossible" in lower_message or "interrompue" in lower_message):
+        tag = 'warning'
+    elif ("🔍" in message or "🔄" in message or "📊" in message or "🔐" in message or
+          "checking" in lower_message or "scanning" in lower_message or
+          "analyse" in lower_message or "comparaison" in lower_message or
+          "vérification" in lower_message or "traitement" in lower_message or
+          "génération" in lower_message):
+        tag = 'info'
+    elif ("MISSING" in message or "MANQUANTS" in message or "manquant" in lower_message):
+        tag = 'missing'
+    elif ("EXTRA" in message or "SUPPLÉMENTAIRES" in message or "supplémentaire" in lower_message):
+        tag = 'extra'
+    elif ("MODIFIED" in message or "MODIFIÉS" in message or "modifié" in lower_message or
+          "doublons" in lower_message or "duplicate" in lower_message):
+        tag = 'modified'
+    return tag
+
+class ConsoleRecord:
+    """
+        One console message: timestamp, color tag, text and the path it is about.
+        Record ids keep increasing across clears of the log.
+    """
+
+    __slots__ = ('record_id', 'timestamp', 'tag', 'message', 'path')
+
+    def __init__(self, record_id, timestamp, tag, message, path):
+        self.record_id = record_id
+        self.timestamp = timestamp
+        self.tag = tag
+        self.message = message
+        self.path = path
+
+    @property
+    def num_lines(self):
+        return self.message.count('\n') + 1
+
+    def searchable_text(self):
+        return f"{self.message}\n{self.path}" if self.path else self.message
+
+class ConsoleLog:
+    """
+        Structured console output with a search index.
+        
+        Records are indexed by tag as they are appended. For text searches the log
+        is kept as one string of newline-terminated records (extended with the new
+        records before each search) with the offset of every record, so a query is a
+        single compiled-regex scan in C (multiline: '^' and '$' anchor at the lines of
+        the records) and each hit is mapped back to its record with a binary search;
+        the Text widgets are never scanned.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.first_id = 0
+        self._tag_index = {}
+        self._text = ""
+        self._offsets = array('Q')
+        self._indexed = 0
+
+    def append(self, timestamp, tag, message, path=None):
+        record = ConsoleRecord(self.first_id + len(self.records), timestamp, tag, message, path)
+        self._tag_index.setdefault(tag, array('I')).append(len(self.records))
+        self.records.append(record)
+        return record
+
+    def clear(self):
+        """
+            Drop the records; ids keep increasing.
+        """
+        self.first_id += len(self.records)
+        self.records = []
+        self._tag_index = {}
+        self._text = ""
+        self._offsets = array('Q')
+        self._indexed = 0
+
+    def get(self, record_id):
+        position = record_id - self.first_id
+        if 0 <= position < len(self.records):
+            return self.records[position]
+        return None
+
+    def __len__(self):
+        return len(self.records)
+
+    def _update_text_index(self):
+        if self._indexed == len(self.records):
+            return
+        parts = []
+        offset = len(self._text)
+        for record in self.records[self._indexed:]:
+            text = record.searchable_text() + "\n"
+            self._offsets.append(offset)
+            offset += len(text)
+            parts.append(text)
+        self._text += "".join(parts)
+        self._indexed = len(self.records)
+
+    def search(self, query, regex=False, tags=None, case_sensitive=False, limit=None):
+        """
+            Find the records matching a query.
+            
+            Parameters:
+            - query: Substring, or regular expression when regex is True ('' matches all).
+            - tags: Optional collection of tags the records must have.
+            - case_sensitive: Match the case of the query.
+            - limit: Maximum number of results.
+
+            Returns:
+            - The matching records, in log order.
+        """
+        if not query:
+            if tags:
+                positions = heapq.merge(*[self._tag_index.get(tag, ()) for tag in tags])
+            else:
+                positions = range(len(self.records))
+            results = []
+            for position in positions:
+                results.append(self.records[position])
+                if limit and len(results) >= limit:
+                    break
+            return results
+        
+        pattern = re.compile(query if regex else re.escape(query),
+                             re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE)
+        self._update_text_index()
+        text = self._text
+        offsets = self._offsets
+        results = []
+        position = 0
+        while True:
+            match = pattern.search(text, position)
+            if match is None:
+                break
+            index = bisect.bisect_right(offsets, match.start()) - 1
+            # Next record; a match spilling over the end of its record is retried inside it
+            position = offsets[index + 1] if index + 1 < len(offsets) else len(text)
+            if match.end() > position - 1 and pattern.search(text, match.start(), position - 1) is None:
+                continue
+            record = self.records[index]
+            if tags and record.tag not in tags:
+                continue
+            results.append(record)
+            if limit and len(results) >= limit:
+                break
+            if position >= len(text):
+                break
+        return results
+
+class VirtualConsoleView:
+    """
+        Console widget showing only the visible window of a ConsoleLog.
+        
+        The Text widget holds just the records that fit on screen; the scrollbar and
+        the mouse wheel move a window over the records of the log. New records are
+        appended at the bottom while the view follows the end of the log and the
+        records scrolled out at the top are dropped, so both opening a console and
+        logging a message cost the same however long the session has been.
+    """
+
+    TAG_COLORS = {
+        'timestamp': '#569CD6',  # Blue for timestamps
+        'success': '#4EC9B0',    # Green for success
+        'error': '#F44747',      # Red for errors
+        'warning': '#FFCC02',    # Yellow for warnings
+        'info': '#9CDCFE',       # Light blue for info
+        'missing': '#F48771',    # Light red for missing
+        'extra': '#B5CEA8',      # Light green for extra
+        'modified': '#DCDCAA'    # Light yellow for modified
+    }
+
+    def __init__(self, parent, console_log, banner=(), **text_options):
+        """
+            Parameters:
+            - parent: Parent widget; place the view with view.frame.grid/pack.
+            - console_log: ConsoleLog displayed.
+            - banner: (text, tag) lines shown above the first record.
+            - text_options: Options of the Text widget (font, colors, wrap, height...).
+        """
+        self.log = console_log
+        self.banner = list(banner)
+        self.frame = ttk.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+        
+        self.text = tk.Text(self.frame, **text_options)
+        self.text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        if text_options.get('wrap') == tk.NONE:
+            x_scrollbar = ttk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self.text.xview)
+            x_scrollbar.grid(row=1, column=0, sticky=(tk.W, tk.E))
+            self.text.configure(xscrollcommand=x_scrollbar.set)
+        for tag, color in self.TAG_COLORS.items():
+            self.text.tag_configure(tag, foreground=color)
+        self.text.tag_configure('search_highlight', background='#FFFF00', foreground='#000000')
+        self.text.configure(state=tk.DISABLED)
+        self._line_height = max(1, tkfont.Font(font=self.text.cget('font')).metrics('linespace'))
+        
+        self.start_id = console_log.first_id  # Records before this id were cleared from the view
+        self.top_id = None                    # None: follow the end of the log
+        self.rendered = []                    # (record id, number of lines) currently in the widget
+        self.banner_lines = 0
+        self.highlight_id = None
+        
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.text.bind(sequence, self._on_mouse_wheel)
+        self.text.bind('<Prior>', lambda event: self._scroll_pages(-1))
+        self.text.bind('<Next>', lambda event: self._scroll_pages(1))
+        self.text.bind('<Control-Home>', lambda event: self.scroll_to(self._range()[0]))
+        self.text.bind('<Control-End>', lambda event: self.scroll_to(None))
+        self.text.bind('<Configure>', lambda event: self.render())
+        self.render()
+
+    def _range(self):
+        """
+            Ids [first, end) of the records shown by this view.
+        """
+        first = max(self.start_id, self.log.first_id)
+        return first, self.log.first_id + len(self.log)
+
+    def _visible_lines(self):
+        height = self.text.winfo_height()
+        if height <= 1:
+            # Not mapped yet
+            return int(self.text.cget('height'))
+        return max(1, height // self._line_height)
+
+    def _insert_record(self, record):
+        tags = (record.tag, 'search_highlight') if record.record_id == self.highlight_id else record.tag
+        self.text.insert(tk.END, f"[{record.timestamp}] ", 'timestamp', f"{record.message}\n", tags)
+        self.rendered.append((record.record_id, record.num_lines))
+
+    def render(self):
+        """
+            Redraw the visible window of records.
+        """
+        first, end = self._range()
+        visible = self._visible_lines()
+        if self.top_id is None:
+            # Follow the end: go back from the last record until the window is full
+            top = end
+            lines = 0
+            while top > first and lines < visible:
+                top -= 1
+                lines += self.log.get(top).num_lines
+        else:
+            top = min(max(self.top_id, first), max(first, end - 1))
+        
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.rendered = []
+        self.banner_lines = 0
+        lines = 0
+        if top == first:
+            for text, tag in self.banner:
+                self.text.insert(tk.END, text + "\n", tag)
+                self.banner_lines += text.count("\n") + 1
+            lines = self.banner_lines
+        record_id = top
+        while record_id < end and lines < visible + 1:
+            record = self.log.get(record_id)
+            self._insert_record(record)
+            lines += record.num_lines
+            record_id += 1
+        self.text.configure(state=tk.DISABLED)
+        if self.top_id is None:
+            self.text.see(tk.END)
+        self._update_scrollbar()
+
+    def on_append(self, record):
+        """
+            Show a record just added to the log (constant work while following the end).
+        """
+        if record.record_id < self.start_id:
+            return
+        if self.top_id is not None:
+            self._update_scrollbar()
+            return
+        
+        self.text.configure(state=tk.NORMAL)
+        self._insert_record(record)
+        visible = self._visible_lines()
+        total_lines = self.banner_lines + sum(num_lines for _, num_lines in self.rendered)
+        # Drop what scrolled out at the top
+        if self.banner_lines and total_lines - self.banner_lines >= visible:
+            self.text.delete('1.0', f"{self.banner_lines + 1}.0")
+            total_lines -= self.banner_lines
+            self.banner_lines = 0
+        while len(self.rendered) > 1 and total_lines - self.rendered[0][1] >= visible:
+            _, num_lines = self.rendered.pop(0)
+            self.text.delete('1.0', f"{num_lines + 1}.0")
+            total_lines -= num_lines
+        self.text.configure(state=tk.DISABLED)
+        self.text.see(tk.END)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        first, end = self._range()
+        total = end - first
+        if total <= 0 or not self.rendered:
+            self.scrollbar.set(0, 1)
+            return
+        top = self.rendered[0][0] - first
+        self.scrollbar.set(top / total, min(1.0, (top + len(self.rendered)) / total))
+
+    def scroll_to(self, top_id):
+        """
+            Show the window starting at a record id (None, or close to the end: follow the end).
+        """
+        first, end = self._range()
+        if top_id is None or top_id + self._visible_lines() >= end:
+            self.top_id = None
+        else:
+            self.top_id = max(first, top_id)
+        self.render()
+        return "break"
+
+    def _current_top(self):
+        return self.rendered[0][0] if self.rendered else self._range()[0]
+
+    def _scroll_pages(self, pages):
+        return self.scroll_to(self._current_top() + pages * self._visible_lines())
+
+    def _on_scrollbar(self, *args):
+        first, end = self._range()
+        if args[0] == 'moveto':
+            self.scroll_to(first + int(float(args[1]) * (end - first)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self._visible_lines()
+            self.scroll_to(self._current_top() + amount)
+
+    def _on_mouse_wheel(self, event):
+        if event.num == 4:
+            delta = -3
+        elif event.num == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        return self.scroll_to(self._current_top() + delta)
+
+    def show_record(self, record_id):
+        """
+            Scroll to a record and highlight it.
+
+            Returns:
+            - False if the record is no longer shown by this view.
+        """
+        first, end = self._range()
+        if not first <= record_id < end:
+            return False
+        self.highlight_id = record_id
+        self.top_id = max(first, record_id - self._visible_lines() // 3)
+        self.render()
+        return True
+
+    def clear(self, banner=None):
+        """
+            Hide the current records from this view only (the log keeps them).
+        """
+        if banner is not None:
+            self.banner = list(banner)
+        self.start_id = self.log.first_id + len(self.log)
+        self.top_id = None
+        self.highlight_id = None
+        self.render()
+
+    def iter_records(self):
+        first, end = self._range()
+        for record_id in range(first, end):
+            yield self.log.get(record_id)
+
+#### report store
+DEFAULT_REPORT_STORE_PATH = os.path.join(os.path.expanduser("~"), "chckfiles_reports.db")
+REPORT_STORE_INSERT_BATCH = 10000
+
+def _read_export_metadata(file_path, max_bytes=65536):
+    """
+        Read the metadata block at the start of an exported report without parsing
+        the whole file ({} for legacy reports without metadata).
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        head = f.read(max_bytes)
+    match = re.search(r'"metadata"\s*:\s*', head)
+    if not match:
+        return {}
+    try:
+        metadata, _ = json.JSONDecoder().raw_decode(head, match.end())
+    except ValueError:
+        return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+class ReportStore:
+    """
+        SQLite database of comparison runs and of their entries.
+        
+        Each run keeps its summary (counters and the report sections other than the
+        entry lists) and one row per missing/extra/modified file or directory, indexed
+        by path, status, digest and run. Paths are also indexed with FTS5 (trigram
+        tokenizer when available, for substring searches); without FTS5 the path
+        search falls back to LIKE.
+    """
+
+    ENTRY_LISTS = REPORT_LIST_KINDS
+    ENTRY_COLUMNS = ('file', 'hash_ref', 'hash_ext', 'size_ref', 'size_ext', 'error')  # keys of entries with a column
+
+    def __init__(self, db_path=DEFAULT_REPORT_STORE_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self._lock = threading.Lock()
+        self.fts_mode = None
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT,
+                    reference_path TEXT,
+                    extracted_path TEXT,
+                    source TEXT,
+                    num_missing INTEGER,
+                    num_extra INTEGER,
+                    num_modified INTEGER,
+                    num_missing_dirs INTEGER,
+                    num_extra_dirs INTEGER,
+                    num_common INTEGER,
+                    summary_json TEXT
+                );
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+                    path TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    digest_ref TEXT,
+                    digest_ext TEXT,
+                    size_ref INTEGER,
+                    size_ext INTEGER,
+                    error TEXT,
+                    extra TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_run_status ON entries(run_id, status);
+                CREATE INDEX IF NOT EXISTS idx_entries_path ON entries(path);
+                CREATE INDEX IF NOT EXISTS idx_entries_status ON entries(status);
+                CREATE INDEX IF NOT EXISTS idx_entries_digest_ref ON entries(digest_ref);
+                CREATE INDEX IF NOT EXISTS idx_entries_digest_ext ON entries(digest_ext);
+                CREATE TABLE IF NOT EXISTS store_info (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            # Stores created before the 'extra' column (other keys of the modified entries, as JSON)
+            if 'extra' not in {column['name'] for column in self.conn.execute("PRAGMA table_info(entries)")}:
+                self.conn.execute("ALTER TABLE entries ADD COLUMN extra TEXT")
+            row = self.conn.execute("SELECT value FROM store_info WHERE key = 'fts_mode'").fetchone()
+            if row:
+                self.fts_mode = row['value'] or None
+                return
+            # External content FTS table on entries.path; trigram allows substring queries
+            for mode, tokenizer in (("trigram", "tokenize='trigram'"), ("words", "")):
+                try:
+                    self.conn.execute(f"CREATE VIRTUAL TABLE entries_fts USING fts5(path, content='entries', "
+                                      f"content_rowid='id'{', ' + tokenizer if tokenizer else ''})")
+                    self.fts_mode = mode
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            self.conn.execute("INSERT INTO store_info (key, value) VALUES ('fts_mode', ?)", (self.fts_mode or "",))
+
+    def _insert_entries(self, run_id, entries):
+        """
+            Insert (path, kind, status, digest_ref, digest_ext, size_ref, size_ext, error, extra)
+            tuples in batches.
+        """
+        batch = []
+        for entry in entries:
+            batch.append((run_id,) + entry)
+            if len(batch) >= REPORT_STORE_INSERT_BATCH:
+                self.conn.executemany("INSERT INTO entries (run_id, path, kind, status, digest_ref, digest_ext, "
+                                      "size_ref, size_ext, error, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            self.conn.executemany("INSERT INTO entries (run_id, path, kind, status, digest_ref, digest_ext, "
+                                  "size_ref, size_ext, error, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        if self.fts_mode:
+            self.conn.execute("INSERT INTO entries_fts (rowid, path) SELECT id, path FROM entries WHERE run_id = ?",
+                              (run_id,))
+
+    @staticmethod
+    def _entry_row(list_key, item):
+        kind, status = REPORT_LIST_KINDS[list_key]
+        if isinstance(item, dict):
+            # Other keys (hash_type of tree digests, chunk delta, ...) are kept as JSON
+            extra = {key: value for key, value in item.items() if key not in ReportStore.ENTRY_COLUMNS}
+            return (item['file'], kind, status, item.get('hash_ref'), item.get('hash_ext'),
+                    item.get('size_ref'), item.get('size_ext'), item.get('error'),
+                    json.dumps(extra, ensure_ascii=False) if extra else None)
+        return (item, kind, status, None, None, None, None, None, None)
+
+    def _create_run(self, summary, reference_path, extracted_path, timestamp, source):
+        cursor = self.conn.execute(
+            "INSERT INTO runs (timestamp, reference_path, extracted_path, source, num_missing, num_extra, "
+            "num_modified, num_missing_dirs, num_extra_dirs, num_common, summary_json) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (timestamp or str(datetime.datetime.now()), reference_path, extracted_path, source,
+             summary.get('num_missing'), summary.get('num_extra'), summary.get('num_modified'),
+             summary.get('num_missing_dirs'), summary.get('num_extra_dirs'), summary.get('num_common'),
+             json.dumps(summary, ensure_ascii=False)))
+        return cursor.lastrowid
+
+    def add_report(self, report, reference_path=None, extracted_path=None, timestamp=None, source=None):
+        """
+            Store a comparison report as a new run.
+
+            Returns:
+            - The id of the run.
+        """
+        summary = {key: value for key, value in report.items() if key not in self.ENTRY_LISTS}
+        with self._lock, self.conn:
+            run_id = self._create_run(summary, reference_path, extracted_path, timestamp, source)
+            self._insert_entries(run_id, (self._entry_row(list_key, item)
+                                          for list_key in self.ENTRY_LISTS for item in report.get(list_key, [])))
+        return run_id
+
+    def add_report_file(self, file_path):
+        """
+            Store an exported report file as a new run, streaming its entry lists (the
+            other sections of the report are kept in the run summary).
+
+            Returns:
+            - The id of the run.
+        """
+        metadata = _read_export_metadata(file_path)
+        counts = {}
+        summary = {}
+        
+        def rows():
+            for key, value in iter_report_members(file_path, self.ENTRY_LISTS):
+                if key in self.ENTRY_LISTS:
+                    counts[key] = counts.get(key, 0) + 1
+                    yield self._entry_row(key, value)
+                else:
+                    summary[key] = value
+        
+        with self._lock, self.conn:
+            run_id = self._create_run({}, metadata.get('reference_path'), metadata.get('extracted_path'),
+                                      metadata.get('timestamp'), file_path)
+            self._insert_entries(run_id, rows())
+            if 'num_missing' not in summary or 'num_extra' not in summary:
+                raise ValueError(f"Not a comparison report (missing counters): {file_path}")
+            summary.update({
+                'num_missing': counts.get('missing_files', 0),
+                'num_extra': counts.get('extra_files', 0),
+                'num_modified': counts.get('modified_files', 0),
+                'num_missing_dirs': counts.get('missing_directories', 0),
+                'num_extra_dirs': counts.get('extra_directories', 0)
+            })
+            self.conn.execute("UPDATE runs SET num_missing = ?, num_extra = ?, num_modified = ?, num_missing_dirs = ?, "
+                              "num_extra_dirs = ?, num_common = ?, summary_json = ? WHERE id = ?",
+                              (summary['num_missing'], summary['num_extra'], summary['num_modified'],
+                               summary['num_missing_dirs'], summary['num_extra_dirs'], summary.get('num_common'),
+                               json.dumps(summary, ensure_ascii=False), run_id))
+        return run_id
+
+    def find_run(self, source, timestamp):
+        """
+            Id of the latest run stored from a given source with a given timestamp, or None.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT id FROM runs WHERE source = ? AND timestamp = ? ORDER BY id DESC LIMIT 1",
+                                    (source, timestamp)).fetchone()
+        return row['id'] if row else None
+
+    def list_runs(self, limit=200):
+        """
+            Most recent runs first, as dicts (without the summary JSON).
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT id, timestamp, reference_path, extracted_path, source, num_missing, "
+                                     "num_extra, num_modified, num_missing_dirs, num_extra_dirs, num_common "
+                                     "FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def _path_condition(self, path_query):
+        """
+            SQL condition and parameters selecting the entries whose path contains path_query.
+        """
+        if self.fts_mode == "trigram" and len(path_query) >= 3 or self.fts_mode == "words":
+            phrase = '"' + path_query.replace('"', '""') + '"'
+            return "e.id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)", [phrase]
+        escaped = path_query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return "e.path LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+
+    def query_entries(self, run_id=None, status=None, kind=None, path_query=None, path=None, digest=None,
+                      limit=500, offset=0):
+        """
+            Filtered entries, joined with their run.
+            
+            Parameters:
+            - run_id: Only this run.
+            - status: 'missing', 'extra' or 'modified'.
+            - kind: 'file' or 'dir'.
+            - path_query: Substring of the path (full-text index).
+            - path: Exact path.
+            - digest: Reference or extracted digest of modified files.
+            - limit, offset: Page of results.
+
+            Returns:
+            - A list of dicts, most recent runs first.
+        """
+        conditions = []
+        parameters = []
+        for column, value in (("e.run_id", run_id), ("e.status", status), ("e.kind", kind), ("e.path", path)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if digest:
+            conditions.append("(e.digest_ref = ? OR e.digest_ext = ?)")
+            parameters += [digest, digest]
+        if path_query:
+            condition, condition_parameters = self._path_condition(path_query)
+            conditions.append(condition)
+            parameters += condition_parameters
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT e.run_id, r.timestamp, e.path, e.kind, e.status, e.digest_ref, e.digest_ext, e.size_ref, "
+                f"e.size_ext, e.error FROM entries e JOIN runs r ON r.id = e.run_id {where} "
+                f"ORDER BY e.run_id DESC, e.path LIMIT ? OFFSET ?", parameters + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def runs_for_path(self, path, status=None):
+        """
+            Runs that reported a path (optionally with a given status), most recent first.
+        """
+        return self.query_entries(path=path, status=status, limit=-1)
+
+    def load_report(self, run_id):
+        """
+            Rebuild the report of a run from the database.
+        """
+        with self._lock:
+            run = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if run is None:
+                raise KeyError(f"Unknown run: {run_id}")
+            report = json.loads(run['summary_json'] or "{}")
+            for list_key in self.ENTRY_LISTS:
+                report[list_key] = []
+            list_keys = {kind_status: list_key for list_key, kind_status in self.ENTRY_LISTS.items()}
+            for row in self.conn.execute("SELECT * FROM entries WHERE run_id = ? ORDER BY id", (run_id,)):
+                list_key = list_keys[(row['kind'], row['status'])]
+                if row['status'] == 'modified':
+                    entry = {'file': row['path'], 'hash_ref': row['digest_ref'], 'hash_ext': row['digest_ext'],
+                             'size_ref': row['size_ref'], 'size_ext': row['size_ext']}
+                    if row['error']:
+                        entry['error'] = row['error']
+                    if row['extra']:
+                        entry.update(json.loads(row['extra']))
+                    report[list_key].append(entry)
+                else:
+                    report[list_key].append(row['path'])
+        report.setdefault('num_missing', len(report['missing_files']))
+        report.setdefault('num_extra', len(report['extra_files']))
+        report.setdefault('num_modified', len(report['modified_files']))
+        return report, dict(run)
+
+    def delete_run(self, run_id):
+        with self._lock, self.conn:
+            if self.fts_mode:
+                self.conn.execute("INSERT INTO entries_fts (entries_fts, rowid, path) "
+                                  "SELECT 'delete', id, path FROM entries WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    def close(self):
+        self.conn.close()
+
+#### dedup
+FICLONE = 0x40049409  # _IOW(0x94, 9, int): share the extents of another file (btrfs, XFS, ...)
+DEDUP_COMPARE_CHUNK_SIZE = 1024 * 1024
+DEDUP_TMP_SUFFIX = ".chckfiles-dedup"
+# Errors meaning "this filesystem cannot clone extents"
+REFLINK_UNSUPPORTED_ERRNOS = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS}
+
+def files_identical(path_a, path_b, chunk_size=DEDUP_COMPARE_CHUNK_SIZE, throttle=None):
+    """
+        Compare two files byte for byte.
+        
+        Parameters:
+        - path_a, path_b: Paths of the files.
+        - chunk_size: Read size.
+        - throttle: Optional IOThrottle applied to the reads of both files.
+
+        Returns:
+        - True if both files have exactly the same content.
+    """
+    with open(path_a, 'rb') as file_a, open(path_b, 'rb') as file_b:
+        while True:
+            read_start = time.perf_counter()
+            chunk_a = file_a.read(chunk_size)
+            chunk_b = file_b.read(chunk_size)
+            if throttle and (chunk_a or chunk_b):
+                throttle.acquire(len(chunk_a) + len(chunk_b), time.perf_counter() - read_start)
+            if chunk_a != chunk_b:
+                return False
+            if not chunk_a:
+                return True
+
+def reflink_file(source_path, target_path):
+    """
+        Create target_path as a copy-on-write clone of source_path (FICLONE ioctl).
+        
+        Raises OSError (errno in REFLINK_UNSUPPORTED_ERRNOS) when the platform or the
+        filesystem cannot clone; target_path is removed in that case.
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+    with open(source_path, 'rb') as source:
+        target_fd = os.open(target_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(target_fd, FICLONE, source.fileno())
+        except OSError:
+            os.close(target_fd)
+            os.unlink(target_path)
+            raise
+        os.close(target_fd)
+
+def _write_journal_record(journal, record):
+    journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def _remove_temporary(tmp_path):
+    if os.path.lexists(tmp_path):
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+def deduplicate_groups(duplicate_groups, mode='hardlink', dry_run=True, journal_path=None, batch_size=64,
+                       throttle=None, progress_callback=None):
+    """
+        Replace the redundant copies of duplicate groups by hardlinks or reflinks.
+        
+        The first path of each group is kept; every other path is verified byte for
+        byte against it and then atomically replaced (link or clone created next to
+        the target, then renamed over it). Every replacement is recorded in a JSON
+        Lines journal before it happens so that rollback_dedup can restore independent
+        copies: the links or clones of a batch are prepared, their records written and
+        fsync'ed once, and only then are the targets renamed over.
+        
+        Parameters:
+        - duplicate_groups: {group name: [paths]} as returned by the duplicate scan.
+        - mode: 'hardlink' (same filesystem only, the copies then share their metadata)
+          or 'reflink' (copy-on-write clone keeping the target's own metadata; on a
+          filesystem without FICLONE the target is left as a plain copy).
+        - dry_run: Only verify and count what would be reclaimed.
+        - journal_path: Path of the rollback journal (required unless dry_run).
+        - batch_size: Number of replacements per journal sync / progress message.
+        - throttle: Optional IOThrottle applied to the verification reads.
+        - progress_callback: Optional function receiving progress messages.
+
+        Returns:
+        - A summary dict (verified, replaced, reclaimed_bytes, skipped, errors, ...).
+    """
+    if mode not in ('hardlink', 'reflink'):
+        raise ValueError(f"Unknown dedup mode: {mode}")
+    if not dry_run and not journal_path:
+        raise ValueError("A journal path is required to deduplicate")
+    
+    pairs = [(file_paths[0], target) for file_paths in duplicate_groups.values() for target in file_paths[1:]]
+    summary = {
+        'mode': mode,
+        'dry_run': dry_run,
+        'groups': len(duplicate_groups),
+        'candidates': len(pairs),
+        'verified': 0,
+        'replaced': 0,
+        'reclaimed_bytes': 0,
+        'reflink_unsupported': 0,
+        'skipped': [],
+        'errors': [],
+        'journal_path': None if dry_run else journal_path
+    }
+    
+    journal = None
+    if not dry_run:
+        journal = open(journal_path, 'a', encoding='utf-8')
+        _write_journal_record(journal, {'type': 'header', 'mode': mode,
+                                        'created': datetime.datetime.now().isoformat()})
+    try:
+        for batch_start in range(0, len(pairs), batch_size):
+            prepared = []  # (target, temporary link or clone, size) renamed once the journal is synced
+            for keeper, target in pairs[batch_start:batch_start + batch_size]:
+                tmp_path = target + DEDUP_TMP_SUFFIX
+                try:
+                    keeper_st = os.stat(keeper)
+                    target_st = os.lstat(target)
+                    reason = None
+                    if not stat.S_ISREG(target_st.st_mode):
+                        reason = "not a regular file"
+                    elif (keeper_st.st_dev, keeper_st.st_ino) == (target_st.st_dev, target_st.st_ino):
+                        reason = "already linked"
+                    elif keeper_st.st_size != target_st.st_size:
+                        reason = "size changed since the scan"
+                    elif mode == 'hardlink' and keeper_st.st_dev != target_st.st_dev:
+                        reason = "different filesystem"
+                    elif not files_identical(keeper, target, throttle=throttle):
+                        reason = "content differs"
+                    if reason:
+                        summary['skipped'].append({'file': target, 'keeper': keeper, 'reason': reason})
+                        continue
+                    
+                    summary['verified'] += 1
+                    if dry_run:
+                        summary['replaced'] += 1
+                        summary['reclaimed_bytes'] += target_st.st_size
+                        continue
+                    
+                    if mode == 'hardlink':
+                        os.link(keeper, tmp_path)
+                    else:
+                        try:
+                            reflink_file(keeper, tmp_path)
+                        except OSError as e:
+                            if e.errno not in REFLINK_UNSUPPORTED_ERRNOS:
+                                raise
+                            # Copy fallback: the target already is a full copy, leave it as is
+                            summary['reflink_unsupported'] += 1
+                            summary['skipped'].append({'file': target, 'keeper': keeper,
+                                                       'reason': "reflink not supported, copy kept"})
+                            continue
+                        shutil.copystat(target, tmp_path)
+                        try:
+                            os.chown(tmp_path, target_st.st_uid, target_st.st_gid)
+                        except (OSError, AttributeError):
+                            pass
+                    
+                    _write_journal_record(journal, {
+                        'type': 'replace',
+                        'mode': mode,
+                        'file': target,
+                        'keeper': keeper,
+                        'size': target_st.st_size,
+                        'st_mode': stat.S_IMODE(target_st.st_mode),
+                        'uid': target_st.st_uid,
+                        'gid': target_st.st_gid,
+                        'atime_ns': target_st.st_atime_ns,
+                        'mtime_ns': target_st.st_mtime_ns
+                    })
+                    prepared.append((target, tmp_path, target_st.st_size))
+                except OSError as e:
+                    summary['errors'].append({'file': target, 'error': str(e)})
+                    _remove_temporary(tmp_path)
+            
+            # Journal first: once synced, a crash during the renames can still be rolled back
+            if prepared:
+                journal.flush()
+                os.fsync(journal.fileno())
+            for target, tmp_path, size in prepared:
+                try:
+                    os.replace(tmp_path, target)
+                    summary['replaced'] += 1
+                    summary['reclaimed_bytes'] += size
+                except OSError as e:
+                    summary['errors'].append({'file': target, 'error': str(e)})
+                    _remove_temporary(tmp_path)
+            if progress_callback:
+                done = min(batch_start + batch_size, len(pairs))
+                progress_callback(f"♻️ {done:,}/{len(pairs):,} copies processed, "
+                                  f"{format_size(summary['reclaimed_bytes'])} "
+                                  f"{'reclaimable' if dry_run else 'reclaimed'}")
+    finally:
+        if journal:
+            journal.close()
+    return summary
+
+def rollback_dedup(journal_path, progress_callback=None):
+    """
+        Undo a deduplication: give every replaced file its own copy of the data again.
+        
+        Parameters:
+        - journal_path: Journal written by deduplicate_groups.
+        - progress_callback: Optional function receiving progress messages.
+
+        Returns:
+        - A summary dict (restored, skipped, errors).
+    """
+    records = []
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                if record.get('type') == 'replace':
+                    records.append(record)
+    
+    summary = {'journal_path': journal_path, 'records': len(records), 'restored': 0, 'skipped': [], 'errors': []}
+    # Most recent replacements first
+    for index, record in enumerate(reversed(records), 1):
+        target = record['file']
+        tmp_path = target + DEDUP_TMP_SUFFIX
+        try:
+            # A link left over by an interrupted run (renamed or not) must not be written through
+            _remove_temporary(tmp_path)
+            if not os.path.exists(target) or not os.path.exists(record['keeper']):
+                summary['skipped'].append({'file': target, 'reason': "file no longer exists"})
+                continue
+            if record['mode'] == 'hardlink' and not os.path.samefile(target, record['keeper']):
+                summary['skipped'].append({'file': target, 'reason': "no longer linked (already restored or replaced)"})
+                continue
+            shutil.copyfile(record['keeper'], tmp_path)
+            os.chmod(tmp_path, record['st_mode'])
+            try:
+                os.chown(tmp_path, record['uid'], record['gid'])
+            except (OSError, AttributeError):
+                pass
+            os.utime(tmp_path, ns=(record['atime_ns'], record['mtime_ns']))
+            os.replace(tmp_path, target)
+            summary['restored'] += 1
+        except OSError as e:
+            summary['errors'].append({'file': target, 'error': str(e)})
+            _remove_temporary(tmp_path)
+        if progress_callback and index % 100 == 0:
+            progress_callback(f"↩️ {index:,}/{len(records):,} journal entries processed")
+    return summary
+
+#### near duplicates
+NEAR_DUP_PERMUTATIONS = 64  # MinHash values per signature
+NEAR_DUP_THRESHOLD = 0.8
+NEAR_DUP_RECALL = 0.99  # probability that a pair at the threshold shares at least one LSH band
+NEAR_DUP_CHUNK_SIZE = 1024  # average content-defined chunk (shingle) size
+NEAR_DUP_MAX_BYTES = 16 * 1024 * 1024  # bytes read per file to build its signature
+NEAR_DUP_FULL_BUCKET = 50  # larger LSH buckets are only compared with their first file
+_NEAR_DUP_MASK = (1 << 64) - 1
+NEAR_DUP_HASHES = [(int.from_bytes(seed[:8], 'big') | 1, int.from_bytes(seed[8:16], 'big'))  # a, b of a * x + b
+                   for seed in (hashlib.sha256(f"minhash-{index}".encode()).digest()
+                                for index in range(NEAR_DUP_PERMUTATIONS))]
+
+def minhash_signature(file_path, max_bytes=NEAR_DUP_MAX_BYTES, chunk_size=NEAR_DUP_CHUNK_SIZE, throttle=None):
+    """
+        Compute the MinHash signature of a file over its content-defined chunks.
+        
+        The chunks (see iter_content_chunks) play the role of shingles: an edit only
+        changes the chunks around it, so two versions of a document share most of them.
+        Each of the NEAR_DUP_PERMUTATIONS values is the minimum of a universal hash
+        (a * x + b mod 2**64) over the chunk digests.
+        
+        Parameters:
+        - file_path: Path to the file.
+        - max_bytes: Only the chunks starting in the first max_bytes bytes are used.
+        - chunk_size: Average chunk size (a power of 4).
+        - throttle: Optional IOThrottle pacing the reads.
+        
+        Returns:
+        - The signature as an array('Q'), or None for an empty file.
+    """
+    features = set()
+    for offset, _, digest in iter_content_chunks(file_path, chunk_size, throttle=throttle):
+        if offset >= max_bytes:
+            break
+        features.add(int.from_bytes(digest[:8], 'big'))
+    if not features:
+        return None
+    return array('Q', (min([(multiplier * feature + increment) & _NEAR_DUP_MASK for feature in features])
+                       for multiplier, increment in NEAR_DUP_HASHES))
+
+def signature_similarity(signature_a, signature_b):
+    """
+        Estimate the Jaccard similarity of two files from their MinHash signatures.
+    """
+    return sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+
+def near_duplicate_bands(threshold, recall=NEAR_DUP_RECALL):
+    """
+        Choose the number of LSH bands for a similarity threshold.
+        
+        Two files of similarity s share a band of r rows with probability s^r, so they
+        become candidates with probability 1 - (1 - s^r)^b over b bands. The longest
+        bands (fewest candidates) that still reach the recall at the threshold are kept:
+        16 bands of 4 rows for the default 0.8 threshold (8 bands of 8 rows would only
+        find 77% of the pairs at 0.8).
+
+        Returns:
+        - A number of bands dividing NEAR_DUP_PERMUTATIONS.
+    """
+    bands = 1
+    while bands < NEAR_DUP_PERMUTATIONS:
+        rows = NEAR_DUP_PERMUTATIONS // bands
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            break
+        bands *= 2
+    return bands
+
+def find_near_duplicates(file_paths, threshold=NEAR_DUP_THRESHOLD, max_bytes=NEAR_DUP_MAX_BYTES,
+                         bands=None, throttle=None, progress_callback=None):
+    """
+        Group similar (not necessarily identical) files with MinHash and LSH.
+        
+        Each signature is cut into bands; files sharing a whole band land in the same
+        bucket and only these candidates are compared, so the cost grows with the
+        number of files instead of the number of pairs. Candidates whose estimated
+        similarity reaches the threshold are linked and the linked files form clusters.
+        
+        Parameters:
+        - file_paths: Iterable of the paths to compare, one per distinct content
+          (exact duplicates are expected to be grouped beforehand).
+        - threshold: Minimum estimated similarity (0-1) of two files of a cluster.
+        - max_bytes: Bytes read per file to build its signature (see minhash_signature).
+        - bands: Number of LSH bands; more bands find less similar candidates
+          (default: derived from the threshold, see near_duplicate_bands).
+        - throttle: Optional IOThrottle pacing the reads.
+        - progress_callback: Function called with the number of files signed so far.
+        
+        Returns:
+        - A dict with 'clusters' (lists of dicts with the sorted 'files' and the lowest
+          'similarity' of the links of the cluster, largest clusters first), the number
+          of 'signed_files', 'candidate_pairs' compared, read 'errors' and the LSH 'bands'.
+    """
+    bands = bands or near_duplicate_bands(threshold)
+    rows = NEAR_DUP_PERMUTATIONS // bands
+    paths = []
+    signatures = []
+    buckets = [{} for _ in range(bands)]
+    errors = 0
+    for file_path in file_paths:
+        try:
+            signature = minhash_signature(file_path, max_bytes, throttle=throttle)
+        except OSError:
+            errors += 1
+            continue
+        if signature is None:
+            continue
+        index = len(paths)
+        paths.append(file_path)
+        signatures.append(signature)
+        for band in range(bands):
+            buckets[band].setdefault(hash(tuple(signature[band * rows:(band + 1) * rows])), []).append(index)
+        if progress_callback and len(paths) % 100 == 0:
+            progress_callback(len(paths))
+    
+    parent = list(range(len(paths)))
+    
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+    
+    links = {}  # cluster root -> lowest similarity of its links
+    candidate_pairs = 0
+    for band_buckets in buckets:
+        for members in band_buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) <= NEAR_DUP_FULL_BUCKET:
+                pairs = itertools.combinations(members, 2)
+            else:
+                pairs = ((members[0], other) for other in members[1:])
+            for first, second in pairs:
+                root_first, root_second = find(first), find(second)
+                if root_first == root_second:
+                    continue
+                candidate_pairs += 1
+                similarity = signature_similarity(signatures[first], signatures[second])
+                if similarity < threshold:
+                    continue
+                parent[root_second] = root_first
+                links[root_first] = min(similarity, links.pop(root_first, 1.0), links.pop(root_second, 1.0))
+    
+    clusters = {}
+    for index in range(len(paths)):
+        root = find(index)
+        if root in links:
+            clusters.setdefault(root, []).append(paths[index])
+    result = [{'files': sorted(files), 'similarity': round(links[root], 3)}
+              for root, files in clusters.items() if len(files) > 1]
+    result.sort(key=lambda cluster: (-len(cluster['files']), cluster['files'][0]))
+    return {
+        'clusters': result,
+        'signed_files': len(paths),
+        'candidate_pairs': candidate_pairs,
+        'errors': errors,
+        'bands': bands
+    }
+
+#### filters
+def _glob_to_regex(pattern):
+    """
+        Translate a gitignore-style glob into a regular expression body.
+        '*' and '?' never cross a '/', '**' matches any number of directories.
+    """
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '*':
+            if pattern.startswith('**/', i):
+                regex.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                regex.append('.*')
+                i += 2
+                continue
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                char_class = pattern[i + 1:end]
+                if char_class.startswith('!'):
+                    char_class = '^' + char_class[1:]
+                regex.append('[' + char_class.replace('\\', '\\\\') + ']')
+                i = end + 1
+                continue
+        elif char == '\\' and i + 1 < len(pattern):
+            regex.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+class ScanFilter:
+    """
+        Include/exclude rules applied while walking a tree, shared by comparisons and
+        duplicate detection.
+        
+        Exclusion rules follow the .gitignore syntax: a rule without '/' matches a name at
+        any depth, a rule containing '/' is anchored to the scanned root, a trailing '/'
+        restricts it to directories, '**' spans directories and a leading '!' re-includes
+        what an earlier rule excluded (the last matching rule wins). Rules starting with
+        're:' are regular expressions searched in the relative path. Excluded directories
+        are pruned during the walk, so their content is never listed nor stat'ed.
+        
+        All rules are compiled once; without '!' rules every directory or file is tested
+        against a single combined regular expression.
+    """
+
+    def __init__(self, exclude=(), include=(), min_size=None, max_size=None,
+                 min_age_days=None, max_age_days=None, ignore_case=False):
+        """
+            Parameters:
+            - exclude: Exclusion rules (gitignore-style globs, '!' negations, 're:' regexes).
+            - include: Globs a file must match to be kept (empty = every file).
+            - min_size / max_size: File size bounds in bytes.
+            - min_age_days / max_age_days: File age bounds in days, based on the modification time.
+            - ignore_case: Match the rules case-insensitively (Windows shares).
+        """
+        self.exclude = [rule for rule in (rule.strip() for rule in exclude) if rule and not rule.startswith('#')]
+        self.include = [rule for rule in (rule.strip() for rule in include) if rule]
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_age_days = min_age_days
+        self.max_age_days = max_age_days
+        self.ignore_case = ignore_case
+        self._compile()
+
+    def _compile(self):
+        flags = re.IGNORECASE if self.ignore_case else 0
+        self._rules = []  # (regex, negate, directory_only)
+        for rule in self.exclude:
+            negate = rule.startswith('!')
+            if negate:
+                rule = rule[1:]
+            if rule.startswith('re:'):
+                self._rules.append((re.compile(rule[3:], flags), negate, False, True))
+                continue
+            directory_only = rule.endswith('/')
+            rule = rule.rstrip('/')
+            anchored = '/' in rule
+            body = _glob_to_regex(rule.lstrip('/'))
+            regex = ('^' if anchored else '^(?:.*/)?') + body + '$'
+            self._rules.append((re.compile(regex, flags), negate, directory_only, False))
+        
+        self._has_negations = any(negate for _, negate, _, _ in self._rules)
+        if not self._has_negations:
+            def combine(rules):
+                parts = [(regex.pattern if searched is False else '.*?(?:' + regex.pattern + ')')
+                         for regex, _, _, searched in rules]
+                return re.compile('|'.join(f'(?:{part})' for part in parts), flags) if parts else None
+            self._file_regex = combine([rule for rule in self._rules if not rule[2]])
+            self._dir_regex = combine(self._rules)
+        
+        self._include_regex = None
+        if self.include:
+            parts = [('^' if '/' in rule else '^(?:.*/)?') + _glob_to_regex(rule.lstrip('/')) + '$' for rule in self.include]
+            self._include_regex = re.compile('|'.join(f'(?:{part})' for part in parts), flags)
+        self.needs_stat = any(bound is not None for bound in (self.min_size, self.max_size,
+                                                              self.min_age_days, self.max_age_days))
+
+    @classmethod
+    def duplicate_scan_defaults(cls, extra_exclude=(), **kwargs):
+        """
+            Rules historically hard-coded in the duplicate scan: hidden, temporary and log
+            files, Windows system folders and files smaller than 1 KB.
+        """
+        exclude = ['.*', '*.tmp', '*.temp', '*.log', 'System Volume Information/', '$RECYCLE.BIN/',
+                   'hiberfil.sys', 'pagefile.sys'] + list(extra_exclude)
+        kwargs.setdefault('min_size', 1024)
+        kwargs.setdefault('ignore_case', True)
+        return cls(exclude=exclude, **kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+            Rebuild a filter from the dict produced by to_dict (report metadata).
+        """
+        if not data:
+            return None
+        return cls(**{key: data[key] for key in ('exclude', 'include', 'min_size', 'max_size',
+                                                 'min_age_days', 'max_age_days', 'ignore_case') if key in data})
+
+    def to_dict(self):
+        return {
+            'exclude': list(self.exclude),
+            'include': list(self.include),
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'min_age_days': self.min_age_days,
+            'max_age_days': self.max_age_days,
+            'ignore_case': self.ignore_case
+        }
+
+    def _excluded_by_rules(self, relative_path, is_dir):
+        if not self._has_negations:
+            regex = self._dir_regex if is_dir else self._file_regex
+            return bool(regex and regex.match(relative_path))
+        excluded = False
+        for regex, negate, directory_only, searched in self._rules:
+            if directory_only and not is_dir:
+                continue
+            if (regex.search(relative_path) if searched else regex.match(relative_path)):
+                excluded = not negate
+        return excluded
+
+    def excludes_dir(self, relative_dir):
+        """
+            Tell whether a directory (relative path) is pruned from the walk.
+        """
+        return self._excluded_by_rules(relative_dir, True)
+
+    def prune(self, relative_root, dirs):
+        """
+            Remove the excluded directories from an os.walk 'dirs' list, in place.
+        """
+        prefix = relative_root + '/' if relative_root not in ('', '.') else ''
+        dirs[:] = [name for name in dirs if not self._excluded_by_rules(prefix + name, True)]
+
+    def accepts_file(self, relative_path, full_path=None, st=None):
+        """
+            Tell whether a file (relative path) is kept by the rules and bounds.
+            
+            Parameters:
+            - relative_path: '/' separated path relative to the scanned root.
+            - full_path: Path used to stat the file when size or age bounds are set.
+            - st: os.stat_result if already available.
+        """
+        if self._excluded_by_rules(relative_path, False):
+            return False
+        if self._include_regex and not self._include_regex.match(relative_path):
+            return False
+        if not self.needs_stat:
+            return True
+        if st is None:
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                return False
+        if self.min_size is not None and st.st_size < self.min_size:
+            return False
+        if self.max_size is not None and st.st_size > self.max_size:
+            return False
+        age_days = (time.time() - st.st_mtime) / 86400
+        if self.min_age_days is not None and age_days < self.min_age_days:
+            return False
+        if self.max_age_days is not None and age_days > self.max_age_days:
+            return False
+        return True
+
+    def is_excluded(self, relative_path, is_dir=False, full_path=None):
+        """
+            Tell whether a path is excluded, including through one of its parent directories
+            (used outside of a walk, e.g. by the watch mode).
+        """
+        parts = relative_path.split('/')
+        for i in range(1, len(parts)):
+            if self._excluded_by_rules('/'.join(parts[:i]), True):
+                return True
+        if is_dir:
+            return self._excluded_by_rules(relative_path, True)
+        return not self.accepts_file(relative_path, full_path)
+
+class ScanScope:
+    """
+        Subtrees a comparison is restricted to.
+        
+        Each entry is a '/' separated path relative to the compared roots, possibly with
+        glob characters matched one path component at a time ('Finance', 'Services/*/2023',
+        'RH/*.xlsx'). A path is in scope when it or one of its parent directories matches
+        an entry. The walk only descends into the directories leading to an entry and
+        into the matching subtrees, so the rest of the trees is never listed; the
+        directories leading to an entry are walked through but not reported.
+    """
+
+    def __init__(self, entries, ignore_case=False):
+        """
+            Parameters:
+            - entries: Relative subpaths or glob patterns.
+            - ignore_case: Match the entries case-insensitively (Windows shares).
+        """
+        self.entries = []
+        for entry in entries:
+            entry = entry.strip().replace('\\', '/').strip('/')
+            if not entry:
+                continue
+            if '..' in entry.split('/') or re.match(r'^[A-Za-z]:', entry):
+                raise ValueError(f"Scope entries must be relative paths inside the compared trees: {entry}")
+            self.entries.append(entry)
+        self.ignore_case = ignore_case
+        flags = re.IGNORECASE if ignore_case else 0
+        self._patterns = [[re.compile(_glob_to_regex(part) + '$', flags) for part in entry.split('/') if part != '.']
+                          for entry in self.entries]
+
+    @classmethod
+    def from_list(cls, entries, ignore_case=False):
+        """
+            Build a scope from a list of entries (report metadata, GUI field), None when it is empty.
+        """
+        scope = cls(entries or (), ignore_case)
+        return scope if scope.entries else None
+
+    def to_list(self):
+        return list(self.entries)
+
+    def contains(self, relative_path):
+        """
+            Tell whether a path (relative, '/' separated) lies in one of the scoped subtrees.
+        """
+        if not relative_path:
+            return False
+        parts = relative_path.split('/')
+        return any(len(parts) >= len(pattern) and all(regex.match(part) for regex, part in zip(pattern, parts))
+                   for pattern in self._patterns)
+
+    def leads_to(self, relative_dir):
+        """
+            Tell whether a directory is a parent of a possible scope entry (to be walked through).
+        """
+        if not relative_dir:
+            return True
+        parts = relative_dir.split('/')
+        return any(len(parts) < len(pattern) and all(regex.match(part) for regex, part in zip(pattern, parts))
+                   for pattern in self._patterns)
+
+#### statistics
+class ComparisonStats:
+    """
+        Per-phase instrumentation of a comparison run.
+        
+        Each phase (scan, diff, hash, report) records its wall time, CPU time,
+        bytes read, files processed, cache hits and errors. A CPU time close to the
+        wall time points to a CPU-bound phase, a low ratio with a low throughput to
+        a disk or network bound one.
+    """
+    PHASES = ('scan', 'diff', 'hash', 'report')
+    COUNTERS = ('bytes_read', 'files_processed', 'cache_hits', 'errors')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases = {}
+        self.current_phase = None
+        self._phase_start = None
+        self._phase_cpu_start = None
+        self._run_start = time.perf_counter()
+
+    def start_phase(self, name):
+        """
+            Close the current phase (if any) and start timing a new one.
+        """
+        self.end_phase()
+        phase = self.phases.setdefault(name, {'wall_time': 0.0, 'cpu_time': 0.0})
+        for counter in self.COUNTERS:
+            phase.setdefault(counter, 0)
+        self.current_phase = name
+        self._phase_start = time.perf_counter()
+        self._phase_cpu_start = time.process_time()
+
+    def end_phase(self):
+        """
+            Stop timing the current phase.
+        """
+        if self.current_phase is None:
+            return
+        phase = self.phases[self.current_phase]
+        phase['wall_time'] += time.perf_counter() - self._phase_start
+        phase['cpu_time'] += time.process_time() - self._phase_cpu_start
+        self.current_phase = None
+
+    def _add(self, counter, amount):
+        if self.current_phase is None:
+            return
+        with self._lock:
+            self.phases[self.current_phase][counter] += amount
+
+    def add_bytes(self, amount):
+        self._add('bytes_read', amount)
+
+    def add_files(self, amount=1):
+        self._add('files_processed', amount)
+
+    def add_cache_hit(self, amount=1):
+        self._add('cache_hits', amount)
+
+    def add_error(self, amount=1):
+        self._add('errors', amount)
+
+    def snapshot(self, done, total):
+        """
+            Build a live view of the current phase with throughput and ETA.
+            
+            Parameters:
+            - done: Number of work items completed in the current phase.
+            - total: Total number of work items of the current phase.
+
+            Returns:
+            - A dict with phase, done, total, elapsed, bytes_per_second,
+              files_per_second and eta_seconds (None while unknown).
+        """
+        phase = self.phases.get(self.current_phase, {})
+        elapsed = time.perf_counter() - self._phase_start if self.current_phase else 0.0
+        bytes_per_second = phase.get('bytes_read', 0) / elapsed if elapsed > 0 else 0.0
+        files_per_second = done / elapsed if elapsed > 0 else 0.0
+        eta_seconds = (total - done) / files_per_second if files_per_second > 0 else None
+        return {
+            'phase': self.current_phase,
+            'done': done,
+            'total': total,
+            'elapsed': elapsed,
+            'bytes_per_second': bytes_per_second,
+            'files_per_second': files_per_second,
+            'eta_seconds': eta_seconds,
+            'errors': phase.get('errors', 0),
+            'cache_hits': phase.get('cache_hits', 0)
+        }
+
+    def to_dict(self):
+        """
+            Export the collected counters as a JSON serializable dict.
+        """
+        phases = {}
+        for name, phase in self.phases.items():
+            entry = dict(phase)
+            entry['wall_time'] = round(entry['wall_time'], 3)
+            entry['cpu_time'] = round(entry['cpu_time'], 3)
+            entry['bytes_per_second'] = round(phase['bytes_read'] / phase['wall_time'], 1) if phase['wall_time'] > 0 else 0.0
+            entry['files_per_second'] = round(phase['files_processed'] / phase['wall_time'], 1) if phase['wall_time'] > 0 else 0.0
+            phases[name] = entry
+        return {
+            'total_time': round(time.perf_counter() - self._run_start, 3),
+            'phases': phases
+        }
+
+#### throttling
+class IOThrottle:
+    """
+        Pace file reads so that a verification can run on a live server.
+        
+        Reads are scheduled on a virtual clock: each read reserves a time slot sized by
+        the bandwidth and IOPS caps, and the caller sleeps until its slot. When a latency
+        target is set, the observed read latency (exponential moving average) drives a
+        backoff factor that stretches the slots while the disks are busy serving users.
+    """
+    MAX_BACKOFF = 32.0
+
+    def __init__(self, max_bytes_per_second=None, max_iops=None, latency_target=None):
+        """
+            Parameters:
+            - max_bytes_per_second: Bandwidth cap, or None.
+            - max_iops: Read operations per second cap, or None.
+            - latency_target: Read latency in seconds above which reads are slowed down, or None.
+        """
+        self.max_bytes_per_second = max_bytes_per_second
+        self.max_iops = max_iops
+        self.latency_target = latency_target
+        self.backoff = 1.0
+        self.average_latency = 0.0
+        self.total_wait = 0.0
+        self.operations = 0
+        self._next_slot = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, max_mb_per_second=None, max_iops=None, latency_target_ms=None):
+        """
+            Build a throttle from user facing units (MB/s, IOPS, milliseconds).
+            
+            Returns:
+            - An IOThrottle, or None when no limit is set.
+        """
+        if not (max_mb_per_second or max_iops or latency_target_ms):
+            return None
+        return cls(max_bytes_per_second=max_mb_per_second * 1024 * 1024 if max_mb_per_second else None,
+                   max_iops=max_iops or None,
+                   latency_target=latency_target_ms / 1000.0 if latency_target_ms else None)
+
+    def acquire(self, num_bytes, latency=None):
+        """
+            Account for one read of num_bytes and sleep if the caps are exceeded.
+            
+            Parameters:
+            - num_bytes: Size of the read that just happened.
+            - latency: Duration of that read in seconds, used for adaptive backoff.
+        """
+        with self._lock:
+            self.operations += 1
+            if latency is not None and self.latency_target:
+                self._update_backoff(latency)
+            
+            slot = 0.0
+            if self.max_bytes_per_second:
+                slot = max(slot, num_bytes / self.max_bytes_per_second)
+            if self.max_iops:
+                slot = max(slot, 1.0 / self.max_iops)
+            if self.latency_target and slot == 0.0:
+                # No static cap: leave the disk idle in proportion to the backoff
+                slot = self.average_latency
+            slot *= self.backoff
+            
+            now = time.perf_counter()
+            start = max(self._next_slot, now)
+            self._next_slot = start + slot
+            delay = start - now
+            self.total_wait += delay
+        
+        if delay > 0:
+            time.sleep(delay)
+
+    def _update_backoff(self, latency):
+        self.average_latency = 0.8 * self.average_latency + 0.2 * latency if self.operations > 1 else latency
+        if self.average_latency > self.latency_target:
+            self.backoff = min(self.backoff * 1.5, self.MAX_BACKOFF)
+        else:
+            self.backoff = max(self.backoff * 0.95, 1.0)
+
+    def to_dict(self):
+        """
+            Export the throttle settings and counters as a JSON serializable dict.
+        """
+        return {
+            'max_bytes_per_second': self.max_bytes_per_second,
+            'max_iops': self.max_iops,
+            'latency_target': self.latency_target,
+            'operations': self.operations,
+            'total_wait': round(self.total_wait, 3),
+            'final_backoff': round(self.backoff, 2)
+        }
+
+# ioprio_set syscall numbers per architecture (Linux)
+IOPRIO_SET_SYSCALLS = {'x86_64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30, 'armv7l': 314}
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+
+def set_low_priority():
+    """
+        Lower the CPU and I/O priority of the current thread (Linux) or process (other systems).
+        
+        On Linux nice and ioprio apply to the calling thread only, so workers can run in the
+        idle I/O class while the GUI thread keeps its priority. The change cannot be undone
+        without privileges.
+
+        Returns:
+        - A list describing what was applied (empty when nothing is supported).
+    """
+    applied = []
+    if sys.platform == 'win32':
+        try:
+            PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000
+            kernel32 = ctypes.windll.kernel32
+            if kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), PROCESS_MODE_BACKGROUND_BEGIN):
+                applied.append("background mode")
+        except (AttributeError, OSError):
+            pass
+        return applied
+    
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(10)
+            applied.append("nice +10")
+        except OSError:
+            pass
+    
+    syscall_number = IOPRIO_SET_SYSCALLS.get(os.uname().machine) if sys.platform.startswith('linux') else None
+    if syscall_number:
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.syscall(syscall_number, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0:
+                applied.append("ionice idle")
+        except (AttributeError, OSError):
+            pass
+    return applied
+
+def call_in_own_thread(func, *args, **kwargs):
+    """
+        Call func in a new thread and wait for its result (or exception), so that a priority
+        lowered by set_low_priority during the call ends with it instead of sticking to a
+        long-lived pool thread.
+    """
+    outcome = {}
+    
+    def run():
+        try:
+            outcome['result'] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome['error'] = e
+    
+    thread = threading.Thread(target=run, name=f"{threading.current_thread().name}-call", daemon=True)
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+#### batch queue
+def parse_job_list(list_path):
+    """
+        Read a list of comparison jobs.
+        
+        Each non empty line that does not start with '#' holds a reference path and an
+        extracted path, optionally followed by the output report path, separated by
+        tabs or ';'.
+        
+        Parameters:
+        - list_path: Path to the list file.
+
+        Returns:
+        - A list of (reference_path, extracted_path, output_path or None) tuples.
+    """
+    with open(list_path, 'r', encoding='utf-8') as f:
+        return parse_job_lines(f)
+
+def parse_job_lines(lines):
+    """
+        Parse job list lines (see parse_job_list).
+        
+        Parameters:
+        - lines: Iterable of text lines.
+
+        Returns:
+        - A list of (reference_path, extracted_path, output_path or None) tuples.
+    """
+    jobs = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        separator = '\t' if '\t' in line else ';'
+        fields = [field.strip() for field in line.split(separator)]
+        if len(fields) < 2 or not fields[0] or not fields[1]:
+            raise ValueError(f"Ligne {line_number} invalide: '{line}' (attendu: référence ; extrait [; rapport])")
+        jobs.append((fields[0], fields[1], fields[2] if len(fields) > 2 and fields[2] else None))
+    return jobs
+
+class BatchJob:
+    """
+        One reference/extracted pair of a batch queue, with its outcome.
+    """
+    def __init__(self, job_id, reference_path, extracted_path, output_path=None):
+        self.job_id = job_id
+        self.reference_path = reference_path
+        self.extracted_path = extracted_path
+        self.output_path = output_path
+        self.status = 'pending'
+        self.report = None
+        self.error = None
+        self.duration = None
+        self.devices = sorted({get_device_id(reference_path), get_device_id(extracted_path)}, key=str)
+
+    def to_dict(self):
+        summary = {
+            'job_id': self.job_id,
+            'reference_path': self.reference_path,
+            'extracted_path': self.extracted_path,
+            'output_path': self.output_path,
+            'status': self.status,
+            'duration': round(self.duration, 3) if self.duration is not None else None
+        }
+        if self.report:
+            for key in ('num_missing', 'num_extra', 'num_modified', 'num_missing_dirs', 'num_extra_dirs', 'num_common'):
+                summary[key] = self.report.get(key, 0)
+        if self.error:
+            summary['error'] = self.error
+        return summary
+
+def get_device_id(path):
+    """
+        Identify the device holding a path, used to limit concurrent jobs per disk.
+        
+        Parameters:
+        - path: A file or directory path.
+
+        Returns:
+        - The st_dev of the path, or the path itself when it can't be stat'ed.
+    """
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return os.path.abspath(path)
+
+class BatchJobQueue:
+    """
+        Run many comparisons on a shared, bounded pool of worker threads.
+        
+        A job only starts when every device it reads from (reference and extracted
+        trees) has a free slot, so two jobs never hammer the same disk while jobs on
+        other disks are waiting. Total throughput scales with the number of
+        independent devices rather than with the number of threads.
+    """
+
+    def __init__(self, max_workers=4, per_device_limit=1, output_dir=None, comparison_options=None):
+        """
+            Parameters:
+            - max_workers: Maximum number of jobs running at the same time.
+            - per_device_limit: Maximum number of running jobs reading from the same device.
+            - output_dir: Directory for the reports of jobs without an explicit output path
+              and for the aggregate summary (None = no files written for those).
+            - comparison_options: Extra keyword arguments for compare_archives_with_progress.
+        """
+        self.max_workers = max(1, max_workers)
+        self.per_device_limit = max(1, per_device_limit)
+        self.output_dir = output_dir
+        self.comparison_options = comparison_options or {}
+        self.jobs = []
+        self._pending = []
+        self._device_usage = {}
+        self._condition = threading.Condition()
+        self._cancelled = False
+
+    def add_job(self, reference_path, extracted_path, output_path=None):
+        """
+            Queue a comparison job.
+
+            Returns:
+            - The created BatchJob.
+        """
+        job = BatchJob(len(self.jobs) + 1, reference_path, extracted_path, output_path)
+        if job.output_path is None and self.output_dir:
+            name = os.path.basename(os.path.normpath(extracted_path)) or f"job{job.job_id}"
+            job.output_path = os.path.join(self.output_dir, f"rapport_{job.job_id:03d}_{name}.json")
+        self.jobs.append(job)
+        self._pending.append(job)
+        return job
+
+    def cancel(self):
+        """
+            Stop starting new jobs; running jobs finish normally.
+        """
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def _next_job(self):
+        """
+            Reserve the first pending job whose devices all have a free slot (blocking).
+        """
+        with self._condition:
+            while True:
+                if self._cancelled or not self._pending:
+                    return None
+                for job in self._pending:
+                    if all(self._device_usage.get(device, 0) < self.per_device_limit for device in job.devices):
+                        self._pending.remove(job)
+                        for device in job.devices:
+                            self._device_usage[device] = self._device_usage.get(device, 0) + 1
+                        return job
+                self._condition.wait()
+
+    def _release_job(self, job):
+        with self._condition:
+            for device in job.devices:
+                self._device_usage[device] -= 1
+            self._condition.notify_all()
+
+    def run(self, progress_callback=None, job_callback=None):
+        """
+            Run every queued job and write the aggregate summary.
+            
+            Parameters:
+            - progress_callback: Function called with (job, message) for progress messages;
+              it is called from worker threads.
+            - job_callback: Function called with the BatchJob when it finishes.
+
+            Returns:
+            - The aggregate summary dict (also written to output_dir when set).
+        """
+        start = time.perf_counter()
+        workers = [threading.Thread(target=self._worker, args=(progress_callback, job_callback),
+                                    name=f"batch-worker-{i + 1}", daemon=True)
+                   for i in range(min(self.max_workers, len(self.jobs)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        summary = self.build_summary(time.perf_counter() - start)
+        if self.output_dir:
+            summary_path = os.path.join(self.output_dir, "resume_file_verifications.json")
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+            summary['summary_path'] = summary_path
+        return summary
+
+    def _worker(self, progress_callback, job_callback):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            job.status = 'running'
+            job_start = time.perf_counter()
+            try:
+                def job_progress(message, job=job):
+                    if progress_callback:
+                        progress_callback(job, message)
+                
+                for path in (job.reference_path, job.extracted_path):
+                    if not os.path.isdir(path):
+                        raise FileNotFoundError(f"Répertoire introuvable: {path}")
+                if self.comparison_options.get('low_priority'):
+                    # Per-thread priority (Linux): lowered in a thread of this job only, not in the pool thread
+                    job.report = call_in_own_thread(compare_archives_with_progress, job.extracted_path,
+                                                    job.reference_path, job_progress, **self.comparison_options)
+                else:
+                    job.report = compare_archives_with_progress(job.extracted_path, job.reference_path,
+                                                                job_progress, **self.comparison_options)
+                if job.output_path:
+                    write_report_file(job.report, job.output_path, job.reference_path, job.extracted_path)
+                job.status = 'done'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.duration = time.perf_counter() - job_start
+                self._release_job(job)
+            if job_callback:
+                job_callback(job)
+
+    def build_summary(self, wall_time=None):
+        """
+            Aggregate the outcome of all jobs.
+        """
+        finished = [job for job in self.jobs if job.report]
+        summary = {
+            'timestamp': str(datetime.datetime.now()),
+            'total_jobs': len(self.jobs),
+            'succeeded': sum(1 for job in self.jobs if job.status == 'done'),
+            'failed': sum(1 for job in self.jobs if job.status == 'failed'),
+            'not_run': sum(1 for job in self.jobs if job.status == 'pending'),
+            'jobs_with_differences': sum(1 for job in finished
+                                         if job.report['num_missing'] + job.report['num_extra'] + job.report['num_modified']),
+            'total_missing': sum(job.report['num_missing'] for job in finished),
+            'total_extra': sum(job.report['num_extra'] for job in finished),
+            'total_modified': sum(job.report['num_modified'] for job in finished),
+            'jobs': [job.to_dict() for job in self.jobs]
+        }
+        if wall_time is not None:
+            summary['wall_time'] = round(wall_time, 3)
+            summary['cumulated_job_time'] = round(sum(job.duration or 0 for job in self.jobs), 3)
+        return summary
+
+#### watch mode
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                      IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+class ArchiveWatcher:
+    """
+        Keep a comparison report up to date while the reference and extracted trees change.
+        
+        The watcher starts from a baseline report, then listens to inotify events on both
+        trees (Linux) or polls them with a stat sweep (other systems, or when the inotify
+        watch limit is reached). Only the paths reported as changed are re-evaluated and
+        re-hashed; the missing/extra/modified sets are updated in place.
+    """
+    SIDES = ('ref', 'ext')
+
+    def __init__(self, extracted_path, reference_path, baseline_report, on_update=None,
+                 poll_interval=5.0, settle_delay=1.0, use_inotify=True, throttle=None, scan_filter=None, scope=None):
+        """
+            Parameters:
+            - extracted_path: Path to the extracted archive directory.
+            - reference_path: Path to the reference directory.
+            - baseline_report: Report of the initial comparison (compare_archives_with_progress).
+            - on_update: Function called from the watcher thread with (report, changes) after each
+              batch of changes, changes being a list of (relative path, new status) tuples.
+            - poll_interval: Seconds between two stat sweeps in polling mode.
+            - settle_delay: Seconds without events before a batch of changes is processed.
+            - use_inotify: Use inotify when available instead of polling.
+            - throttle: Optional IOThrottle for the re-hashing.
+            - scan_filter: Optional ScanFilter; excluded paths are ignored like in the comparison.
+            - scope: Optional ScanScope of a scoped baseline; paths outside it are ignored.
+        """
+        self.roots = {'ref': reference_path, 'ext': extracted_path}
+        self.baseline_report = baseline_report
+        self.on_update = on_update
+        self.poll_interval = poll_interval
+        self.settle_delay = settle_delay
+        self.use_inotify = use_inotify
+        self.throttle = throttle
+        self.scan_filter = scan_filter
+        self.scope = scope
+        self.mode = None
+        self.update_count = 0
+        self.last_update = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._watches = {}
+
+    def start(self):
+        """
+            Load the baseline and start watching in a background thread.
+        """
+        self._load_baseline()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="archive-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """
+            Stop watching and wait for the background thread.
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _walks_through(self, relative_dir):
+        # Directories in the scope or leading to it (always true without a scope)
+        return self.scope is None or self.scope.contains(relative_dir) or self.scope.leads_to(relative_dir)
+
+    def _load_baseline(self):
+        """
+            Rebuild the path sets from a fresh scan and reuse the baseline verdicts for the
+            files that were already common; files that became common are re-hashed.
+        """
+        self.files = {}
+        self.dirs = {}
+        for side, root in self.roots.items():
+            self.files[side], self.dirs[side] = scan_directory_tree(root, self.scan_filter, scope=self.scope)
+        
+        baseline_common_unknown = (set(self.baseline_report.get('missing_files', [])) |
+                                   set(self.baseline_report.get('extra_files', [])))
+        common_files = self.files['ref'] & self.files['ext']
+        self.missing_files = self.files['ref'] - self.files['ext']
+        self.extra_files = self.files['ext'] - self.files['ref']
+        self.missing_dirs = self.dirs['ref'] - self.dirs['ext']
+        self.extra_dirs = self.dirs['ext'] - self.dirs['ref']
+        self.modified = {entry['file']: entry for entry in self.baseline_report.get('modified_files', [])
+                         if entry['file'] in common_files}
+        
+        for relative_path in common_files & baseline_common_unknown:
+            self._update_entry(relative_path)
+
+    def _run(self):
+        if self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._run_inotify()
+                return
+            except OSError:
+                # inotify unavailable or watch limit reached: fall back to polling
+                self._watches = {}
+        self._run_polling()
+
+    def _run_polling(self):
+        self.mode = 'polling'
+        previous = {side: self._stat_snapshot(side) for side in self.SIDES}
+        while not self._stop_event.wait(self.poll_interval):
+            changed = set()
+            for side in self.SIDES:
+                current = self._stat_snapshot(side)
+                old = previous[side]
+                changed.update(path for path in current.keys() ^ old.keys())
+                changed.update(path for path, signature in current.items()
+                               if path in old and old[path] != signature)
+                previous[side] = current
+            if changed:
+                self._apply(changed)
+
+    def _stat_snapshot(self, side):
+        """
+            Map every file and directory of one tree to its (size, mtime) signature.
+        """
+        root = self.roots[side]
+        snapshot = {}
+        for current_root, dirs, files in os.walk(root):
+            if self.scope:
+                relative_root = _relative_walk_root(current_root, root)
+                dirs[:] = [name for name in dirs
+                           if self._walks_through(f"{relative_root}/{name}" if relative_root else name)]
+            for name in dirs + files:
+                full_path = os.path.join(current_root, name)
+                relative_path = os.path.relpath(full_path, root).replace('\\', '/')
+                if self.scope and not self.scope.contains(relative_path):
+                    continue
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    continue
+                snapshot[relative_path] = (name in dirs, st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _run_inotify(self):
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            for side in self.SIDES:
+                self._add_watches(libc, fd, side, '')
+            self.mode = 'inotify'
+            
+            pending = set()
+            last_event = 0.0
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.2)
+                if ready:
+                    try:
+                        data = os.read(fd, 65536)
+                    except BlockingIOError:
+                        data = b''
+                    pending.update(self._parse_inotify_events(libc, fd, data))
+                    last_event = time.monotonic()
+                if pending and time.monotonic() - last_event >= self.settle_delay:
+                    self._apply(pending)
+                    pending = set()
+        finally:
+            os.close(fd)
+
+    def _add_watches(self, libc, fd, side, relative_dir):
+        """
+            Add an inotify watch on a directory and all its subdirectories.
+        """
+        start = os.path.join(self.roots[side], relative_dir.replace('/', os.sep)) if relative_dir else self.roots[side]
+        if not self._walks_through(relative_dir):
+            return
+        for current_root, dirs, _ in os.walk(start):
+            if self.scope:
+                relative_root = _relative_walk_root(current_root, self.roots[side])
+                dirs[:] = [name for name in dirs
+                           if self._walks_through(f"{relative_root}/{name}" if relative_root else name)]
+            wd = libc.inotify_add_watch(fd, os.fsencode(current_root), INOTIFY_WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == 28:  # ENOSPC: max_user_watches reached
+                    raise OSError(error, "inotify watch limit reached")
+                continue  # Directory vanished or is unreadable
+            relative_path = os.path.relpath(current_root, self.roots[side]).replace('\\', '/')
+            self._watches[wd] = (side, '' if relative_path == '.' else relative_path)
+
+    def _parse_inotify_events(self, libc, fd, data):
+        """
+            Decode a buffer of struct inotify_event into changed relative paths.
+            An empty string means the whole tree has to be re-synchronized.
+        """
+        changed = set()
+        offset = 0
+        while offset + 16 <= len(data):
+            wd, mask, _, name_length = struct.unpack_from('iIII', data, offset)
+            name = os.fsdecode(data[offset + 16:offset + 16 + name_length].rstrip(b'\0'))
+            offset += 16 + name_length
+            
+            if mask & IN_Q_OVERFLOW:
+                changed.add('')
+                continue
+            if wd not in self._watches:
+                continue
+            side, relative_dir = self._watches[wd]
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            
+            relative_path = f"{relative_dir}/{name}" if relative_dir and name else (name or relative_dir)
+            if self.scope and not self._walks_through(relative_path):
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_watches(libc, fd, side, relative_path)
+            changed.add(relative_path)
+        return changed
+
+    def _apply(self, changed_paths):
+        """
+            Re-evaluate the changed paths and notify the listener.
+        """
+        if '' in changed_paths:
+            # Event queue overflow or watched root replaced: re-synchronize everything
+            self.baseline_report = compare_archives_with_progress(self.roots['ext'], self.roots['ref'],
+                                                                  throttle=self.throttle, scan_filter=self.scan_filter,
+                                                                  scope=self.scope)
+            with self._lock:
+                self._load_baseline()
+            changes = [('', 'resync')]
+        else:
+            with self._lock:
+                to_check = set()
+                for relative_path in changed_paths:
+                    to_check.add(relative_path)
+                    to_check.update(self._subtree_paths(relative_path))
+                changes = [(relative_path, self._update_entry(relative_path)) for relative_path in sorted(to_check)]
+        
+        self.update_count += 1
+        self.last_update = str(datetime.datetime.now())
+        if self.on_update:
+            self.on_update(self.get_report(), changes)
+
+    def _subtree_paths(self, relative_path):
+        """
+            List the known and current paths below a directory that was created, deleted or moved.
+        """
+        if not any(relative_path in self.dirs[side] or
+                   os.path.isdir(os.path.join(self.roots[side], relative_path.replace('/', os.sep)))
+                   for side in self.SIDES):
+            return set()
+        
+        prefix = relative_path + '/'
+        paths = set()
+        for side in self.SIDES:
+            paths.update(path for path in self.files[side] if path.startswith(prefix))
+            paths.update(path for path in self.dirs[side] if path.startswith(prefix))
+            full_path = os.path.join(self.roots[side], relative_path.replace('/', os.sep))
+            if os.path.isdir(full_path):
+                subtree_files, subtree_dirs = scan_directory_tree(full_path)
+                paths.update(prefix + path for path in subtree_files)
+                paths.update(prefix + path for path in subtree_dirs)
+        if self.scope:
+            paths = {path for path in paths if self.scope.contains(path)}
+
+        return paths
+
+    def _update_entry(self, relative_path):
+        """
+            Re-evaluate one path on both sides and update the sets.
+
+            Returns:
+            - The new status: 'missing', 'extra', 'modified', 'identical', 'missing_dir',
+              'extra_dir', 'directory' or 'removed'.
+        """
+        full_paths = {side: os.path.join(root, relative_path.replace('/', os.sep)) for side, root in self.roots.items()}
+        is_file = {side: os.path.isfile(path) for side, path in full_paths.items()}
+        is_dir = {side: os.path.isdir(path) for side, path in full_paths.items()}
+        if self.scope and not self.scope.contains(relative_path):
+            # Outside the scope (or only leading to it): treated as absent on both sides
+            is_file = {side: False for side in self.SIDES}
+            is_dir = {side: False for side in self.SIDES}
+        if self.scan_filter:
+            # Excluded paths are treated as absent on both sides
+            for side in self.SIDES:
+                if is_dir[side] and self.scan_filter.is_excluded(relative_path, is_dir=True):
+                    is_dir[side] = False
+                if is_file[side] and self.scan_filter.is_excluded(relative_path, full_path=full_paths[side]):
+                    is_file[side] = False
+        
+        for side in self.SIDES:
+            (self.files[side].add if is_file[side] else self.files[side].discard)(relative_path)
+            (self.dirs[side].add if is_dir[side] else self.dirs[side].discard)(relative_path)
+        
+        self.missing_dirs.discard(relative_path)
+        self.extra_dirs.discard(relative_path)
+        self.missing_files.discard(relative_path)
+        self.extra_files.discard(relative_path)
+        self.modified.pop(relative_path, None)
+        
+        if is_dir['ref'] or is_dir['ext']:
+            if is_dir['ref'] and not is_dir['ext']:
+                self.missing_dirs.add(relative_path)
+                return 'missing_dir'
+            if is_dir['ext'] and not is_dir['ref']:
+                self.extra_dirs.add(relative_path)
+                return 'extra_dir'
+            return 'directory'
+        
+        if is_file['ref'] and is_file['ext']:
+            ref_hash = calculate_file_hash(full_paths['ref'], throttle=self.throttle)
+            ext_hash = calculate_file_hash(full_paths['ext'], throttle=self.throttle)
+            if ref_hash == ext_hash:
+                return 'identical'
+            try:
+                size_ref = os.path.getsize(full_paths['ref'])
+                size_ext = os.path.getsize(full_paths['ext'])
+            except OSError:
+                size_ref = size_ext = 0
+            self.modified[relative_path] = {
+                'file': relative_path,
+                'hash_ref': ref_hash,
+                'hash_ext': ext_hash,
+                'size_ref': size_ref,
+                'size_ext': size_ext
+            }
+            return 'modified'
+        if is_file['ref']:
+            self.missing_files.add(relative_path)
+            return 'missing'
+        if is_file['ext']:
+            self.extra_files.add(relative_path)
+            return 'extra'
+        return 'removed'
+
+    def get_report(self):
+        """
+            Build a report in the compare_archives_with_progress format from the current state.
+        """
+        with self._lock:
+            report = {key: value for key, value in self.baseline_report.items()
+                      if key not in ('stats', 'throttling', 'profiling')}
+            modified_files = [self.modified[path] for path in sorted(self.modified)]
+            report.update({
+                "missing_files": sorted(self.missing_files),
+                "extra_files": sorted(self.extra_files),
+                "modified_files": modified_files,
+                "missing_directories": sorted(self.missing_dirs),
+                "extra_directories": sorted(self.extra_dirs),
+                "num_missing": len(self.missing_files),
+                "num_extra": len(self.extra_files),
+                "num_modified": len(modified_files),
+                "num_missing_dirs": len(self.missing_dirs),
+                "num_extra_dirs": len(self.extra_dirs),
+                "num_common": len(self.files['ref']) - len(self.missing_files) - len(modified_files),
+                "watch": {
+                    "mode": self.mode,
+                    "updates": self.update_count,
+                    "last_update": self.last_update
+                }
+            })
+        return report
+
+#### recheck
+RECHECK_MTIME_SLACK = 2.0  # seconds subtracted from the report time (coarse mtime/ctime granularity)
+
+def parse_report_timestamp(value):
+    """
+        Convert the 'timestamp' of a report or of export metadata (str(datetime)) to epoch seconds.
+
+        Returns:
+        - The epoch seconds, or None when the value is missing or unreadable.
+    """
+    try:
+        return datetime.datetime.fromisoformat(str(value)).timestamp() if value else None
+    except ValueError:
+        return None
+
+def _changed_since(file_path, since):
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return True
+    return max(st.st_mtime, st.st_ctime) >= since
+
+def recheck_report(extracted_path, reference_path, report, since=None, scan_filter=None, throttle=None,
+                   scan_workers=None, progress_callback=None):
+    """
+        Re-verify only the differences of a report after fixes and update it in place.
+        
+        The paths listed as missing, extra or modified (files and directories) are
+        evaluated again. Both trees are listed once more (names only) to catch the
+        paths that appeared on one side since the report, and the files present on both
+        sides are stat'ed: those changed since the report (mtime or ctime newer than
+        'since') are re-hashed too. The identical files of the report are not read again.
+        
+        Parameters:
+        - extracted_path: Path to the extracted archive directory.
+        - reference_path: Path to the reference directory.
+        - report: Report of compare_archives_with_progress (or an imported one), updated in place.
+        - since: Epoch seconds of the report (default: its 'timestamp'); None to skip the
+          stat sweep of the common files and only look at the differences and new paths.
+        - scan_filter: ScanFilter of the comparison (default: rebuilt from report['filters']).
+        - throttle: Optional IOThrottle for the re-hashing.
+        - scan_workers: Number of threads listing directories (see scan_directory_tree).
+        - progress_callback: Function to call for progress updates.
+        
+        Returns:
+        - The updated report, with a 'recheck' block counting the rechecked paths, the
+          differences resolved and the new ones; the sections describing the entries of the
+          previous run (REPORT_RUN_SECTIONS) are removed.
+    """
+    def update_progress(message):
+        if progress_callback:
+            progress_callback(message)
+    
+    if 'checksum_list' in report or 'sampling' in report:
+        raise ValueError("Only the reports of a full tree comparison can be rechecked")
+    start_time = time.perf_counter()
+    started_at = datetime.datetime.now()
+    previous_timestamp = report.get('timestamp')
+    if since is None:
+        since = parse_report_timestamp(previous_timestamp)
+    if scan_filter is None and report.get('filters'):
+        scan_filter = ScanFilter.from_dict(report['filters'])
+    hashing = report.get('hashing') or {}
+    verifier = FileVerifier(extracted_path, reference_path, throttle=throttle,
+                            large_file_threshold=hashing.get('large_file_threshold'),
+                            tree_chunk_size=hashing.get('tree_chunk_size'),
+                            inode_aware='inode_dedup' in report, chunk_analysis='chunk_analysis' in report)
+    
+    previous = {
+        'missing_files': set(report.get('missing_files', [])),
+        'extra_files': set(report.get('extra_files', [])),
+        'modified_files': {entry['file'] for entry in report.get('modified_files', [])},
+        'missing_directories': set(report.get('missing_directories', [])),
+        'extra_directories': set(report.get('extra_directories', []))
+    }
+    listed = set().union(*previous.values())
+    
+    update_progress("Listing reference and extracted directories...")
+    top_level = set(report['shard']['top_level']) if report.get('shard', {}).get('top_level') is not None else None
+    scope = ScanScope.from_list(report.get('scope'), ignore_case=scan_filter.ignore_case if scan_filter else False)
+    scan_workers = scan_workers or SCAN_WORKERS
+    ref_files, ref_dirs = scan_directory_tree(reference_path, scan_filter, scan_workers, top_level, scope)
+    ext_files, ext_dirs = scan_directory_tree(extracted_path, scan_filter, scan_workers, top_level, scope)
+    
+    # Paths absent from the report on one side only appeared (or vanished) since the report
+    to_check = set(listed)
+    to_check.update(path for path in ref_files ^ ext_files if path not in listed)
+    to_check.update(path for path in ref_dirs ^ ext_dirs if path not in listed)
+    common_files = ref_files & ext_files
+    swept_files = 0
+    if since is not None:
+        update_progress(f"Stat sweep of {len(common_files):,} common files...")
+        since -= RECHECK_MTIME_SLACK
+        unlisted = sorted(common_files - listed)
+        
+        def changed(relative_path):
+            return any(_changed_since(os.path.join(root, relative_path.replace('/', os.sep)), since)
+                       for root in (reference_path, extracted_path))
+        
+        # One stat per file and side, in parallel like the directory listings (network shares)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=scan_workers) as executor:
+            for relative_path, is_changed in zip(unlisted, executor.map(changed, unlisted, chunksize=256)):
+                if is_changed:
+                    to_check.add(relative_path)
+        swept_files = len(unlisted)
+    
+    update_progress(f"Rechecking {len(to_check):,} paths...")
+    missing_files = previous['missing_files'] - to_check
+    extra_files = previous['extra_files'] - to_check
+    missing_dirs = previous['missing_directories'] - to_check
+    extra_dirs = previous['extra_directories'] - to_check
+    modified = {entry['file']: entry for entry in report.get('modified_files', []) if entry['file'] not in to_check}
+    for index, relative_path in enumerate(sorted(to_check), 1):
+        if relative_path in ref_dirs or relative_path in ext_dirs:
+            if relative_path not in ext_dirs:
+                missing_dirs.add(relative_path)
+            elif relative_path not in ref_dirs:
+                extra_dirs.add(relative_path)
+        elif relative_path in common_files:
+            entry = verifier.verify(relative_path)
+            if entry:
+                modified[relative_path] = entry
+        elif relative_path in ref_files:
+            missing_files.add(relative_path)
+        elif relative_path in ext_files:
+            extra_files.add(relative_path)
+        if index % 1000 == 0:
+            update_progress(f"Rechecked {index:,}/{len(to_check):,} paths")
+    
+    current = {
+        'missing_files': missing_files,
+        'extra_files': extra_files,
+        'modified_files': set(modified),
+        'missing_directories': missing_dirs,
+        'extra_directories': extra_dirs
+    }
+    for key in REPORT_RUN_SECTIONS:
+        report.pop(key, None)
+    report.update({
+        "missing_files": sorted(missing_files),
+        "extra_files": sorted(extra_files),
+        "modified_files": [modified[path] for path in sorted(modified)],
+        "missing_directories": sorted(missing_dirs),
+        "extra_directories": sorted(extra_dirs),
+        "num_missing": len(missing_files),
+        "num_extra": len(extra_files),
+        "num_modified": len(modified),
+        "num_missing_dirs": len(missing_dirs),
+        "num_extra_dirs": len(extra_dirs),
+        "num_common": len(common_files) - len(modified),
+        "timestamp": str(started_at),
+        "recheck": {
+            "rechecked_paths": len(to_check),
+            "swept_files": swept_files,
+            "resolved": sum(len(previous[key] - current[key]) for key in previous),
+            "new_differences": sum(len(current[key] - previous[key]) for key in previous),
+            "previous_timestamp": previous_timestamp,
+            "duration": round(time.perf_counter() - start_time, 3)
+        }
+    })
+    return report
+
+#### sharded verification
+SHARD_PROTOCOL_VERSION = 1
+SHARD_HEADER = struct.Struct('>I')  # big-endian length prefix of each JSON message
+SHARD_MAX_MESSAGE_SIZE = 1 << 30
+SHARD_READY_PREFIX = "SHARD_WORKER_LISTENING"  # first stdout line of a worker: '<prefix> <host> <port>'
+SHARD_OPTION_KEYS = ('io_order', 'cache_hints', 'throttle', 'low_priority', 'large_file_threshold',
+                     'tree_chunk_size', 'hash_workers', 'scan_filter', 'inode_aware', 'scan_workers', 'memory_budget',
+                     'chunk_analysis', 'scope')
+SHARDS_PER_WORKER = 4  # more shards than workers so that fast workers take over the slow ones' share
+
+def send_shard_message(sock, message):
+    """
+        Send one message of the shard protocol: a 4 byte length followed by UTF-8 JSON.
+    """
+    data = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    sock.sendall(SHARD_HEADER.pack(len(data)) + data)
+
+def _recv_exact(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            return None if remaining == size else b''
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+def recv_shard_message(sock):
+    """
+        Receive one message of the shard protocol.
+        
+        Returns:
+        - The decoded message, or None when the peer closed the connection between messages.
+    """
+    header = _recv_exact(sock, SHARD_HEADER.size)
+    if header is None:
+        return None
+    if len(header) != SHARD_HEADER.size:
+        raise ConnectionError("Connection closed in the middle of a message")
+    (size,) = SHARD_HEADER.unpack(header)
+    if size > SHARD_MAX_MESSAGE_SIZE:
+        raise ValueError(f"Shard message too large: {size} bytes")
+    data = _recv_exact(sock, size) if size else b''
+    if data is None or len(data) != size:
+        raise ConnectionError("Connection closed in the middle of a message")
+    return json.loads(data.decode('utf-8'))
+
+def shard_of_path(relative_path, shard_count):
+    """
+        Index of the hash range holding a relative path (crc32 of the path split in
+        shard_count equal ranges, stable across hosts and Python runs).
+    """
+    return (zlib.crc32(relative_path.encode('utf-8', 'surrogateescape')) * shard_count) >> 32
+
+def plan_shards(extracted_path, reference_path, partition='top_level', shard_count=4):
+    """
+        Split the path space of a comparison into shards.
+        
+        Parameters:
+        - extracted_path: Path to the extracted archive directory.
+        - reference_path: Path to the reference directory.
+        - partition: 'top_level' to give each shard whole entries of the two roots (each
+          worker only walks its own subtrees), or 'hash' to split every path by hash
+          range (even shards whatever the layout, but each worker walks both trees).
+        - shard_count: Number of shards wanted (fewer with 'top_level' when the roots
+          hold fewer entries).
+
+        Returns:
+        - A list of shard dicts {'shard_id', 'top_level'} or {'shard_id', 'hash_range'},
+          together covering every path exactly once.
+    """
+    shard_count = max(1, shard_count)
+    if partition == 'hash':
+        return [{'shard_id': index, 'hash_range': [index, shard_count]} for index in range(shard_count)]
+    if partition != 'top_level':
+        raise ValueError(f"Unknown partition: {partition}")
+    
+    names = set()
+    for root in (reference_path, extracted_path):
+        try:
+            names.update(os.listdir(root))
+        except OSError:
+            pass
+    names = sorted(names)
+    shard_count = min(shard_count, len(names))
+    return [{'shard_id': index, 'top_level': names[index::shard_count]} for index in range(shard_count)]
+
+def encode_shard_options(options):
+    """
+        Convert compare_archives_with_progress keyword arguments to the JSON options of a shard.
+        
+        Raises:
+        - ValueError for the options that need the whole tree (sampling, content matching).
+    """
+    unsupported = [key for key, value in options.items() if key not in SHARD_OPTION_KEYS and value]
+    if unsupported:
+        raise ValueError(f"Not supported in sharded mode: {', '.join(sorted(unsupported))}")
+    encoded = {key: options[key] for key in SHARD_OPTION_KEYS if options.get(key) is not None}
+    if encoded.get('throttle'):
+        throttle = encoded['throttle']
+        encoded['throttle'] = {'max_bytes_per_second': throttle.max_bytes_per_second, 'max_iops': throttle.max_iops,
+                               'latency_target': throttle.latency_target}
+    if encoded.get('scan_filter'):
+        encoded['scan_filter'] = encoded['scan_filter'].to_dict()
+    if isinstance(encoded.get('scope'), ScanScope):
+        encoded['scope'] = encoded['scope'].to_list()
+    return encoded
+
+def decode_shard_options(options):
+    """
+        Rebuild the compare_archives_with_progress keyword arguments sent by encode_shard_options.
+    """
+    decoded = {key: value for key, value in (options or {}).items() if key in SHARD_OPTION_KEYS}
+    if decoded.get('throttle'):
+        decoded['throttle'] = IOThrottle(**decoded['throttle'])
+    if decoded.get('scan_filter'):
+        decoded['scan_filter'] = ScanFilter.from_dict(decoded['scan_filter'])
+    return decoded
+
+def merge_shard_reports(shard_reports, total_time=None):
+    """
+        Merge the partial reports of the shards of one comparison.
+        
+        Parameters:
+        - shard_reports: Reports returned by compare_archives_with_progress for each shard.
+        - total_time: Wall time of the whole sharded run, for the 'stats' block.
+
+        Returns:
+        - A report with the same lists and counters as a single-node run (lists sorted
+          by path); 'stats' and the hashing counters are summed over the shards.
+    """
+    list_keys = ('missing_files', 'extra_files', 'modified_files', 'missing_directories', 'extra_directories')
+    report = {key: [] for key in list_keys}
+    num_common = 0
+    phases = {}
+    for shard_report in shard_reports:
+        for key in list_keys:
+            report[key].extend(shard_report.get(key, []))
+        num_common += shard_report.get('num_common', 0)
+        for name, phase in shard_report.get('stats', {}).get('phases', {}).items():
+            merged = phases.setdefault(name, {})
+            for counter in ('wall_time', 'cpu_time') + ComparisonStats.COUNTERS:
+                merged[counter] = merged.get(counter, 0) + phase.get(counter, 0)
+        if shard_report.get('scope'):
+            report['scope'] = shard_report['scope']
+        for key in ('filters', 'hashing', 'inode_dedup', 'throttling', 'memory_budget', 'chunk_analysis'):
+            if key in shard_report and key not in report:
+                report[key] = dict(shard_report[key])
+            elif key in shard_report:
+                for counter, value in shard_report[key].items():
+                    if counter in ('tree_hashed_files', 'shared_inode_pairs', 'hash_cache_hits',
+                                   'operations', 'total_wait', 'runs', 'records_spilled',
+                                   'analyzed_files', 'shared_bytes', 'delta_bytes'):
+                        report[key][counter] += value
+    
+    for key in ('missing_files', 'extra_files', 'missing_directories', 'extra_directories'):
+        report[key].sort()
+    report['modified_files'].sort(key=lambda entry: entry['file'])
+    report.update({
+        "num_missing": len(report['missing_files']),
+        "num_extra": len(report['extra_files']),
+        "num_modified": len(report['modified_files']),
+        "num_missing_dirs": len(report['missing_directories']),
+        "num_extra_dirs": len(report['extra_directories']),
+        "num_common": num_common
+    })
+    if 'throttling' in report:
+        report['throttling'].pop('final_backoff', None)
+        report['throttling']['total_wait'] = round(report['throttling']['total_wait'], 3)
+    for phase in phases.values():
+        phase['wall_time'] = round(phase['wall_time'], 3)
+        phase['cpu_time'] = round(phase['cpu_time'], 3)
+    report['stats'] = {'total_time': round(total_time, 3) if total_time is not None else None,
+                       'phases': phases}
+    timestamps = [shard_report['timestamp'] for shard_report in shard_reports if shard_report.get('timestamp')]
+    if timestamps:
+        report['timestamp'] = min(timestamps)
+    return report
+
+class ShardWorker:
+    """
+        Socket server verifying the shards sent by a coordinator.
+        
+        Each connection carries length-prefixed JSON messages (see send_shard_message):
+        'ping', 'shard' (paths, shard and options, answered with a 'result' holding the
+        partial report or an 'error') and 'shutdown'. When a token is set, every message
+        must carry it.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, token=None):
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()[:2]
+        self.token = token
+        self.shards_done = 0
+        self._stopping = threading.Event()
+
+    def serve_forever(self):
+        """
+            Accept coordinator connections until stop() or a 'shutdown' message.
+        """
+        self.server.settimeout(0.5)
+        while not self._stopping.is_set():
+            try:
+                connection, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            connection.settimeout(None)
+            threading.Thread(target=self._handle_connection, args=(connection,), name="shard-connection",
+                             daemon=True).start()
+        self.server.close()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _handle_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    message = recv_shard_message(connection)
+                except (OSError, ValueError):
+                    return
+                if message is None:
+                    return
+                if self.token and not hmac.compare_digest(str(message.get('token', '')), self.token):
+                    send_shard_message(connection, {'type': 'error', 'message': "Invalid token"})
+                    return
+                
+                kind = message.get('type')
+                if kind == 'ping':
+                    send_shard_message(connection, {'type': 'pong', 'version': SHARD_PROTOCOL_VERSION})
+                elif kind == 'shutdown':
+                    send_shard_message(connection, {'type': 'bye'})
+                    self.stop()
+                    return
+                elif kind == 'shard':
+                    try:
+                        report = compare_archives_with_progress(message['extracted_path'], message['reference_path'],
+                                                                shard=message['shard'],
+                                                                **decode_shard_options(message.get('options')))
+                        self.shards_done += 1
+                        reply = {'type': 'result', 'shard_id': message['shard']['shard_id'], 'report': report}
+                    except Exception as e:
+                        reply = {'type': 'error', 'shard_id': message.get('shard', {}).get('shard_id'),
+                                 'message': str(e)}
+                    send_shard_message(connection, reply)
+                else:
+                    send_shard_message(connection, {'type': 'error', 'message': f"Unknown message type: {kind}"})
+
+def run_shard_worker(argv=None):
+    """
+        Entry point of 'main.py --shard-worker [--host HOST] [--port PORT] [--token TOKEN]'.
+        
+        Prints '<SHARD_READY_PREFIX> <host> <port>' once listening (port 0 picks a free port).
+    """
+    parser = argparse.ArgumentParser(prog="main.py --shard-worker", description="Sharded verification worker")
+    parser.add_argument('--shard-worker', action='store_true')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--token', default=os.environ.get('CHCKFILES_SHARD_TOKEN'))
+    args = parser.parse_args(argv)
+    
+    worker = ShardWorker(args.host, args.port, args.token)
+    print(f"{SHARD_READY_PREFIX} {worker.address[0]} {worker.address[1]}", flush=True)
+    worker.serve_forever()
+
+def start_local_shard_workers(count, token=None, startup_timeout=30):
+    """
+        Start shard workers as local processes listening on 127.0.0.1.
+        
+        Returns:
+        - A tuple (list of Popen objects, list of 'host:port' addresses).
+    """
+    environment = dict(os.environ)
+    if token:
+        environment['CHCKFILES_SHARD_TOKEN'] = token
+    processes = []
+    addresses = []
+    try:
+        for _ in range(count):
+            process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--shard-worker', '--port', '0'],
+                                       stdout=subprocess.PIPE, text=True, env=environment)
+            processes.append(process)
+        deadline = time.monotonic() + startup_timeout
+        for process in processes:
+            if os.name != 'nt':  # select() does not accept pipes on Windows
+                ready, _, _ = select.select([process.stdout], [], [], max(0.0, deadline - time.monotonic()))
+                if not ready:
+                    raise RuntimeError("A local shard worker did not start in time")
+            line = process.stdout.readline().split()
+            if len(line) != 3 or line[0] != SHARD_READY_PREFIX:
+                raise RuntimeError("A local shard worker failed to start")
+            addresses.append(f"{line[1]}:{line[2]}")
+    except Exception:
+        stop_local_shard_workers(processes)
+        raise
+    return processes, addresses
+
+def stop_local_shard_workers(processes, timeout=5):
+    """
+        Stop the processes started by start_local_shard_workers.
+    """
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if process.stdout:
+            process.stdout.close()
+
+def _parse_shard_worker(spec):
+    """
+        Normalize a worker given as 'host:port', (host, port) or a dict with 'host', 'port'
+        and optionally the 'extracted_path' / 'reference_path' mount points on that host.
+    """
+    if isinstance(spec, dict):
+        return dict(spec, port=int(spec['port']))
+    if isinstance(spec, str):
+        host, _, port = spec.strip().rpartition(':')
+        return {'host': host.strip('[]') or '127.0.0.1', 'port': int(port)}
+    host, port = spec
+    return {'host': host, 'port': int(port)}
+
+def compare_archives_sharded(extracted_path, reference_path, workers, partition='top_level', shard_count=None,
+                             progress_callback=None, token=None, connect_timeout=10, result_callback=None,
+                             **options):
+    """
+        Compare an archive with a reference directory by dispatching shards to workers.
+        
+        The path space is split by plan_shards; each worker connection takes the next
+        pending shard as soon as it is done with the previous one. A shard whose worker
+        becomes unreachable goes back to the queue for the other workers.
+        
+        Parameters:
+        - extracted_path: Path to the extracted archive directory.
+        - reference_path: Path to the reference directory.
+        - workers: Shard workers ('host:port', (host, port) or dicts, see _parse_shard_worker).
+          A worker dict may give its own mount points of the two trees.
+        - partition: 'top_level' or 'hash' (see plan_shards).
+        - shard_count: Number of shards (default: SHARDS_PER_WORKER per worker).
+        - progress_callback: Function to call for progress updates.
+        - token: Shared secret expected by the workers, if any.
+        - connect_timeout: Seconds allowed to connect to a worker.
+        - result_callback: Called with the findings of each shard as it completes (same
+          events as compare_archives_with_progress), from the worker connection threads.
+        - options: compare_archives_with_progress options applied by each worker
+          (SHARD_OPTION_KEYS; a throttle caps each worker separately).
+
+        Returns:
+        - The merged report (see merge_shard_reports) with a 'sharding' block describing
+          the shards and the work done by each worker.
+    """
+    def update_progress(message):
+        if progress_callback:
+            progress_callback(message)
+    
+    start = time.perf_counter()
+    workers = [_parse_shard_worker(spec) for spec in workers]
+    if not workers:
+        raise ValueError("At least one shard worker is needed")
+    wire_options = encode_shard_options(options)
+    shards = plan_shards(extracted_path, reference_path, partition,
+                         shard_count or SHARDS_PER_WORKER * len(workers))
+    update_progress(f"🧩 {len(shards)} shards ({partition}) dispatched to {len(workers)} workers...")
+    
+    pending = queue.Queue()
+    for shard in shards:
+        pending.put(shard)
+    results = {}
+    lock = threading.Lock()
+    state = {'error': None}
+    worker_info = [{'address': f"{worker['host']}:{worker['port']}", 'shards': 0, 'files_verified': 0,
+                    'status': 'ok'} for worker in workers]
+    
+    def drive(worker, info):
+        try:
+            connection = socket.create_connection((worker['host'], worker['port']), timeout=connect_timeout)
+        except OSError as e:
+            info['status'] = f"unreachable: {e}"
+            update_progress(f"⚠️ Shard worker {info['address']} unreachable: {e}")
+            return
+        with connection:
+            connection.settimeout(None)
+            while state['error'] is None:
+                with lock:
+                    if len(results) == len(shards):
+                        return
+                try:
+                    shard = pending.get(timeout=0.2)
+                except queue.Empty:
+                    continue  # shards still running elsewhere may come back
+                
+                try:
+                    send_shard_message(connection, {
+                        'type': 'shard', 'token': token, 'shard': shard, 'options': wire_options,
+                        'extracted_path': worker.get('extracted_path', extracted_path),
+                        'reference_path': worker.get('reference_path', reference_path)
+                    })
+                    reply = recv_shard_message(connection)
+                    if reply is None:
+                        raise ConnectionError("connection closed")
+                except (OSError, ValueError) as e:
+                    pending.put(shard)
+                    info['status'] = f"lost: {e}"
+                    update_progress(f"⚠️ Shard worker {info['address']} lost, shard {shard['shard_id']} requeued")
+                    return
+                
+                if reply.get('type') != 'result':
+                    state['error'] = f"{info['address']}: {reply.get('message', reply.get('type'))}"
+                    return
+                with lock:
+                    results[shard['shard_id']] = reply['report']
+                    done = len(results)
+                    if result_callback:
+                        shard_report = reply['report']
+                        result_callback('differences', {key: shard_report[key] for key in (
+                            'missing_files', 'extra_files', 'missing_directories', 'extra_directories')})
+                        for entry in shard_report['modified_files']:
+                            result_callback('modified', entry)
+                info['shards'] += 1
+                info['files_verified'] += reply['report'].get('num_common', 0) + reply['report'].get('num_modified', 0)
+                update_progress(f"🧩 Shard {done}/{len(shards)} verified by {info['address']}")
+    
+    threads = [threading.Thread(target=drive, args=(worker, info), name=f"shard-driver-{index}", daemon=True)
+               for index, (worker, info) in enumerate(zip(workers, worker_info))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    if state['error']:
+        raise RuntimeError(f"Shard verification failed on {state['error']}")
+    if len(results) != len(shards):
+        raise RuntimeError(f"No shard worker left: {len(shards) - len(results)} shards not verified")
+    
+    update_progress("Merging shard reports...")
+    report = merge_shard_reports([results[shard['shard_id']] for shard in shards], time.perf_counter() - start)
+    report['sharding'] = {
+        'partition': partition,
+        'shards': len(shards),
+        'workers': worker_info
+    }
+    return report
 
 #### main
 
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from main import checksum_algorithm_for_name, format_checksum_line, parse_checksum_list, verify_checksum_list
+
+
+def digest(data, algorithm='sha256', digest_size=None):
+    if digest_size:
+        return hashlib.blake2b(data, digest_size=digest_size).hexdigest()
+    return hashlib.new(algorithm, data).hexdigest()
+
+
+class ChecksumListTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write_list(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(''.join(lines))
+        return path
+
+    def test_algorithm_from_name(self):
+        self.assertEqual(checksum_algorithm_for_name('SHA256SUMS'), 'sha256')
+        self.assertEqual(checksum_algorithm_for_name('archive.md5'), 'md5')
+        self.assertEqual(checksum_algorithm_for_name('B2SUMS'), 'blake2b')
+        self.assertEqual(checksum_algorithm_for_name('/tmp/disk.b2'), 'blake2b')
+        self.assertIsNone(checksum_algorithm_for_name('job2SUMS'))
+        self.assertIsNone(checksum_algorithm_for_name('checksums.txt'))
+
+    def test_gnu_list(self):
+        path = self.write_list('SHA256SUMS', [
+            f"{digest(b'a')}  ./a.txt\n",
+            f"{digest(b'b').upper()} *dir/b.bin\r\n",
+            "# comment\n",
+            "\n",
+            "not a checksum line\n",
+            f"{digest(b'c', 'md5')}  c.txt\n",
+        ])
+        entries, malformed, list_format, name_conflicts = parse_checksum_list(path)
+        self.assertEqual(entries, {
+            'a.txt': ('sha256', digest(b'a')),
+            'dir/b.bin': ('sha256', digest(b'b')),
+            'c.txt': ('md5', digest(b'c', 'md5')),
+        })
+        self.assertEqual((malformed, list_format, name_conflicts), (1, 'gnu', 1))
+
+    def test_bsd_list(self):
+        path = self.write_list('checksums.txt', [
+            f"SHA1 (a.txt) = {digest(b'a', 'sha1')}\n",
+            f"SHA512 (b.txt) = {digest(b'b', 'sha512')}\n",
+            f"BLAKE2b-256 (c.txt) = {digest(b'c', digest_size=32)}\n",
+            f"BLAKE2b (d.txt) = {digest(b'd', digest_size=64)}\n",
+            f"BLAKE2b-128 (e.txt) = {digest(b'e', digest_size=32)}\n",
+        ])
+        entries, malformed, list_format, _ = parse_checksum_list(path)
+        self.assertEqual(entries, {
+            'a.txt': ('sha1', digest(b'a', 'sha1')),
+            'b.txt': ('sha512', digest(b'b', 'sha512')),
+            'c.txt': ('blake2b-256', digest(b'c', digest_size=32)),
+            'd.txt': ('blake2b', digest(b'd', digest_size=64)),
+        })
+        self.assertEqual((malformed, list_format), (1, 'bsd'))
+
+    def test_blake2b_names(self):
+        lines = [f"{digest(b'a', digest_size=64)}  a.txt\n", f"{digest(b'b', digest_size=32)}  b.txt\n"]
+        entries, _, _, name_conflicts = parse_checksum_list(self.write_list('B2SUMS', lines))
+        self.assertEqual({path: algorithm for path, (algorithm, _) in entries.items()},
+                         {'a.txt': 'blake2b', 'b.txt': 'blake2b-256'})
+        self.assertEqual(name_conflicts, 0)
+        entries, _, _, _ = parse_checksum_list(self.write_list('job2SUMS', lines))
+        self.assertEqual({path: algorithm for path, (algorithm, _) in entries.items()},
+                         {'a.txt': 'sha512', 'b.txt': 'sha256'})
+
+    def test_format_round_trip(self):
+        paths = ['plain.txt', 'dir/with space.txt', 'back\\slash.txt', 'new\nline.txt']
+        for style in ('gnu', 'bsd'):
+            for algorithm, value in (('sha256', digest(b'x')), ('md5', digest(b'x', 'md5')),
+                                     ('blake2b-256', digest(b'x', digest_size=32))):
+                if style == 'gnu' and algorithm.startswith('blake2b'):
+                    continue
+                lines = [format_checksum_line(path, value, algorithm, style) for path in paths]
+                entries, malformed, list_format, _ = parse_checksum_list(self.write_list('list.txt', lines))
+                self.assertEqual(entries, {path: (algorithm, value) for path in paths}, (style, algorithm))
+                self.assertEqual((malformed, list_format), (0, style))
+        self.assertEqual(format_checksum_line('a\\b', 'ff'), "\\ff  a\\\\b\n")
+        self.assertEqual(format_checksum_line('a', 'ff', 'sha1', 'bsd'), "SHA1 (a) = ff\n")
+
+    def test_verify(self):
+        contents = {'same.txt': b'same', 'changed.txt': b'before', 'gone.txt': b'gone'}
+        lines = [format_checksum_line(path, digest(data)) for path, data in contents.items()]
+        list_path = self.write_list('SHA256SUMS', lines)
+        for path, data in (('same.txt', b'same'), ('changed.txt', b'after'), ('new.txt', b'new')):
+            with open(os.path.join(self.directory, path), 'wb') as f:
+                f.write(data)
+        report = verify_checksum_list(list_path)
+        self.assertEqual(report['missing_files'], ['gone.txt'])
+        self.assertEqual(report['extra_files'], ['new.txt'])
+        self.assertEqual([entry['file'] for entry in report['modified_files']], ['changed.txt'])
+        self.assertEqual(report['modified_files'][0]['hash_ext'], digest(b'after'))
+        self.assertEqual(report['num_common'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from main import ConsoleLog
+
+
+class ConsoleLogSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log = ConsoleLog()
+        for tag, message, path in (('error', "Error one", None),
+                                   ('info', "boo", None),
+                                   ('error', "Error two", 'dir/file.txt'),
+                                   ('warning', "foo Error", None),
+                                   ('info', "multi\nError line", None)):
+            self.log.append("12:00:00", tag, message, path)
+
+    def messages(self, query, **kwargs):
+        return [record.message for record in self.log.search(query, **kwargs)]
+
+    def test_substring_search(self):
+        self.assertEqual(self.messages("error"), ["Error one", "Error two", "foo Error", "multi\nError line"])
+        self.assertEqual(self.messages("error", case_sensitive=True), [])
+        self.assertEqual(self.messages("file.txt"), ["Error two"])  # the path is searched too
+        self.assertEqual(self.messages("a.b", regex=False), [])
+
+    def test_regex_anchors_apply_to_each_record(self):
+        self.assertEqual(self.messages("^Error", regex=True), ["Error one", "Error two", "multi\nError line"])
+        self.assertEqual(self.messages("Error$", regex=True), ["foo Error"])
+
+    def test_regex_does_not_cross_records(self):
+        self.assertEqual(self.messages("o.*", regex=True), ["Error one", "boo", "Error two", "foo Error",
+                                                            "multi\nError line"])
+        self.assertEqual(self.messages(r"one\s+boo", regex=True), [])
+        self.assertEqual(self.messages(r"one\s*", regex=True), ["Error one"])
+
+    def test_tags_and_limit(self):
+        self.assertEqual(self.messages("", tags=['error']), ["Error one", "Error two"])
+        self.assertEqual(self.messages("o", tags=['info', 'warning']), ["boo", "foo Error", "multi\nError line"])
+        self.assertEqual(self.messages("Error", limit=2), ["Error one", "Error two"])
+        self.assertEqual(len(self.messages("")), 5)
+
+    def test_index_follows_appends_and_clear(self):
+        self.assertEqual(self.messages("late"), [])
+        record = self.log.append("12:00:01", 'info', "late message")
+        self.assertEqual(self.messages("late"), ["late message"])
+        self.assertIs(self.log.get(record.record_id), record)
+        
+        self.log.clear()
+        self.assertEqual(len(self.log), 0)
+        self.assertEqual(self.messages("Error"), [])
+        self.assertIsNone(self.log.get(record.record_id))
+        self.assertEqual(self.log.append("12:00:02", 'info', "after").record_id, record.record_id + 1)
+        self.assertEqual(self.messages("after"), ["after"])
+
+
+if __name__ == '__main__':
+    unittest.main()
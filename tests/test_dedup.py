@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+
+from main import deduplicate_groups, rollback_dedup
+
+
+class DeduplicateTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.journal_path = os.path.join(self.directory, 'journal.jsonl')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_dry_run_changes_nothing(self):
+        paths = [self.write(f"copy{i}", b'same' * 500) for i in range(3)]
+        summary = deduplicate_groups({'copy0': paths}, dry_run=True)
+        self.assertEqual((summary['verified'], summary['replaced'], summary['reclaimed_bytes']), (2, 2, 4000))
+        self.assertEqual([os.stat(path).st_nlink for path in paths], [1, 1, 1])
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_hardlinks_then_rollback(self):
+        paths = [self.write(f"copy{i}", b'same' * 500) for i in range(3)]
+        os.chmod(paths[2], 0o600)
+        summary = deduplicate_groups({'copy0': paths}, mode='hardlink', dry_run=False, journal_path=self.journal_path)
+        self.assertEqual(summary['replaced'], 2)
+        self.assertTrue(os.path.samefile(paths[0], paths[1]))
+        self.assertTrue(os.path.samefile(paths[0], paths[2]))
+        with open(self.journal_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['type'] for record in records], ['header', 'replace', 'replace'])
+        
+        rollback = rollback_dedup(self.journal_path)
+        self.assertEqual(rollback['restored'], 2)
+        self.assertEqual([os.stat(path).st_nlink for path in paths], [1, 1, 1])
+        self.assertEqual(os.stat(paths[2]).st_mode & 0o777, 0o600)
+        self.assertTrue(all(self.read(path) == b'same' * 500 for path in paths))
+        
+        # Already restored: nothing left to undo
+        self.assertEqual(rollback_dedup(self.journal_path)['restored'], 0)
+
+    def test_different_content_is_skipped(self):
+        keeper = self.write('a', b'x' * 1000)
+        other = self.write('b', b'y' * 1000)
+        summary = deduplicate_groups({'a': [keeper, other]}, dry_run=False, journal_path=self.journal_path)
+        self.assertEqual(summary['replaced'], 0)
+        self.assertEqual(summary['skipped'][0]['reason'], "content differs")
+        self.assertEqual(self.read(other), b'y' * 1000)
+
+    def test_interrupted_run_can_be_rolled_back(self):
+        paths = [self.write(f"copy{i}", b'same' * 500) for i in range(4)]
+        real_replace = os.replace
+        renamed = []
+        
+        def failing_replace(source, target):
+            if renamed:
+                raise KeyboardInterrupt
+            renamed.append(target)
+            real_replace(source, target)
+        
+        os.replace = failing_replace
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                deduplicate_groups({'copy0': paths}, dry_run=False, journal_path=self.journal_path)
+        finally:
+            os.replace = real_replace
+        
+        # Every intent was journaled before the first rename
+        with open(self.journal_path, encoding='utf-8') as f:
+            self.assertEqual(sum(1 for line in f if '"replace"' in line), 3)
+        rollback = rollback_dedup(self.journal_path)
+        self.assertEqual(rollback['restored'], 1)
+        self.assertEqual([os.stat(path).st_nlink for path in paths], [1, 1, 1, 1])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['copy0', 'copy1', 'copy2', 'copy3', 'journal.jsonl'])
+
+    def test_journal_is_required(self):
+        with self.assertRaises(ValueError):
+            deduplicate_groups({'a': ['a', 'b']}, dry_run=False)
+        with self.assertRaises(ValueError):
+            deduplicate_groups({'a': ['a', 'b']}, mode='copy')
+
+
+if __name__ == '__main__':
+    unittest.main()
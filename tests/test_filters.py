@@ -0,0 +1,99 @@
+import os
+import tempfile
+import time
+import unittest
+
+from main import ScanFilter
+
+
+class ScanFilterTest(unittest.TestCase):
+
+    def test_name_rule_matches_at_any_depth(self):
+        scan_filter = ScanFilter(exclude=['*.tmp'])
+        self.assertFalse(scan_filter.accepts_file('a.tmp'))
+        self.assertFalse(scan_filter.accepts_file('dir/sub/a.tmp'))
+        self.assertTrue(scan_filter.accepts_file('dir/a.txt'))
+
+    def test_rule_with_slash_is_anchored(self):
+        scan_filter = ScanFilter(exclude=['build/*.o'])
+        self.assertFalse(scan_filter.accepts_file('build/a.o'))
+        self.assertTrue(scan_filter.accepts_file('src/build/a.o'))
+
+    def test_double_star_spans_directories(self):
+        scan_filter = ScanFilter(exclude=['logs/**/*.log'])
+        self.assertFalse(scan_filter.accepts_file('logs/a.log'))
+        self.assertFalse(scan_filter.accepts_file('logs/2023/01/a.log'))
+        self.assertTrue(scan_filter.accepts_file('other/a.log'))
+
+    def test_directory_rule_only_prunes_directories(self):
+        scan_filter = ScanFilter(exclude=['cache/'])
+        self.assertTrue(scan_filter.excludes_dir('cache'))
+        self.assertTrue(scan_filter.excludes_dir('a/cache'))
+        self.assertTrue(scan_filter.accepts_file('cache'))
+        dirs = ['cache', 'data']
+        scan_filter.prune('', dirs)
+        self.assertEqual(dirs, ['data'])
+
+    def test_negation_reincludes_and_last_rule_wins(self):
+        scan_filter = ScanFilter(exclude=['*.log', '!keep.log'])
+        self.assertFalse(scan_filter.accepts_file('a/debug.log'))
+        self.assertTrue(scan_filter.accepts_file('a/keep.log'))
+        scan_filter = ScanFilter(exclude=['!keep.log', '*.log'])
+        self.assertFalse(scan_filter.accepts_file('a/keep.log'))
+
+    def test_regex_rule_is_searched(self):
+        scan_filter = ScanFilter(exclude=[r're:~\$'])
+        self.assertFalse(scan_filter.accepts_file('docs/~$report.docx'))
+        self.assertTrue(scan_filter.accepts_file('docs/report.docx'))
+
+    def test_comments_and_blank_rules_are_ignored(self):
+        scan_filter = ScanFilter(exclude=['# comment', '  ', '*.bak'])
+        self.assertEqual(scan_filter.exclude, ['*.bak'])
+
+    def test_include_globs(self):
+        scan_filter = ScanFilter(include=['*.pdf', 'docs/*.txt'])
+        self.assertTrue(scan_filter.accepts_file('a/b.pdf'))
+        self.assertTrue(scan_filter.accepts_file('docs/a.txt'))
+        self.assertFalse(scan_filter.accepts_file('other/a.txt'))
+
+    def test_ignore_case(self):
+        self.assertTrue(ScanFilter(exclude=['*.TMP']).accepts_file('a.tmp'))
+        self.assertFalse(ScanFilter(exclude=['*.TMP'], ignore_case=True).accepts_file('a.tmp'))
+
+    def test_is_excluded_checks_parent_directories(self):
+        scan_filter = ScanFilter(exclude=['node_modules/'])
+        self.assertTrue(scan_filter.is_excluded('app/node_modules/pkg/index.js'))
+        self.assertFalse(scan_filter.is_excluded('app/src/index.js'))
+
+    def test_size_and_age_bounds(self):
+        with tempfile.TemporaryDirectory() as directory:
+            small = os.path.join(directory, 'small')
+            large = os.path.join(directory, 'large')
+            with open(small, 'wb') as f:
+                f.write(b'x' * 10)
+            with open(large, 'wb') as f:
+                f.write(b'x' * 2000)
+            old = time.time() - 10 * 86400
+            os.utime(large, (old, old))
+            scan_filter = ScanFilter(min_size=100)
+            self.assertFalse(scan_filter.accepts_file('small', small))
+            self.assertTrue(scan_filter.accepts_file('large', large))
+            self.assertFalse(ScanFilter(max_age_days=5).accepts_file('large', large))
+            self.assertTrue(ScanFilter(min_age_days=5).accepts_file('large', large))
+            self.assertFalse(ScanFilter(min_size=1).accepts_file('gone', os.path.join(directory, 'gone')))
+
+    def test_dict_round_trip(self):
+        scan_filter = ScanFilter(exclude=['*.tmp', '!a.tmp'], include=['*.txt'], min_size=1, ignore_case=True)
+        rebuilt = ScanFilter.from_dict(scan_filter.to_dict())
+        self.assertEqual(rebuilt.to_dict(), scan_filter.to_dict())
+        self.assertIsNone(ScanFilter.from_dict(None))
+
+    def test_duplicate_scan_defaults(self):
+        scan_filter = ScanFilter.duplicate_scan_defaults()
+        self.assertTrue(scan_filter.excludes_dir('System Volume Information'))
+        self.assertFalse(scan_filter.accepts_file('.hidden', st=os.stat_result((0,) * 10)))
+        self.assertEqual(scan_filter.min_size, 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
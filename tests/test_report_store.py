@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+
+from main import ReportStore, read_report_file, write_report_file
+
+
+def make_report():
+    return {
+        'missing_files': ['docs/a.txt', 'docs/b.txt'],
+        'extra_files': ['new/c.txt'],
+        'modified_files': [
+            {'file': 'big.iso', 'hash_ref': 'aa', 'hash_ext': 'bb', 'size_ref': 10, 'size_ext': 10,
+             'hash_type': 'tree-sha256/67108864'},
+            {'file': 'doc.odt', 'hash_ref': 'cc', 'hash_ext': 'dd', 'size_ref': 5, 'size_ext': 6,
+             'delta': {'changed_bytes_ref': 1, 'ranges_ref': [[0, 1]]}},
+            {'file': 'locked.db', 'hash_ref': 'ee', 'hash_ext': 'ERROR_READING_FILE', 'size_ref': 1,
+             'size_ext': 1, 'error': 'unreadable'}
+        ],
+        'missing_directories': ['old'],
+        'extra_directories': [],
+        'num_missing': 2,
+        'num_extra': 1,
+        'num_modified': 3,
+        'num_missing_dirs': 1,
+        'num_extra_dirs': 0,
+        'num_common': 40,
+        'timestamp': '2024-01-02 03:04:05.000006',
+        'scope': ['docs', 'new']
+    }
+
+
+class ReportStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        self.store = ReportStore(os.path.join(self.directory, 'reports.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self._directory.cleanup()
+
+    def test_report_round_trip(self):
+        report = make_report()
+        run_id = self.store.add_report(report, '/ref', '/ext', source='test')
+        loaded, run = self.store.load_report(run_id)
+        self.assertEqual(loaded, report)
+        self.assertEqual((run['reference_path'], run['num_modified'], run['num_common']), ('/ref', 3, 40))
+
+    def test_exported_file_round_trip(self):
+        report = make_report()
+        export_path = os.path.join(self.directory, 'export.json')
+        write_report_file(report, export_path, '/ref', '/ext')
+        self.assertEqual(read_report_file(export_path), report)
+        
+        run_id = self.store.add_report_file(export_path)
+        loaded, run = self.store.load_report(run_id)
+        self.assertEqual(loaded, report)
+        self.assertEqual((run['source'], run['extracted_path']), (export_path, '/ext'))
+        with open(export_path, encoding='utf-8') as f:
+            timestamp = json.load(f)['metadata']['timestamp']
+        self.assertEqual(self.store.find_run(export_path, timestamp), run_id)
+        self.assertIsNone(self.store.find_run(export_path, 'other'))
+
+    def test_legacy_file_and_invalid_file(self):
+        legacy_path = os.path.join(self.directory, 'legacy.json')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(make_report(), f)
+        self.assertEqual(read_report_file(legacy_path), make_report())
+        
+        invalid_path = os.path.join(self.directory, 'invalid.json')
+        with open(invalid_path, 'w', encoding='utf-8') as f:
+            json.dump({'missing_files': []}, f)
+        with self.assertRaises(ValueError):
+            read_report_file(invalid_path)
+        with self.assertRaises(ValueError):
+            self.store.add_report_file(invalid_path)
+        self.assertEqual(self.store.list_runs(), [])
+
+    def test_queries(self):
+        first = self.store.add_report(make_report(), '/ref', '/ext')
+        second = self.store.add_report(dict(make_report(), missing_files=['docs/a.txt']), '/ref', '/ext')
+        self.assertEqual([run['id'] for run in self.store.list_runs()], [second, first])
+        self.assertEqual(len(self.store.query_entries(run_id=first, status='missing', kind='file')), 2)
+        self.assertEqual([entry['run_id'] for entry in self.store.runs_for_path('docs/b.txt')], [first])
+        self.assertEqual({entry['path'] for entry in self.store.query_entries(path_query='ocs/')},
+                         {'docs/a.txt', 'docs/b.txt'})
+        self.assertEqual(self.store.query_entries(digest='dd')[0]['path'], 'doc.odt')
+        
+        self.store.delete_run(first)
+        self.assertEqual([run['id'] for run in self.store.list_runs()], [second])
+        self.assertEqual(self.store.runs_for_path('docs/b.txt'), [])
+        with self.assertRaises(KeyError):
+            self.store.load_report(first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import unittest
+
+from main import diff_saved_results, write_report_file
+
+
+def make_report(missing=(), extra=(), modified=()):
+    return {
+        'missing_files': list(missing),
+        'extra_files': list(extra),
+        'modified_files': [{'file': path, 'hash_ref': ref, 'hash_ext': ext, 'size_ref': 1, 'size_ext': 1}
+                           for path, ref, ext in modified],
+        'missing_directories': [],
+        'extra_directories': [],
+        'num_missing': len(missing),
+        'num_extra': len(extra),
+        'num_modified': len(modified)
+    }
+
+
+class DiffSavedResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def report_file(self, name, report):
+        path = os.path.join(self.directory, name)
+        write_report_file(report, path, '/ref', '/ext')
+        return path
+
+    def manifest_file(self, name, digests):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            for file_path, digest in digests.items():
+                f.write(json.dumps({'path': file_path, 'sha256': digest}) + "\n")
+        return path
+
+    def test_reports(self):
+        old = self.report_file('old.json', make_report(missing=['a', 'b'], extra=['x'],
+                                                       modified=[('m', '1', '2'), ('n', '1', '2')]))
+        new = self.report_file('new.json', make_report(missing=['b', 'c'], extra=['x'],
+                                                       modified=[('m', '1', '3'), ('a2', '1', '2')]))
+        output_path = os.path.join(self.directory, 'changes.jsonl')
+        for max_records in (2, 1000):  # with and without sorted runs spilled to disk
+            summary = diff_saved_results(old, new, output_path=output_path, max_records=max_records)
+            self.assertEqual(summary['format'], 'report')
+            self.assertEqual(summary['counts'], {'newly_missing': 1, 'newly_extra': 0, 'newly_modified': 2,
+                                                 'resolved': 2})
+            self.assertEqual((summary['old_records'], summary['new_records']), (5, 5))
+            self.assertEqual(sorted(entry['path'] for entry in summary['samples']['resolved']), ['a', 'n'])
+            self.assertEqual(sorted(entry['path'] for entry in summary['samples']['newly_modified']), ['a2', 'm'])
+            modified = next(entry for entry in summary['samples']['newly_modified'] if entry['path'] == 'm')
+            self.assertEqual((modified['digest_old'], modified['digest_new']), ('1|2', '1|3'))
+            with open(output_path, encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), 5)
+
+    def test_manifests(self):
+        old = self.manifest_file('old.jsonl', {'a': '1', 'b': '2', 'c': '3'})
+        new = self.manifest_file('new.jsonl', {'b': '2', 'c': '4', 'd': '5'})
+        summary = diff_saved_results(old, new, sample_limit=1)
+        self.assertEqual(summary['format'], 'manifest')
+        self.assertEqual(summary['counts'], {'newly_missing': 1, 'newly_extra': 1, 'newly_modified': 1,
+                                             'resolved': 0})
+        self.assertEqual(summary['samples']['newly_modified'][0]['path'], 'c')
+
+    def test_formats_must_match(self):
+        report = self.report_file('old.json', make_report())
+        manifest = self.manifest_file('new.jsonl', {'a': '1'})
+        with self.assertRaises(ValueError):
+            diff_saved_results(report, manifest)
+
+
+if __name__ == '__main__':
+    unittest.main()
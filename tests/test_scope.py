@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+
+from main import REPORT_RUN_SECTIONS, ScanScope, compare_archives_with_progress, merge_reports
+
+LIST_KEYS = ('missing_files', 'extra_files', 'missing_directories', 'extra_directories')
+COUNT_KEYS = ('num_missing', 'num_extra', 'num_modified', 'num_missing_dirs', 'num_extra_dirs', 'num_common')
+
+
+class ScanScopeTest(unittest.TestCase):
+
+    def test_contains(self):
+        scope = ScanScope(['Finance/', 'Services/*/2023', 'RH/*.xlsx'])
+        self.assertEqual(scope.to_list(), ['Finance', 'Services/*/2023', 'RH/*.xlsx'])
+        self.assertTrue(scope.contains('Finance'))
+        self.assertTrue(scope.contains('Finance/budget/2024.xlsx'))
+        self.assertTrue(scope.contains('Services/IT/2023/plan.docx'))
+        self.assertTrue(scope.contains('RH/paie.xlsx'))
+        self.assertFalse(scope.contains('Finances/budget.xlsx'))
+        self.assertFalse(scope.contains('Services/IT/2022/plan.docx'))
+        self.assertFalse(scope.contains('Services/IT'))
+        self.assertFalse(scope.contains('RH/paie.docx'))
+        self.assertFalse(scope.contains('finance/budget.xlsx'))
+        self.assertFalse(scope.contains(''))
+
+    def test_leads_to(self):
+        scope = ScanScope(['Services/*/2023'])
+        self.assertTrue(scope.leads_to(''))
+        self.assertTrue(scope.leads_to('Services'))
+        self.assertTrue(scope.leads_to('Services/IT'))
+        self.assertFalse(scope.leads_to('Services/IT/2023'))
+        self.assertFalse(scope.leads_to('Finance'))
+
+    def test_ignore_case(self):
+        scope = ScanScope(['Finance', 'RH/*.XLSX'], ignore_case=True)
+        self.assertTrue(scope.contains('FINANCE/budget.xlsx'))
+        self.assertTrue(scope.contains('rh/paie.xlsx'))
+        self.assertTrue(scope.leads_to('rh'))
+        self.assertFalse(ScanScope(['RH/*.XLSX']).leads_to('rh'))
+
+    def test_invalid_and_empty_entries(self):
+        for entry in ('../outside', 'a/../../b', 'C:/Windows', 'd:data'):
+            with self.assertRaises(ValueError):
+                ScanScope([entry])
+        self.assertIsNone(ScanScope.from_list(None))
+        self.assertIsNone(ScanScope.from_list(['', ' / ']))
+        self.assertEqual(ScanScope.from_list(['a\\b']).to_list(), ['a/b'])
+
+
+class MergeReportsTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.reference = os.path.join(self._directory.name, 'ref')
+        self.extracted = os.path.join(self._directory.name, 'ext')
+        for top in ('Finance', 'RH', 'Services'):
+            for i in range(3):
+                self.write(self.reference, f"{top}/file{i}.txt", f"{top}{i}")
+                self.write(self.extracted, f"{top}/file{i}.txt", f"{top}{i}")
+        self.write(self.reference, 'Finance/lost.txt', "lost")
+        self.write(self.extracted, 'RH/file1.txt', "changed")
+        self.write(self.extracted, 'Services/new.txt', "new")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write(self, root, relative_path, content):
+        path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def compare(self, scope=None):
+        return compare_archives_with_progress(self.extracted, self.reference, scope=scope)
+
+    def assertSameEntries(self, merged, expected):
+        for key in LIST_KEYS:
+            self.assertEqual(merged[key], sorted(expected[key]), key)
+        self.assertEqual([entry['file'] for entry in merged['modified_files']],
+                         sorted(entry['file'] for entry in expected['modified_files']))
+        for key in COUNT_KEYS:
+            self.assertEqual(merged[key], expected[key], key)
+
+    def test_merge_matches_a_full_run(self):
+        base = self.compare()
+        # Fix a difference and add another one inside the scope, and one outside it
+        self.write(self.extracted, 'Finance/lost.txt', "lost")
+        self.write(self.extracted, 'Finance/file2.txt', "changed")
+        os.remove(os.path.join(self.extracted, 'Services', 'new.txt'))
+        scoped = self.compare(scope=['Finance'])
+        self.assertEqual(scoped['scope'], ['Finance'])
+        
+        merged = merge_reports(base, scoped, self.reference, self.extracted)
+        expected = dict(base)
+        expected.update({key: [path for path in base[key] if not path.startswith('Finance/')] for key in LIST_KEYS})
+        expected['modified_files'] = [entry for entry in base['modified_files']
+                                      if not entry['file'].startswith('Finance/')] + scoped['modified_files']
+        # Finance/lost.txt became common, Finance/file2.txt is no longer identical
+        expected.update(num_missing=0, num_extra=1, num_modified=2, num_common=base['num_common'])
+        self.assertSameEntries(merged, expected)
+        self.assertEqual([entry['scope'] for entry in merged['merged_scopes']], [['Finance']])
+        self.assertNotIn('scope', merged)
+        for section in REPORT_RUN_SECTIONS:
+            self.assertNotIn(section, merged)
+        
+        # Once the change outside the scope is merged too, the report matches a full run
+        merged = merge_reports(merged, self.compare(scope=['Services']), self.reference, self.extracted)
+        self.assertSameEntries(merged, self.compare())
+        self.assertEqual(len(merged['merged_scopes']), 2)
+
+    def test_scoped_base_keeps_its_scope(self):
+        base = self.compare(scope=['RH'])
+        merged = merge_reports(base, self.compare(scope=['Finance', 'RH']))
+        self.assertEqual(merged['scope'], ['RH', 'Finance'])
+        self.assertEqual(merged['missing_files'], ['Finance/lost.txt'])
+        self.assertEqual([entry['file'] for entry in merged['modified_files']], ['RH/file1.txt'])
+
+    def test_report_without_scope(self):
+        with self.assertRaises(ValueError):
+            merge_reports(self.compare(), self.compare())
+
+
+if __name__ == '__main__':
+    unittest.main()
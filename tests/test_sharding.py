@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from main import compare_archives_with_progress, merge_shard_reports, plan_shards, shard_of_path
+
+LIST_KEYS = ('missing_files', 'extra_files', 'modified_files', 'missing_directories', 'extra_directories',
+             'num_missing', 'num_extra', 'num_modified', 'num_missing_dirs', 'num_extra_dirs', 'num_common')
+
+
+class ShardingTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.reference = os.path.join(self._directory.name, 'ref')
+        self.extracted = os.path.join(self._directory.name, 'ext')
+        for top in ('a', 'b', 'c', 'd', 'e'):
+            for i in range(6):
+                relative_path = os.path.join(top, f"sub{i % 2}", f"file{i}.txt")
+                self.write(self.reference, relative_path, f"{top}{i}")
+                if (top, i) != ('b', 3):
+                    self.write(self.extracted, relative_path, f"{top}{i}" if (top, i) != ('d', 1) else "changed")
+        self.write(self.reference, 'top.txt', "top")
+        self.write(self.extracted, 'e/extra/new.txt', "new")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write(self, root, relative_path, content):
+        path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def test_shard_of_path_is_stable_and_in_range(self):
+        self.assertEqual(shard_of_path('a/b.txt', 7), shard_of_path('a/b.txt', 7))
+        shards = [shard_of_path(f"dir/file{i}", 4) for i in range(1000)]
+        self.assertTrue(all(0 <= shard < 4 for shard in shards))
+        self.assertEqual(set(shards), {0, 1, 2, 3})
+        self.assertEqual({shard_of_path(f"dir/file{i}", 1) for i in range(100)}, {0})
+
+    def test_plan_shards(self):
+        shards = plan_shards(self.extracted, self.reference, 'top_level', 3)
+        self.assertEqual(len(shards), 3)
+        names = sorted(name for shard in shards for name in shard['top_level'])
+        self.assertEqual(names, ['a', 'b', 'c', 'd', 'e', 'top.txt'])
+        self.assertEqual(len(plan_shards(self.extracted, self.reference, 'top_level', 50)), 6)
+        self.assertEqual(plan_shards(self.extracted, self.reference, 'hash', 2),
+                         [{'shard_id': 0, 'hash_range': [0, 2]}, {'shard_id': 1, 'hash_range': [1, 2]}])
+        with self.assertRaises(ValueError):
+            plan_shards(self.extracted, self.reference, 'random', 2)
+
+    def test_merged_shards_match_a_single_run(self):
+        full = compare_archives_with_progress(self.extracted, self.reference)
+        for partition in ('top_level', 'hash'):
+            shards = plan_shards(self.extracted, self.reference, partition, 3)
+            reports = [compare_archives_with_progress(self.extracted, self.reference, shard=shard) for shard in shards]
+            merged = merge_shard_reports(reports, total_time=1.0)
+            for key in LIST_KEYS:
+                expected = sorted(full[key], key=lambda item: item['file'] if isinstance(item, dict) else item) \
+                    if isinstance(full[key], list) else full[key]
+                self.assertEqual(merged[key], expected, (partition, key))
+            self.assertEqual(merged['timestamp'], min(report['timestamp'] for report in reports))
+            self.assertEqual(merged['stats']['total_time'], 1.0)
+
+    def test_merge_sums_counters(self):
+        def shard_report(missing, modified, common):
+            return {'missing_files': missing, 'extra_files': [], 'missing_directories': [], 'extra_directories': [],
+                    'modified_files': [{'file': path} for path in modified], 'num_common': common,
+                    'hashing': {'tree_hashed_files': 1, 'hash_cache_hits': 2}}
+        merged = merge_shard_reports([shard_report(['z', 'b'], ['y'], 3), shard_report(['a'], ['x'], 4)])
+        self.assertEqual(merged['missing_files'], ['a', 'b', 'z'])
+        self.assertEqual([entry['file'] for entry in merged['modified_files']], ['x', 'y'])
+        self.assertEqual((merged['num_missing'], merged['num_modified'], merged['num_common']), (3, 2, 7))
+        self.assertEqual(merged['hashing'], {'tree_hashed_files': 2, 'hash_cache_hits': 4})
+        self.assertIsNone(merged['stats']['total_time'])
+
+
+if __name__ == '__main__':
+    unittest.main()